@@ -0,0 +1,95 @@
+"""
+Выделения памяти на кадр экрана: размеченная копия кадра против детекции только боксов.
+
+  - "до":    detect_on_image - копия кадра и рисование рамок на каждом кадре
+             (так раньше работал ScreenCapture и в режиме оверлея, где копия не нужна)
+  - "после": detect - только боксы; рамки рисует оверлей
+
+Сравниваются вызовы детектора и ScreenCapture.process_frame с разметкой кадра и без.
+Память - пик выделений Python/NumPy за вызов (tracemalloc); память тензоров torch не учитывается.
+МБ/с - пик за вызов, умноженный на число вызовов в секунду.
+
+Запуск:
+    python benchmarks/bench_allocations.py --resolution 3840x2160 --iterations 20
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# Добавляем корень проекта в путь импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD, INPUT_SIZE_SETTINGS
+
+
+def measure(func, iterations):
+    """Медианное время вызова (мс) и медианный пик выделений за вызов (МБ)."""
+    func()  # прогрев (и выделение переиспользуемых буферов)
+    times = []
+    peaks = []
+    tracemalloc.start()
+    for _ in range(iterations):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+        _, peak = tracemalloc.get_traced_memory()
+        peaks.append((peak - base) / 2**20)
+    tracemalloc.stop()
+    return float(np.median(times)), float(np.median(peaks))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--resolution", default="3840x2160", help="Размер кадра экрана")
+    parser.add_argument("--imgsz", type=int, default=INPUT_SIZE_SETTINGS["initial"])
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    from src.detection.yolo_detector import HotDogDetector
+    from src.utils.capture_backends import ReplayBackend
+    from src.utils.screen_capture import ScreenCapture
+
+    width, height = (int(v) for v in args.resolution.split("x"))
+    frame = np.random.default_rng(0).integers(0, 255, (height, width, 3), dtype=np.uint8)
+    detector = HotDogDetector(args.model, conf=CONFIDENCE_THRESHOLD, verbose=False)
+
+    # Захват заменяем воспроизведением того же кадра: process_frame получает кадр напрямую
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "frame.png")
+        cv2.imwrite(path, frame)
+        backend = ReplayBackend(path)
+    screen_cap = ScreenCapture(detector=detector, backend=backend)
+    screen_cap.running = True
+    screen_cap.imgsz_policy = None  # Фиксированный размер входа для сравнения
+
+    def process(annotate):
+        def call():
+            screen_cap.annotate_frames = annotate
+            screen_cap.process_frame(frame)
+        return call
+
+    cases = [
+        ("detect_on_image", lambda: detector.detect_on_image(frame, imgsz=args.imgsz)),
+        ("detect", lambda: detector.detect(frame, imgsz=args.imgsz)),
+        ("process_frame с разметкой", process(True)),
+        ("process_frame без разметки", process(False)),
+    ]
+
+    print(f"Кадр {width}x{height}, imgsz {args.imgsz}")
+    print(f"{'вызов':<30}{'мс':>8}{'МБ/вызов':>11}{'МБ/с':>9}")
+    for name, func in cases:
+        latency, peak = measure(func, args.iterations)
+        print(f"{name:<30}{latency:>8.1f}{peak:>11.2f}{peak * 1000 / latency:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
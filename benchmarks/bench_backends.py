@@ -0,0 +1,98 @@
+"""
+Сравнение движков инференса на CPU: PyTorch, ONNX Runtime, OpenVINO и их квантизированных вариантов.
+
+Для каждого движка и размера входа (imgsz) измеряются:
+  - задержка одного кадра (p50 / p95, мс) - как при захвате экрана
+  - пропускная способность батча (кадр/с) - как при обработке видео
+
+Экспорт в ONNX / OpenVINO выполняется один раз и кэшируется (см. src/detection/model_export.py).
+
+Запуск:
+    python benchmarks/bench_backends.py --sizes 320,480,640 --iterations 30
+    python benchmarks/bench_backends.py --backends torch,onnx,onnx:int8 --json backends.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+# Добавляем корень проекта в путь импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD
+from src.detection.model_export import available_backends
+
+
+def measure(detector, frames, iterations, batch_size):
+    """Задержка по одному кадру и пропускная способность батчами."""
+    # Прогрев: первые вызовы включают инициализацию движка
+    detector.infer_batch(frames[:1])
+    detector.infer_batch(frames[:batch_size])
+
+    latencies = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        detector.infer_batch([frames[i % len(frames)]])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    batches = max(1, iterations // batch_size)
+    start = time.perf_counter()
+    for _ in range(batches):
+        detector.infer_batch(frames[:batch_size])
+    throughput = batches * batch_size / (time.perf_counter() - start)
+
+    return {
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "throughput_fps": throughput,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--backends", help="Движки через запятую, с точностью через двоеточие: "
+                                           "torch,onnx,onnx:int8,openvino:fp16 (по умолчанию все доступные, fp32)")
+    parser.add_argument("--sizes", default="320,480,640", help="Размеры входа модели через запятую")
+    parser.add_argument("--resolution", default="1920x1080", help="Размер тестового кадра")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--json", help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    from src.detection.yolo_detector import HotDogDetector
+
+    backends = args.backends.split(",") if args.backends else available_backends()
+    sizes = [int(s) for s in args.sizes.split(",")]
+    width, height = (int(v) for v in args.resolution.split("x"))
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(args.batch_size)]
+
+    results = []
+    print(f"{'движок':<14}{'imgsz':>7}{'p50, мс':>10}{'p95, мс':>10}{'батч, кадр/с':>15}")
+    for variant in backends:
+        backend, _, precision = variant.partition(":")
+        start = time.perf_counter()
+        detector = HotDogDetector(args.model, conf=CONFIDENCE_THRESHOLD, verbose=False, backend=backend,
+                                  precision=precision or "fp32")
+        load_time = time.perf_counter() - start
+        if detector.precision != (precision or "fp32"):
+            print(f"{variant}: вариант отклонен проверкой точности, пропускаем")
+            continue
+        for size in sizes:
+            detector.imgsz = size
+            row = dict(backend=variant, imgsz=size, load_s=load_time,
+                       **measure(detector, frames, args.iterations, args.batch_size))
+            results.append(row)
+            print(f"{variant:<14}{size:>7}{row['p50_ms']:>10.1f}{row['p95_ms']:>10.1f}{row['throughput_fps']:>15.1f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"resolution": args.resolution, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Бенчмарк задержки захвата кадра для разных источников.
+
+Измеряет:
+  - подготовку кадра для модели при 1080p и 4K: прежний путь (PIL RGB -> np.array -> cvtColor -> copy)
+    против нового (BGRA от mss -> BGR в заранее выделенный буфер);
+  - задержку grab() у источника replay при 1080p и 4K;
+  - задержку grab() у реальных источников (mss, pyautogui), если доступен дисплей.
+
+Запуск:
+    python benchmarks/bench_capture.py --iterations 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+# Добавляем корень проекта в путь импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.capture_backends import MSSBackend, PyAutoGUIBackend, ReplayBackend
+
+RESOLUTIONS = {"1080p": (1920, 1080), "4K": (3840, 2160)}
+
+
+def measure(func, iterations):
+    """Возвращает (среднее, p95) время вызова в миллисекундах."""
+    func()  # прогрев
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+    return float(np.mean(times)), float(np.percentile(times, 95))
+
+
+def bench_conversion(width, height, iterations):
+    """Сравнивает подготовку кадра из сырых данных захвата."""
+    rng = np.random.default_rng(0)
+    rgb = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)  # как PIL-скриншот pyautogui
+    bgra = rng.integers(0, 256, (height, width, 4), dtype=np.uint8)  # как сырые данные mss
+    out = np.empty((height, width, 3), dtype=np.uint8)
+
+    def legacy():
+        frame = np.array(rgb)
+        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        return frame.copy()
+
+    def in_place():
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=out)
+
+    return measure(legacy, iterations), measure(in_place, iterations)
+
+
+def bench_replay(width, height, iterations):
+    """Задержка grab() у источника replay с переиспользуемым буфером."""
+    with tempfile.TemporaryDirectory() as tmp:
+        image = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+        path = os.path.join(tmp, "frame.png")
+        cv2.imwrite(path, image)
+        backend = ReplayBackend(path)
+    state = {"buffer": None}
+
+    def grab():
+        state["buffer"] = backend.grab(out=state["buffer"])
+
+    return measure(grab, iterations)
+
+
+def bench_live(backend_cls, iterations):
+    """Задержка grab() у реального источника или None, если он недоступен."""
+    try:
+        backend = backend_cls()
+        state = {"buffer": backend.grab()}
+    except Exception as e:
+        return None, str(e).splitlines()[0] if str(e) else type(e).__name__
+
+    def grab():
+        state["buffer"] = backend.grab(out=state["buffer"])
+
+    result = measure(grab, iterations)
+    shape = state["buffer"].shape
+    backend.close()
+    return result, f"{shape[1]}x{shape[0]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк источников захвата экрана")
+    parser.add_argument("--iterations", type=int, default=50, help="Количество повторов")
+    args = parser.parse_args()
+
+    print("Подготовка кадра для модели (мс, среднее / p95):")
+    for name, (width, height) in RESOLUTIONS.items():
+        (legacy_mean, legacy_p95), (new_mean, new_p95) = bench_conversion(width, height, args.iterations)
+        print(f"  {name:5s}  прежний путь: {legacy_mean:6.2f} / {legacy_p95:6.2f}   "
+              f"в буфер: {new_mean:6.2f} / {new_p95:6.2f}")
+
+    print("Источник replay (мс, среднее / p95):")
+    for name, (width, height) in RESOLUTIONS.items():
+        mean, p95 = bench_replay(width, height, args.iterations)
+        print(f"  {name:5s}  {mean:6.2f} / {p95:6.2f}")
+
+    print("Реальный экран (мс, среднее / p95):")
+    for backend_cls in (MSSBackend, PyAutoGUIBackend):
+        result, info = bench_live(backend_cls, args.iterations)
+        if result is None:
+            print(f"  {backend_cls.name:10s} недоступен: {info}")
+        else:
+            print(f"  {backend_cls.name:10s} {info}: {result[0]:6.2f} / {result[1]:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
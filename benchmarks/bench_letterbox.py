@@ -0,0 +1,92 @@
+"""
+Задержка и память подготовки кадров экрана к инференсу: до и после LetterboxCache.
+
+  - "до":    кадр 1080p/4K передается в модель как есть, ultralytics масштабирует его сам
+             (новый массив на каждом вызове)
+  - "после": кадр уменьшается в переиспользуемый буфер (src/detection/input_size.py)
+
+Сначала измеряется только подготовка кадра (ultralytics LetterBox против LetterboxCache),
+затем, если не указан --no-model, полный вызов detect_on_image.
+Память - пик выделений Python/NumPy за вызов (tracemalloc).
+
+Запуск:
+    python benchmarks/bench_letterbox.py --iterations 50
+    python benchmarks/bench_letterbox.py --no-model --imgsz 320,640
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+# Добавляем корень проекта в путь импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD
+from src.detection.input_size import LetterboxCache
+
+RESOLUTIONS = {"1080p": (1080, 1920), "4K": (2160, 3840)}
+
+
+def measure(func, iterations):
+    """Медианное время вызова (мс) и пик выделенной за вызов памяти (МБ)."""
+    func()  # прогрев (и выделение буферов кэша)
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return float(np.median(times)), peak / 2**20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--imgsz", default="640", help="Размеры входа через запятую")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--no-model", action="store_true", help="Измерить только подготовку кадра")
+    args = parser.parse_args()
+
+    from ultralytics.data.augment import LetterBox
+
+    sizes = [int(s) for s in args.imgsz.split(",")]
+    rng = np.random.default_rng(0)
+    frames = {name: rng.integers(0, 255, shape + (3,), dtype=np.uint8) for name, shape in RESOLUTIONS.items()}
+
+    print("Подготовка кадра")
+    print(f"{'кадр':<7}{'imgsz':>6}{'до, мс':>9}{'до, МБ':>9}{'после, мс':>12}{'после, МБ':>12}")
+    cache = LetterboxCache()
+    for name, frame in frames.items():
+        for imgsz in sizes:
+            letterbox = LetterBox(new_shape=(imgsz, imgsz), auto=True, stride=32)
+            before = measure(lambda: letterbox(image=frame), args.iterations)
+            after = measure(lambda: cache.resize(frame, imgsz), args.iterations)
+            print(f"{name:<7}{imgsz:>6}{before[0]:>9.2f}{before[1]:>9.2f}{after[0]:>12.2f}{after[1]:>12.2f}")
+
+    if args.no_model:
+        return
+
+    from src.detection.yolo_detector import HotDogDetector
+    detector = HotDogDetector(args.model, conf=CONFIDENCE_THRESHOLD, verbose=False)
+
+    print("\ndetect_on_image")
+    print(f"{'кадр':<7}{'imgsz':>6}{'до, мс':>9}{'до, МБ':>9}{'после, мс':>12}{'после, МБ':>12}")
+    for name, frame in frames.items():
+        for imgsz in sizes:
+            detector.imgsz = imgsz
+            before = measure(lambda: detector.detect_on_image(frame), args.iterations)
+            detector.imgsz = None
+            after = measure(lambda: detector.detect_on_image(frame, imgsz=imgsz), args.iterations)
+            print(f"{name:<7}{imgsz:>6}{before[0]:>9.2f}{before[1]:>9.2f}{after[0]:>12.2f}{after[1]:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Время отрисовки кадра оверлея: перерисовка всего окна против перерисовки областей рамок.
+
+  - "до":    update_boxes перерисовывает весь экран, а paintEvent каждый раз создает перо,
+             шрифт и измеряет подписи (кэш подписей очищается перед каждым кадром)
+  - "после": перерисовываются только области старых и новых рамок, перо, шрифт
+             и изображения подписей берутся из кэша
+
+Оверлей размером с экран (по умолчанию 4K), по экрану движутся несколько рамок;
+время кадра - синхронная перерисовка repaint() в мс (p50 / p95), площадь - доля экрана,
+которую перерисовывает оверлей и затем перекомпонует оконный менеджер.
+Без дисплея запускается на платформе Qt offscreen.
+
+Запуск:
+    python benchmarks/bench_overlay.py --resolution 3840x2160 --boxes 3 --frames 200
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Добавляем корень проекта в путь импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def moving_boxes(frame, count, width, height):
+    """Рамки, которые сдвигаются на несколько пикселей за кадр (как при сглаживании трекера)."""
+    boxes = []
+    for i in range(count):
+        x = (100 + i * 400 + frame * 4) % (width - 300)
+        y = 100 + i * 300 % (height - 300)
+        conf = 0.80 + (frame % 10) / 100
+        boxes.append((x, y, x + 200, y + 120, "hot dog", conf, i + 1))
+    return boxes
+
+
+def region_area(region):
+    return sum(rect.width() * rect.height() for rect in region.rects())
+
+
+def run(overlay, full_repaint, frames, count, width, height):
+    times = []
+    areas = []
+    for frame in range(frames):
+        boxes = moving_boxes(frame, count, width, height)
+        if full_repaint:
+            # Прежнее поведение: перо, шрифт и подписи создаются заново, перерисовывается весь экран
+            overlay._style_key = None
+            overlay._label_pixmaps.clear()
+            overlay.boxes = boxes
+            overlay.show_boxes = True
+            areas.append(1.0)
+            start = time.perf_counter()
+            overlay.repaint()
+        else:
+            damage = overlay.boxes_region(overlay.boxes).united(overlay.boxes_region(boxes))
+            overlay.boxes = boxes
+            overlay.show_boxes = True
+            areas.append(region_area(damage) / (width * height))
+            start = time.perf_counter()
+            overlay.repaint(damage)
+        times.append((time.perf_counter() - start) * 1000)
+    return np.percentile(times, 50), np.percentile(times, 95), np.mean(areas) * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--resolution", default="3840x2160", help="Размер оверлея")
+    parser.add_argument("--boxes", type=int, default=3, help="Количество рамок")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    if sys.platform.startswith("linux") and not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    from PyQt5.QtWidgets import QApplication
+    from src.utils.overlay import DetectionOverlay
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    width, height = (int(v) for v in args.resolution.split("x"))
+    overlay = DetectionOverlay()
+    overlay.enable_sound(False)
+    overlay.setGeometry(0, 0, width, height)
+    overlay.show()
+    app.processEvents()
+
+    print(f"Оверлей {width}x{height}, рамок: {args.boxes}")
+    print(f"{'режим':<34}{'p50, мс':>9}{'p95, мс':>9}{'площадь, %':>12}")
+    for name, full in (("весь экран, без кэша (до)", True), ("области рамок, кэш (после)", False)):
+        run(overlay, full, 10, args.boxes, width, height)  # прогрев
+        p50, p95, area = run(overlay, full, args.frames, args.boxes, width, height)
+        print(f"{name:<34}{p50:>9.2f}{p95:>9.2f}{area:>12.2f}")
+    overlay.close()
+
+
+if __name__ == "__main__":
+    main()
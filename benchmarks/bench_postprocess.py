@@ -0,0 +1,143 @@
+"""
+Микро-бенчмарк постобработки результатов YOLO.
+
+Сравнивает стоимость разбора результатов на кадр:
+  - "до":    80 классов COCO + цикл Python по каждому боксу (int(box.cls[0]), map(int, box.xyxy[0]))
+  - "после": модель уже отфильтровала классы (classes=) + HotDogDetector._extract_detections
+             (одно векторное извлечение NumPy); отдельно - с пересчетом координат из уменьшенного
+             буфера и обрезкой по кадру, как при захвате экрана (infer_resized)
+
+Модель не загружается: _extract_detections вызывается у детектора без весов.
+
+Запуск:
+    python benchmarks/bench_postprocess.py --boxes 30 --iterations 2000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Добавляем корень проекта в путь импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import CLASSES
+from src.detection.yolo_detector import HotDogDetector
+
+HOT_DOG_CLASS = 52
+FRAME_SHAPE = (1080, 1920, 3)
+
+
+class _FakeBox:
+    """Один бокс с тем же интерфейсом индексации, что и у ultralytics (box.cls[0], box.xyxy[0])."""
+
+    def __init__(self, row):
+        self.xyxy = row[None, :4]
+        self.conf = row[None, 4]
+        self.cls = row[None, 5]
+
+
+class _FakeBoxes:
+    """Минимальная замена ultralytics Boxes для запуска без torch."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self
+
+    def __iter__(self):
+        return (_FakeBox(row) for row in self.data)
+
+
+class _FakeResult:
+    def __init__(self, boxes):
+        self.boxes = boxes
+
+
+def make_result(data):
+    """Создает результат детекции: настоящий ultralytics Boxes, если доступен torch, иначе замену."""
+    try:
+        import torch
+        from ultralytics.engine.results import Boxes
+        return _FakeResult(Boxes(torch.from_numpy(data), orig_shape=(1080, 1920)))
+    except ImportError:
+        return _FakeResult(_FakeBoxes(data))
+
+
+def make_boxes(count, hot_dogs, rng):
+    """Генерирует count случайных боксов, из которых hot_dogs относятся к классу 52."""
+    x1 = rng.uniform(0, 1800, count)
+    y1 = rng.uniform(0, 1000, count)
+    w = rng.uniform(10, 300, count)
+    h = rng.uniform(10, 300, count)
+    conf = rng.uniform(0.35, 1.0, count)
+    cls = rng.choice([c for c in range(80) if c != HOT_DOG_CLASS], count).astype(float)
+    cls[:hot_dogs] = HOT_DOG_CLASS
+    return np.stack([x1, y1, x1 + w, y1 + h, conf, cls], axis=1).astype(np.float32)
+
+
+def legacy_postprocess(result, class_names):
+    """Прежний разбор: цикл Python по каждому боксу всех классов."""
+    detected_objects = []
+    for box in result.boxes:
+        cls = int(box.cls[0])
+        if class_names and cls not in class_names:
+            continue
+        x1, y1, x2, y2 = map(int, box.xyxy[0])
+        conf = float(box.conf[0])
+        detected_objects.append((cls, x1, y1, x2, y2, conf))
+    return detected_objects
+
+
+def measure(func, iterations):
+    """Возвращает среднее время вызова func() в микросекундах."""
+    func()  # прогрев
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк постобработки результатов YOLO")
+    parser.add_argument("--boxes", type=int, default=30, help="Боксов всех классов на кадр до фильтрации")
+    parser.add_argument("--hot-dogs", type=int, default=2, help="Из них хот-догов")
+    parser.add_argument("--iterations", type=int, default=2000, help="Количество повторов")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    all_classes = make_boxes(args.boxes, args.hot_dogs, rng)
+    hot_dogs_only = all_classes[:args.hot_dogs]
+
+    before_result = make_result(all_classes)
+    after_result = make_result(hot_dogs_only)
+
+    # Разбор результатов не обращается к модели - веса не загружаем
+    detector = HotDogDetector.__new__(HotDogDetector)
+    extract = detector._extract_detections
+    # Кадр 1080p, уменьшенный до входа 640 (как в LetterboxCache)
+    scale = (640 / FRAME_SHAPE[1], 360 / FRAME_SHAPE[0])
+
+    # Оба способа должны давать одинаковые детекции
+    assert legacy_postprocess(before_result, CLASSES) == extract(after_result, CLASSES)
+
+    before = measure(lambda: legacy_postprocess(before_result, CLASSES), args.iterations)
+    after = measure(lambda: extract(after_result, CLASSES), args.iterations)
+    vectorized_all = measure(lambda: extract(before_result, CLASSES), args.iterations)
+    resized = measure(lambda: extract(after_result, CLASSES, scale, FRAME_SHAPE), args.iterations)
+
+    print(f"Боксов на кадр: {args.boxes} (хот-догов: {args.hot_dogs})")
+    print(f"  до   (80 классов, цикл Python):       {before:8.1f} мкс/кадр")
+    print(f"  векторно (80 классов, без classes=):  {vectorized_all:8.1f} мкс/кадр")
+    print(f"  после (classes=, векторно):           {after:8.1f} мкс/кадр")
+    print(f"  после + масштаб и обрезка по кадру:   {resized:8.1f} мкс/кадр")
+    print(f"  ускорение: x{before / after:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Точность и скорость выборочного инференса на видео (stride / adaptive stride + трекер).
+
+Эталон - инференс на каждом кадре. Для каждого шага выборки считается скорость обработки
+и совпадение боксов с эталоном на всех кадрах (IoU >= --iou):
+  - recall:    доля эталонных боксов, найденных в режиме выборки
+  - precision: доля боксов режима выборки, совпавших с эталоном
+  - mean IoU:  средний IoU совпавших пар
+
+Если готового видео нет, --image синтезирует тестовое видео: изображение движется по шумному фону.
+
+Запуск:
+    python benchmarks/bench_sampling.py --video recording.mp4 --strides 2,4,8 --adaptive
+    python benchmarks/bench_sampling.py --image hotdog.jpg --frames 300
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Добавляем корень проекта в путь импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD, VIDEO_SETTINGS
+from src.detection.tracker import iou_matrix
+from video_fixtures import make_fixture, run_pipeline
+
+
+def compare(reference, sampled, iou_threshold):
+    """Сопоставляет боксы режима выборки с эталоном по всем кадрам."""
+    matched = 0
+    ious = []
+    ref_total = sum(len(d) for d in reference.values())
+    sampled_total = sum(len(d) for d in sampled.values())
+    for index, ref in reference.items():
+        pred = sampled.get(index, [])
+        if not ref or not pred:
+            continue
+        iou = iou_matrix([d[1:5] for d in ref], [d[1:5] for d in pred])
+        used = set()
+        for r in range(len(ref)):
+            order = np.argsort(iou[r])[::-1]
+            for p in order:
+                if iou[r, p] < iou_threshold:
+                    break
+                if p not in used:
+                    used.add(p)
+                    matched += 1
+                    ious.append(iou[r, p])
+                    break
+    return {
+        "recall": matched / ref_total if ref_total else 1.0,
+        "precision": matched / sampled_total if sampled_total else 1.0,
+        "mean_iou": float(np.mean(ious)) if ious else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Тестовое видео")
+    parser.add_argument("--image", help="Изображение для синтеза тестового видео (если нет --video)")
+    parser.add_argument("--frames", type=int, default=300, help="Кадров в синтезированном видео")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--conf", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--strides", default="2,4,8", help="Шаги выборки через запятую")
+    parser.add_argument("--adaptive", action="store_true", help="Добавить адаптивный шаг")
+    parser.add_argument("--batch-size", type=int, default=VIDEO_SETTINGS["batch_size"])
+    parser.add_argument("--iou", type=float, default=0.5, help="Порог IoU для совпадения с эталоном")
+    parser.add_argument("--all-classes", action="store_true", help="Учитывать все классы COCO, а не только хот-доги")
+    parser.add_argument("--json", help="Сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    video = args.video
+    if video is None:
+        if args.image is None:
+            parser.error("нужен --video или --image")
+        video = os.path.join(tempfile.mkdtemp(), "fixture.mp4")
+        make_fixture(args.image, video, args.frames)
+
+    from src.detection.yolo_detector import HotDogDetector
+    detector = HotDogDetector(args.model, conf=args.conf, verbose=False)
+    class_names = {} if args.all_classes else detector.classes
+
+    configs = [("каждый кадр", 1, False)]
+    configs += [(f"stride {s}", int(s), False) for s in args.strides.split(",") if s.strip()]
+    if args.adaptive:
+        configs.append(("adaptive", 1, True))
+
+    results = []
+    reference = None
+    base_fps = None
+    print(f"{'режим':<14}{'инференс':>10}{'кадр/с':>10}{'ускорение':>11}{'recall':>9}{'precision':>11}{'mean IoU':>10}")
+    for name, stride, adaptive in configs:
+        stats, detections = run_pipeline(detector, video, class_names, args.batch_size, stride, adaptive)
+        if reference is None:
+            reference, base_fps = detections, stats["fps"]
+        quality = compare(reference, detections, args.iou)
+        row = dict(mode=name, inferred=stats["inferred"], frames=stats["frames"], fps=stats["fps"],
+                   speedup=stats["fps"] / base_fps if base_fps else 0.0, **quality)
+        results.append(row)
+        print(f"{name:<14}{row['inferred']:>10}{row['fps']:>10.1f}{row['speedup']:>10.2f}x"
+              f"{row['recall']:>9.3f}{row['precision']:>11.3f}{row['mean_iou']:>10.3f}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"video": video, "results": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
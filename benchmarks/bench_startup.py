@@ -0,0 +1,82 @@
+"""
+Время запуска консольной точки входа (python -X importtime).
+
+Запускает `src/cli.py --help` с -X importtime, суммирует время импорта модулей
+и проверяет, что PyQt5, pyautogui, ultralytics и torch не загружаются.
+
+Запуск:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("PyQt5", "pyautogui", "ultralytics", "torch")
+
+
+def run_importtime(script_args):
+    """
+    Запускает скрипт с -X importtime.
+
+    Returns:
+        tuple: (время процесса в мс, суммарное время импортов в мс, {модуль: накопленное время импорта в мкс})
+    """
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *script_args],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+
+    modules = {}
+    self_total = 0
+    for line in proc.stderr.splitlines():
+        # Формат: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        modules[name] = int(cumulative)
+        self_total += int(self_us)
+    return wall_ms, self_total / 1000, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Время запуска консольной точки входа")
+    parser.add_argument("--runs", type=int, default=5, help="Количество запусков")
+    parser.add_argument("--top", type=int, default=10, help="Сколько самых медленных импортов показать")
+    args = parser.parse_args()
+
+    script = [os.path.join("src", "cli.py"), "--help"]
+    walls = []
+    import_ms = []
+    modules = {}
+    for _ in range(args.runs):
+        wall_ms, total_ms, modules = run_importtime(script)
+        walls.append(wall_ms)
+        import_ms.append(total_ms)
+
+    print(f"src/cli.py --help: лучший запуск {min(walls):.0f} мс, медиана {sorted(walls)[len(walls) // 2]:.0f} мс")
+    print(f"Импорт модулей: {min(import_ms):.0f} мс, загружено модулей: {len(modules)}")
+    print("Самые медленные импорты (накопленно):")
+    top_level = {name: us for name, us in modules.items() if "." not in name}
+    for name, us in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {us / 1000:8.1f} мс  {name}")
+
+    # Для сравнения: сколько стоил бы прежний немедленный импорт ultralytics
+    wall_ms, total_ms, baseline = run_importtime(["-c", "from ultralytics import YOLO"])
+    if "ultralytics" in baseline:
+        print(f"Для сравнения, 'from ultralytics import YOLO': {wall_ms:.0f} мс (импорт модулей {total_ms:.0f} мс)")
+
+    loaded_heavy = sorted({name.split(".")[0] for name in modules} & set(HEAVY_MODULES))
+    if loaded_heavy:
+        print(f"ОШИБКА: при запуске загружены тяжелые модули: {', '.join(loaded_heavy)}")
+        return 1
+    print(f"Не загружены: {', '.join(HEAVY_MODULES)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
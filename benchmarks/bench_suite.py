@@ -0,0 +1,344 @@
+"""
+Набор воспроизводимых бенчмарков: детекция на кадре, захват экрана и обработка видео.
+
+Работает без дисплея и без сети: кадры синтетические (шум и фигуры) или берутся из папки
+--fixtures (изображения), захват экрана подменяется источником ReplayBackend.
+Для каждого пути и разрешения измеряются:
+  - fps
+  - задержка p50 / p95 / p99, мс:
+      detect  - один вызов HotDogDetector.detect_on_image
+      capture - от захвата кадра ScreenCapture до вызова оверлея
+      video   - интервал между кадрами, записанными detect_on_video
+  - пиковая память процесса (RSS, МБ) и загрузка CPU (%, 100 = одно ядро)
+  - время по этапам из src/utils/profiling.py
+
+Каждый случай запускается в отдельном процессе, поэтому пиковая память не смешивается между случаями.
+
+Запуск:
+    python benchmarks/bench_suite.py --json baseline.json
+    python benchmarks/bench_suite.py --paths detect,video --resolutions 720p,1080p --json new.json \\
+        --compare baseline.json --tolerance 0.15
+
+В режиме --compare ухудшение fps, задержки или памяти больше tolerance считается регрессией,
+как и упавший случай, который есть в базе; при регрессиях скрипт завершается с кодом 1.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+# Добавляем корень проекта в путь импорта
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD, INPUT_SIZE_SETTINGS
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "1440p": (2560, 1440), "4K": (3840, 2160)}
+PATHS = ("detect", "capture", "video")
+
+# Метрика -> лучше больше (True) или меньше (False); по ним ищутся регрессии
+COMPARED_METRICS = {
+    "fps": True,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+}
+
+
+def synthetic_frames(size, count, seed=0):
+    """Синтетические кадры: шум и цветные фигуры, чтобы кадры отличались друг от друга."""
+    width, height = size
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(count):
+        frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+        for _ in range(8):
+            x, y = int(rng.integers(0, width)), int(rng.integers(0, height))
+            axes = (int(rng.integers(20, width // 8)), int(rng.integers(10, height // 12)))
+            color = tuple(int(c) for c in rng.integers(0, 255, 3))
+            cv2.ellipse(frame, (x, y), axes, float(rng.integers(0, 180)), 0, 360, color, -1)
+        frames.append(frame)
+    return frames
+
+
+def load_frames(size, count, fixtures=None):
+    """Кадры нужного размера: из папки fixtures (по кругу) или синтетические."""
+    if not fixtures:
+        return synthetic_frames(size, count)
+    from src.utils.capture_backends import ReplayBackend
+
+    images = ReplayBackend(fixtures, size=size).frames
+    return [images[i % len(images)] for i in range(count)]
+
+
+def write_video(path, frames, fps=30):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (frames[0].shape[1], frames[0].shape[0]))
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+
+
+def peak_rss_mb():
+    """Пиковая память процесса в МБ (None, если узнать нельзя)."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux отдает КБ, macOS - байты
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    memory = psutil.Process().memory_info()
+    return getattr(memory, "peak_wset", memory.rss) / 2**20
+
+
+def cpu_seconds():
+    times = os.times()
+    return times.user + times.system
+
+
+def percentiles(latencies):
+    if len(latencies) == 0:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None}
+    p50, p95, p99 = np.percentile(latencies, (50, 95, 99))
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def bench_detect(detector, size, args):
+    frames = load_frames(size, 8, args.fixtures)
+    imgsz = INPUT_SIZE_SETTINGS["initial"]
+    for frame in frames[:2]:
+        detector.detect_on_image(frame, imgsz=imgsz)  # прогрев
+
+    latencies = []
+    start = time.perf_counter()
+    for i in range(args.iterations):
+        call_start = time.perf_counter()
+        detector.detect_on_image(frames[i % len(frames)], imgsz=imgsz)
+        latencies.append((time.perf_counter() - call_start) * 1000)
+    elapsed = time.perf_counter() - start
+    return dict(fps=args.iterations / elapsed, **percentiles(latencies))
+
+
+def bench_capture(detector, size, args):
+    from src.utils.capture_backends import ReplayBackend
+    from src.utils.screen_capture import ScreenCapture
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for i, frame in enumerate(load_frames(size, 8, args.fixtures)):
+            cv2.imwrite(os.path.join(tmp_dir, f"frame_{i:02d}.png"), frame)
+        backend = ReplayBackend(tmp_dir)
+
+    screen_cap = ScreenCapture(
+        detector=detector, backend=backend, overlay_callback=lambda boxes, captured_at=None: None
+    )
+    detector.detect_on_image(backend.frames[0], imgsz=screen_cap.imgsz)  # прогрев
+
+    result = {}
+
+    def finish():
+        # Снимаем статистику до остановки: stop_capture() ее очищает
+        result["latencies"] = screen_cap.latency.values("total")
+        result["inferred"] = screen_cap.frame_stats["inferred"]
+        screen_cap.running = False
+
+    timer = threading.Timer(args.duration, finish)
+    timer.start()
+    start = time.perf_counter()
+    screen_cap.start_capture(fps=args.capture_fps, use_overlay=True)
+    elapsed = time.perf_counter() - start
+    screen_cap.close()
+    return dict(fps=result["inferred"] / elapsed, **percentiles(result["latencies"]))
+
+
+def bench_video(detector, size, args):
+    frames = load_frames(size, args.video_frames, args.fixtures)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        video_path = os.path.join(tmp_dir, "input.mp4")
+        write_video(video_path, frames)
+        del frames
+        detector.infer_batch(load_frames(size, 1, args.fixtures))  # прогрев
+
+        written = []
+        start = time.perf_counter()
+        detector.detect_on_video(
+            video_path, os.path.join(tmp_dir, "output.mp4"),
+            progress_callback=lambda done, total, fps: written.append(time.perf_counter()),
+        )
+        elapsed = time.perf_counter() - start
+    intervals = np.diff([start] + written) * 1000
+    return dict(fps=len(written) / elapsed, **percentiles(intervals))
+
+
+def run_case(args):
+    """Выполняет один случай (путь:разрешение) в текущем процессе и печатает JSON результата."""
+    from src.detection.yolo_detector import HotDogDetector
+    from src.utils.profiling import profiler
+
+    path, resolution = args.run_case.split(":")
+    size = RESOLUTIONS[resolution]
+    detector = HotDogDetector(args.model, conf=CONFIDENCE_THRESHOLD, verbose=False, backend=args.backend)
+
+    profiler.enabled = True
+    cpu_start = cpu_seconds()
+    wall_start = time.perf_counter()
+    result = {"detect": bench_detect, "capture": bench_capture, "video": bench_video}[path](detector, size, args)
+    wall = time.perf_counter() - wall_start
+
+    result.update(
+        path=path,
+        resolution=resolution,
+        cpu_percent=(cpu_seconds() - cpu_start) / wall * 100,
+        peak_rss_mb=peak_rss_mb(),
+        stages={stage: round(s["p50_ms"], 2) for stage, s in profiler.summary().items()},
+    )
+    print(json.dumps(result))
+
+
+def run_suite(args):
+    """
+    Запускает каждый случай в отдельном процессе и собирает результаты.
+
+    Returns:
+        tuple: (результаты успешных случаев, упавшие случаи ["путь:разрешение", ...])
+    """
+    case_args = [
+        "--model", args.model, "--iterations", str(args.iterations), "--duration", str(args.duration),
+        "--capture-fps", str(args.capture_fps), "--video-frames", str(args.video_frames),
+    ]
+    if args.backend:
+        case_args += ["--backend", args.backend]
+    if args.fixtures:
+        case_args += ["--fixtures", args.fixtures]
+
+    results = []
+    failed = []
+    print(f"{'путь':<9}{'разрешение':<12}{'кадр/с':>8}{'p50':>8}{'p95':>8}{'p99':>8}{'RSS, МБ':>9}{'CPU, %':>8}")
+    for path in args.paths.split(","):
+        for resolution in args.resolutions.split(","):
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--run-case", f"{path}:{resolution}", *case_args],
+                cwd=ROOT, capture_output=True, text=True,
+            )
+            if proc.returncode != 0:
+                print(f"{path}:{resolution}: ошибка\n{proc.stderr[-2000:]}")
+                failed.append(f"{path}:{resolution}")
+                continue
+            row = json.loads(proc.stdout.strip().splitlines()[-1])
+            results.append(row)
+            print(f"{path:<9}{resolution:<12}{row['fps']:>8.1f}{fmt(row['p50_ms'])}{fmt(row['p95_ms'])}"
+                  f"{fmt(row['p99_ms'])}{fmt(row['peak_rss_mb'], 9, 0)}{row['cpu_percent']:>8.0f}")
+    return results, failed
+
+
+def fmt(value, width=8, digits=1):
+    return f"{'-':>{width}}" if value is None else f"{value:>{width}.{digits}f}"
+
+
+def compare(results, baseline, tolerance, cases=None):
+    """
+    Сравнивает результаты с базовыми.
+
+    Случай из базы, который был запрошен (cases), но не дал результата (процесс упал),
+    тоже считается регрессией: путь, который раньше работал, теперь не работает.
+
+    Args:
+        results (list): Результаты текущего запуска
+        baseline (dict): Сохраненный отчет
+        tolerance (float): Допустимое ухудшение (доля)
+        cases (set, optional): Запрошенные случаи {(путь, разрешение), ...} (по умолчанию все случаи базы)
+
+    Returns:
+        list: Регрессии [(случай, метрика, база, сейчас, изменение), ...]; у упавшего случая
+              метрика "нет результата", сейчас и изменение - None
+    """
+    base_rows = {(row["path"], row["resolution"]): row for row in baseline["results"]}
+    regressions = []
+    print(f"\nСравнение с базой (допуск {tolerance * 100:.0f}%)")
+    measured = {(row["path"], row["resolution"]) for row in results}
+    for key in sorted(base_rows):
+        if (cases is None or key in cases) and key not in measured:
+            case = f"{key[0]}:{key[1]}"
+            print(f"{case:<16}нет результата (случай упал)  РЕГРЕССИЯ")
+            regressions.append((case, "нет результата", None, None, None))
+    for row in results:
+        base = base_rows.get((row["path"], row["resolution"]))
+        if base is None:
+            continue
+        case = f"{row['path']}:{row['resolution']}"
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            mark = "РЕГРЕССИЯ" if worse > tolerance else ""
+            print(f"{case:<16}{metric:<13}{old:>10.1f}{new:>10.1f}{change * 100:>+9.1f}%  {mark}")
+            if mark:
+                regressions.append((case, metric, old, new, change))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--backend", help="Движок инференса (по умолчанию из INFERENCE_SETTINGS)")
+    parser.add_argument("--paths", default=",".join(PATHS), help="Пути через запятую: detect,capture,video")
+    parser.add_argument("--resolutions", default="720p,1080p,4K",
+                        help=f"Разрешения через запятую: {','.join(RESOLUTIONS)}")
+    parser.add_argument("--fixtures", help="Папка с изображениями вместо синтетических кадров")
+    parser.add_argument("--iterations", type=int, default=30, help="Вызовов detect_on_image")
+    parser.add_argument("--duration", type=float, default=10.0, help="Длительность захвата экрана, с")
+    parser.add_argument("--capture-fps", type=int, default=10, help="Частота захвата экрана")
+    parser.add_argument("--video-frames", type=int, default=120, help="Кадров в тестовом видео")
+    parser.add_argument("--json", help="Сохранить результаты в JSON")
+    parser.add_argument("--compare", metavar="BASELINE", help="Сравнить с сохраненными результатами")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Допустимое ухудшение (доля)")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        run_case(args)
+        return 0
+
+    results, failed = run_suite(args)
+    if args.json:
+        report = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "machine": {"platform": platform.platform(), "python": platform.python_version(),
+                        "cpus": os.cpu_count()},
+            "model": args.model,
+            "results": results,
+            "failed": failed,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Результаты сохранены: {args.json}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        cases = {(path, resolution) for path in args.paths.split(",") for resolution in args.resolutions.split(",")}
+        regressions = compare(results, baseline, args.tolerance, cases)
+        if regressions:
+            print(f"Найдено регрессий: {len(regressions)}")
+            return 1
+        print("Регрессий нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Проверка, что батчевый инференс видео дает те же боксы, что и покадровый.
+
+Видео обрабатывается VideoPipeline дважды - с batch_size=1 (эталон, как прежний покадровый цикл)
+и с --batch-size, - и боксы сравниваются покадрово: число боксов, классы, координаты и уверенность.
+По умолчанию боксы должны совпадать точно; --box-tol и --conf-tol задают допуски для диагностики
+(например, после смены движка инференса), но кадр с другим числом боксов всегда считается расхождением.
+
+Код возврата 0 - боксы совпадают, 1 - есть расхождения.
+
+Если готового видео нет, --image синтезирует тестовое видео: изображение движется по шумному фону.
+
+Запуск:
+    python benchmarks/check_video_batch.py --video recording.mp4 --batch-size 8
+    python benchmarks/check_video_batch.py --image hotdog.jpg --frames 120 --all-classes
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+# Добавляем корень проекта в путь импорта
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD
+from video_fixtures import make_fixture, run_pipeline
+
+
+def diff_frame(reference, batched, box_tol=0.0, conf_tol=0.0):
+    """
+    Сравнивает боксы одного кадра.
+
+    Returns:
+        tuple: (есть ли расхождение, наибольшая разница координат, уверенностей)
+    """
+    # Боксы сопоставляются после сортировки по классу и координатам
+    ref = sorted(reference)
+    got = sorted(batched)
+    if len(ref) != len(got) or any(r[0] != g[0] for r, g in zip(ref, got)):
+        return True, float("inf"), float("inf")
+    if not ref:
+        return False, 0.0, 0.0
+    ref_arr = np.array([r[1:] for r in ref], dtype=np.float64)
+    got_arr = np.array([g[1:] for g in got], dtype=np.float64)
+    box_diff = float(np.abs(ref_arr[:, :4] - got_arr[:, :4]).max())
+    conf_diff = float(np.abs(ref_arr[:, 4] - got_arr[:, 4]).max())
+    return box_diff > box_tol or conf_diff > conf_tol, box_diff, conf_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Тестовое видео")
+    parser.add_argument("--image", help="Изображение для синтеза тестового видео (если нет --video)")
+    parser.add_argument("--frames", type=int, default=120, help="Кадров в синтезированном видео")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--conf", type=float, default=CONFIDENCE_THRESHOLD)
+    parser.add_argument("--batch-size", type=int, default=8, help="Размер батча, сравниваемый с покадровым")
+    parser.add_argument("--box-tol", type=float, default=0.0, help="Допуск координат, пикселей (0 - точное совпадение)")
+    parser.add_argument("--conf-tol", type=float, default=0.0, help="Допуск уверенности (0 - точное совпадение)")
+    parser.add_argument("--all-classes", action="store_true", help="Сравнивать все классы COCO, а не только хот-доги")
+    args = parser.parse_args()
+
+    video = args.video
+    if video is None:
+        if args.image is None:
+            parser.error("нужен --video или --image")
+        video = os.path.join(tempfile.mkdtemp(), "fixture.mp4")
+        make_fixture(args.image, video, args.frames)
+
+    from src.detection.yolo_detector import HotDogDetector
+    detector = HotDogDetector(args.model, conf=args.conf, verbose=False)
+    class_names = {} if args.all_classes else detector.classes
+
+    single_stats, reference = run_pipeline(detector, video, class_names, 1)
+    batch_stats, batched = run_pipeline(detector, video, class_names, args.batch_size)
+
+    mismatched = boxes = 0
+    worst_box = worst_conf = 0.0
+    for index in sorted(set(reference) | set(batched)):
+        ref = reference.get(index, [])
+        boxes += len(ref)
+        bad, box_diff, conf_diff = diff_frame(ref, batched.get(index, []), args.box_tol, args.conf_tol)
+        if bad:
+            mismatched += 1
+            print(f"Кадр {index}: batch=1 {ref}\n{'':>8}batch={args.batch_size} {batched.get(index, [])}")
+        worst_box = max(worst_box, box_diff)
+        worst_conf = max(worst_conf, conf_diff)
+
+    print(f"Кадров: {len(reference)}, боксов: {boxes}, "
+          f"скорость: {single_stats['fps']:.1f} -> {batch_stats['fps']:.1f} кадр/с (batch={args.batch_size})")
+    print(f"Наибольшая разница: координаты {worst_box:.2f} пикс., уверенность {worst_conf:.6f}; "
+          f"кадров с расхождениями: {mismatched}")
+    sys.exit(1 if mismatched else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Общие помощники бенчмарков видео: синтез тестового видео и прогон VideoPipeline с запоминанием боксов.
+"""
+import cv2
+import numpy as np
+
+from src.config import VIDEO_SETTINGS
+from src.detection.video_pipeline import VideoPipeline
+
+
+class MemorySink:
+    """Приемник, который запоминает боксы каждого кадра; кадры не нужны (работает быстрый путь grab/seek)."""
+
+    def __init__(self, needs_frames=False):
+        self.needs_frames = needs_frames
+        self.detections = {}
+
+    def write(self, index, frame, detections):
+        self.detections[index] = detections
+
+    def close(self):
+        pass
+
+
+def make_fixture(image_path, path, frames, size=(1280, 720), fps=30):
+    """Синтезирует видео: изображение плавно движется по шумному фону."""
+    sprite = cv2.imread(image_path)
+    if sprite is None:
+        raise IOError(f"Не удалось прочитать изображение: {image_path}")
+    width, height = size
+    scale = min(width / 3 / sprite.shape[1], height / 3 / sprite.shape[0])
+    sprite = cv2.resize(sprite, None, fx=scale, fy=scale)
+    sh, sw = sprite.shape[:2]
+
+    rng = np.random.default_rng(0)
+    background = rng.integers(60, 120, (height, width, 3), dtype=np.uint8)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    for i in range(frames):
+        t = i / max(1, frames - 1)
+        x = int((width - sw) * (0.5 + 0.5 * np.sin(2 * np.pi * t)))
+        y = int((height - sh) * (0.5 + 0.4 * np.cos(3 * np.pi * t)))
+        frame = background.copy()
+        frame[y:y + sh, x:x + sw] = sprite
+        writer.write(frame)
+    writer.release()
+
+
+def run_pipeline(detector, video, class_names, batch_size, stride=1, adaptive=False):
+    """
+    Обрабатывает видео VideoPipeline без записи результата.
+
+    Returns:
+        tuple: (статистика VideoPipeline.run, {номер кадра: боксы})
+    """
+    pipeline = VideoPipeline(
+        detector,
+        batch_size=batch_size,
+        queue_size=VIDEO_SETTINGS["queue_size"],
+        class_names=class_names,
+        verbose=False,
+        stride=stride,
+        adaptive_stride=adaptive,
+        max_stride=VIDEO_SETTINGS["max_stride"],
+        motion_tolerance=VIDEO_SETTINGS["motion_tolerance"],
+        seek_stride=VIDEO_SETTINGS["seek_stride"],
+    )
+    sink = MemorySink()
+    stats = pipeline.run(video, sink)
+    return stats, sink.detections
@@ -0,0 +1,266 @@
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Импорты из нашего приложения (без PyQt, чтобы работать на серверах без дисплея)
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD, BATCH_SETTINGS, INFERENCE_SETTINGS
+
+# Детектор процесса-исполнителя: модель загружается один раз на процесс
+_worker_detector = None
+_worker_error = None  # Почему модель не загрузилась (файлы получают эту ошибку в сводке)
+_cancel_event = None  # Флаг отмены пакета, общий для всех процессов
+_current_job = None  # Видео, которое сейчас обрабатывает процесс
+
+
+def find_videos(inputs, recursive=False):
+    """
+    Собирает список видеофайлов по папкам и шаблонам glob.
+
+    Args:
+        inputs (list): Папки, файлы или шаблоны glob (например, "records/**/*.mp4")
+        recursive (bool): Искать видео во вложенных папках
+
+    Returns:
+        list: Отсортированные пути к видеофайлам без повторов
+    """
+    extensions = BATCH_SETTINGS["extensions"]
+    videos = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, "**", "*") if recursive else os.path.join(item, "*")
+            candidates = glob.glob(pattern, recursive=recursive)
+        else:
+            candidates = glob.glob(item, recursive=True)
+        for path in candidates:
+            # Пропускаем уже обработанные видео
+            name = os.path.splitext(os.path.basename(path))[0]
+            if os.path.isfile(path) and path.lower().endswith(extensions) and not name.endswith("_detected"):
+                videos.add(os.path.abspath(path))
+    return sorted(videos)
+
+
+def resolve_workers(workers=None, threads_per_worker=None):
+    """
+    Определяет количество процессов и потоков torch на процесс.
+
+    Ядра делятся между процессами так, чтобы их суммарное число потоков не превышало
+    число ядер: иначе процессы мешают друг другу и ускорение перестает быть линейным.
+
+    Returns:
+        tuple: (процессов, потоков на процесс)
+    """
+    cpu_count = os.cpu_count() or 1
+    workers = workers or BATCH_SETTINGS["workers"] or cpu_count
+    threads_per_worker = threads_per_worker or BATCH_SETTINGS["threads_per_worker"] or max(1, cpu_count // workers)
+    return workers, threads_per_worker
+
+
+def create_cancel_event():
+    """Флаг отмены для run_batch(cancel_event=...), который видят процессы-исполнители."""
+    return multiprocessing.get_context("spawn").Event()
+
+
+def _init_worker(model_path, conf, threads_per_worker, backend, precision, cancel_event=None):
+    """
+    Инициализация процесса-исполнителя: ограничение потоков и загрузка модели.
+
+    Исключения не выходят из инициализатора: иначе пул сломался бы целиком и ни один файл
+    не получил бы сводку. Ошибка сохраняется и попадает в сводку каждого файла.
+    """
+    global _worker_detector, _worker_error, _cancel_event
+
+    _cancel_event = cancel_event
+    if cancel_event is not None:
+        threading.Thread(target=_watch_cancel, daemon=True).start()
+
+    try:
+        import cv2
+        import torch
+        torch.set_num_threads(threads_per_worker)
+        cv2.setNumThreads(1)
+
+        from src.detection.yolo_detector import HotDogDetector
+        # Веса уже подготовлены и проверены в главном процессе (см. run_batch)
+        _worker_detector = HotDogDetector(model_path, conf=conf, verbose=False, backend=backend,
+                                          precision=precision, check_accuracy=False)
+    except Exception as e:
+        _worker_error = f"не удалось загрузить модель: {e}"
+
+
+def _watch_cancel():
+    """Останавливает текущее видео процесса, когда пакет отменен (прогресс остается в контрольной точке)."""
+    _cancel_event.wait()
+    while True:
+        # Повторяем: задача могла начаться после отмены и сбросить флаг при запуске
+        job = _current_job
+        if job is not None:
+            job.cancel()
+        time.sleep(0.2)
+
+
+def _process_video(video_path, output_dir, batch_size):
+    """Обрабатывает одно видео в процессе-исполнителе и возвращает его сводку."""
+    global _current_job
+    from src.detection.video_job import VideoDetectionJob
+
+    if _cancel_event is not None and _cancel_event.is_set():
+        return {"video": video_path, "status": "cancelled", "elapsed": 0.0}
+    if _worker_detector is None:
+        return {"video": video_path, "status": "error", "error": _worker_error, "elapsed": 0.0}
+
+    output_path = None
+    if output_dir:
+        name, ext = os.path.splitext(os.path.basename(video_path))
+        output_path = os.path.join(output_dir, f"{name}_detected{ext}")
+
+    start_time = time.time()
+    try:
+        job = VideoDetectionJob(_worker_detector, video_path, output_path, batch_size=batch_size, verbose=False)
+        _current_job = job
+        if job.run() is None:
+            summary = {"video": video_path, "status": "cancelled", "completed_frames": job.resume_frame()}
+        else:
+            summary = dict(job.summary)
+            summary["status"] = "ok"
+    except Exception as e:
+        summary = {"video": video_path, "status": "error", "error": str(e)}
+    finally:
+        _current_job = None
+    summary["elapsed"] = time.time() - start_time
+    return summary
+
+
+def run_batch(videos, output_dir=None, workers=None, threads_per_worker=None, batch_size=None,
+              model_path=MODEL_PATH, conf=CONFIDENCE_THRESHOLD, on_file_done=None, backend=None,
+              cancel_event=None):
+    """
+    Обрабатывает список видео пулом процессов (одна модель на процесс).
+
+    Args:
+        videos (list): Пути к видеофайлам
+        output_dir (str, optional): Папка для результатов (по умолчанию рядом с исходными видео)
+        workers (int, optional): Количество процессов (по умолчанию из BATCH_SETTINGS)
+        threads_per_worker (int, optional): Потоков torch на процесс
+        batch_size (int, optional): Размер батча инференса (по умолчанию из VIDEO_SETTINGS)
+        model_path (str): Путь к весам YOLO
+        conf (float): Порог уверенности
+        on_file_done (callable, optional): Вызывается как callback(сводка, готово, всего) после каждого файла
+        backend (str, optional): Движок инференса ("torch", "onnx", "openvino"), по умолчанию из INFERENCE_SETTINGS
+        cancel_event (optional): Флаг из create_cancel_event(). После его установки текущие видео
+                                 останавливаются с сохранением контрольной точки, а оставшиеся
+                                 получают статус "cancelled"
+
+    Returns:
+        list: Сводки по файлам в порядке списка videos; у каждой status "ok", "error" или "cancelled"
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    workers, threads_per_worker = resolve_workers(workers, threads_per_worker)
+    workers = max(1, min(workers, len(videos)))
+
+    backend = backend or INFERENCE_SETTINGS["backend"]
+    precision = INFERENCE_SETTINGS["precision"]
+    if backend != "torch":
+        # Экспорт, квантизация и проверка точности - один раз до запуска процессов, а не в каждом из них
+        from src.detection.yolo_detector import prepare_weights
+        _, precision = prepare_weights(model_path, backend, precision, conf)
+
+    summaries = {}
+    # spawn вместо fork: безопасно при запуске из GUI с потоками и одинаково на всех ОС
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_path, conf, threads_per_worker, backend, precision, cancel_event),
+    ) as executor:
+        futures = {
+            executor.submit(_process_video, video, output_dir, batch_size): video
+            for video in videos
+        }
+        for future in as_completed(futures):
+            try:
+                summary = future.result()
+            except Exception as e:
+                # Процесс-исполнитель упал (например, не хватило памяти) - ошибка только у этого файла
+                summary = {"video": futures[future], "status": "error", "error": str(e) or type(e).__name__}
+            summaries[futures[future]] = summary
+            if on_file_done:
+                on_file_done(summary, len(summaries), len(videos))
+
+    return [summaries[video] for video in videos]
+
+
+def write_summary(summaries, path):
+    """Сохраняет сводку пакетной обработки в JSON."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(summaries, f, ensure_ascii=False, indent=2)
+
+
+def print_file_summary(summary, done, total):
+    """Выводит строку сводки по обработанному файлу."""
+    name = os.path.basename(summary["video"])
+    if summary["status"] == "ok":
+        print(f"[{done}/{total}] {name}: кадров {summary['frames']}, "
+              f"с хот-догами {summary['frames_with_detections']}, "
+              f"{summary['fps']:.1f} кадр/с, {summary['elapsed']:.1f} с")
+    elif summary["status"] == "cancelled":
+        print(f"[{done}/{total}] {name}: остановлено")
+    else:
+        print(f"[{done}/{total}] {name}: ошибка: {summary['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная обработка папок с видео без графического интерфейса")
+    parser.add_argument("inputs", nargs="+", help="Папки, файлы или шаблоны glob с видео")
+    parser.add_argument("-o", "--output-dir", help="Папка для результатов (по умолчанию рядом с видео)")
+    parser.add_argument("-r", "--recursive", action="store_true", help="Искать видео во вложенных папках")
+    parser.add_argument("-w", "--workers", type=int, help="Количество процессов (по умолчанию - по числу ядер)")
+    parser.add_argument("--threads-per-worker", type=int, help="Потоков torch на процесс")
+    parser.add_argument("--batch-size", type=int, help="Кадров в одном прямом проходе модели")
+    parser.add_argument("--model", default=MODEL_PATH, help="Путь к весам YOLO")
+    parser.add_argument("--conf", type=float, default=CONFIDENCE_THRESHOLD, help="Порог уверенности")
+    parser.add_argument("--backend", choices=("torch", "onnx", "openvino"),
+                        help="Движок инференса (по умолчанию из INFERENCE_SETTINGS)")
+    parser.add_argument("--summary", help="Файл сводки JSON (по умолчанию batch_summary.json в папке результатов)")
+    args = parser.parse_args(argv)
+
+    videos = find_videos(args.inputs, args.recursive)
+    if not videos:
+        print("Видео не найдены")
+        return 1
+
+    workers, threads_per_worker = resolve_workers(args.workers, args.threads_per_worker)
+    print(f"Найдено видео: {len(videos)}. Процессов: {min(workers, len(videos))}, потоков на процесс: {threads_per_worker}")
+
+    start_time = time.time()
+    summaries = run_batch(
+        videos,
+        output_dir=args.output_dir,
+        workers=workers,
+        threads_per_worker=threads_per_worker,
+        batch_size=args.batch_size,
+        model_path=args.model,
+        conf=args.conf,
+        on_file_done=print_file_summary,
+        backend=args.backend,
+    )
+    elapsed = time.time() - start_time
+
+    summary_path = args.summary or os.path.join(args.output_dir or os.getcwd(), "batch_summary.json")
+    write_summary(summaries, summary_path)
+
+    total_frames = sum(s.get("frames", 0) for s in summaries)
+    errors = sum(1 for s in summaries if s["status"] == "error")
+    print(f"Готово за {elapsed:.1f} с: {total_frames} кадров, {total_frames / elapsed:.1f} кадр/с в сумме, "
+          f"ошибок: {errors}. Сводка: {summary_path}")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
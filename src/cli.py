@@ -0,0 +1,248 @@
+"""
+Консольная точка входа Hot-Dog Alerter для серверов без дисплея.
+
+Не импортирует PyQt и pyautogui; ultralytics и torch загружаются только
+при создании детектора, поэтому `--help` и разбор аргументов работают мгновенно.
+
+Примеры:
+    python src/cli.py video recording.mp4
+    python src/cli.py video recording.mp4 --output-mode jsonl --clips
+    python src/cli.py clips recording.mp4 recording_detections.jsonl
+    python src/cli.py images photos/ -o results/
+    python src/cli.py screen --fps 2 --save-dir screenshots/
+    python src/cli.py batch recordings/ --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+
+# Добавляем родительскую директорию в путь для импорта
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.insert(0, parent_dir)  # Добавляем корневую директорию проекта
+
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD, VIDEO_SETTINGS
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+
+def load_detector(args):
+    """Создает детектор по аргументам командной строки (здесь загружаются ultralytics и torch)."""
+    from src.detection.yolo_detector import HotDogDetector
+    return HotDogDetector(args.model, conf=args.conf, device=args.device, verbose=args.verbose,
+                          backend=args.backend, precision=args.precision)
+
+
+def run_video(args):
+    """
+    Обрабатывает одно видео.
+
+    В режиме video пишет размеченное видео с контрольными точками (прерванную обработку
+    можно продолжить); в режимах jsonl/npz/parquet - только журнал детекций без кодирования.
+    """
+    detector = load_detector(args)
+    if args.output_mode != "video":
+        log_path = detector.detect_on_video(args.video, args.output, batch_size=args.batch_size,
+                                            output_mode=args.output_mode, stride=args.stride,
+                                            adaptive_stride=args.adaptive_stride)
+        print(json.dumps(dict(detector.last_video_stats, video=args.video, output=log_path),
+                         ensure_ascii=False))
+        if args.clips:
+            from src.detection.clips import render_clips
+            render_clips(args.video, log_path, detector=detector)
+        return 0
+
+    from src.detection.video_job import VideoDetectionJob
+
+    job = VideoDetectionJob(detector, args.video, args.output, batch_size=args.batch_size,
+                            stride=args.stride, adaptive_stride=args.adaptive_stride)
+    output_path = job.run()
+    if output_path is None:
+        return 1
+    print(json.dumps(job.summary, ensure_ascii=False))
+    return 0
+
+
+def run_images(args):
+    """Детектирует хот-доги на всех изображениях папки и сохраняет размеченные копии и JSONL с боксами."""
+    import cv2
+
+    if os.path.isdir(args.input):
+        images = sorted(
+            os.path.join(args.input, name) for name in os.listdir(args.input)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+    else:
+        images = [args.input]
+    if not images:
+        print("Изображения не найдены")
+        return 1
+
+    output_dir = args.output or os.path.join(os.path.dirname(os.path.abspath(images[0])), "detected")
+    os.makedirs(output_dir, exist_ok=True)
+    detector = load_detector(args)
+
+    found = 0
+    with open(os.path.join(output_dir, "detections.jsonl"), 'w', encoding='utf-8') as log:
+        for path in images:
+            image = cv2.imread(path)
+            if image is None:
+                print(f"Не удалось прочитать изображение: {path}")
+                continue
+            result_image, detected_objects = detector.detect_on_image(image)
+            if detected_objects:
+                found += 1
+                cv2.imwrite(os.path.join(output_dir, os.path.basename(path)), result_image)
+            log.write(json.dumps({"image": path, "boxes": detected_objects}, ensure_ascii=False) + "\n")
+            print(f"{os.path.basename(path)}: найдено хот-догов: {len(detected_objects)}")
+
+    print(f"Изображений с хот-догами: {found}/{len(images)}. Результаты: {output_dir}")
+    return 0
+
+
+def run_screen(args):
+    """
+    Захват экрана без оверлея: кадры с хот-догами сохраняются в папку.
+
+    Без --region и --window каждый монитор захватывается отдельно, кадры сохраняются в подпапки monitorN.
+    С --window область захвата следует за окном приложения.
+    """
+    from src.utils.capture_backends import create_capture_backend
+    from src.utils.multi_screen import MultiScreenCapture, list_monitors
+    from src.utils.screen_capture import ScreenCapture
+
+    if args.region or args.window:
+        from src.utils.window_tracking import WindowTracker
+
+        tracker = WindowTracker(args.window) if args.window else None
+        region = tuple(args.region) if args.region else tracker.geometry()
+        if region is None:
+            print(f"Окно не найдено: {args.window}")
+            return 1
+        screen_cap = ScreenCapture(
+            region=region,
+            detection_enabled=True,
+            detector=load_detector(args),
+            backend=create_capture_backend(args.capture_backend, region),
+            tiled=args.tiled or None,
+            follow=tracker,
+        )
+    else:
+        selection = args.monitors
+        if selection not in (None, "all", "primary"):
+            selection = [int(index) for index in selection.split(",")]
+        screen_cap = MultiScreenCapture(
+            monitors=list_monitors(selection) if selection is not None else None,
+            detection_enabled=True,
+            detector=load_detector(args),
+            backend=args.capture_backend,
+            tiled=args.tiled or None,
+        )
+    try:
+        screen_cap.start_capture(fps=args.fps, save_path=args.save_dir)
+    finally:
+        screen_cap.close()
+    return 0
+
+
+def run_clips(args):
+    """Нарезает клипы по готовому журналу детекций (модель не загружается)."""
+    from src.detection.clips import render_clips
+
+    clip_paths = render_clips(args.video, args.log, args.output, args.padding, args.merge_gap)
+    return 0 if clip_paths else 1
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="hotdog-cli",
+        description="Hot-Dog Alerter без графического интерфейса",
+    )
+    parser.add_argument("--model", default=MODEL_PATH, help="Путь к весам YOLO")
+    parser.add_argument("--conf", type=float, default=CONFIDENCE_THRESHOLD, help="Порог уверенности")
+    parser.add_argument("--device", help="Устройство инференса (cpu, cuda:0, ...)")
+    parser.add_argument("--verbose", action="store_true", help="Журнал ultralytics по каждому кадру")
+    parser.add_argument("--backend", choices=("torch", "onnx", "openvino"),
+                        help="Движок инференса (по умолчанию из INFERENCE_SETTINGS)")
+    parser.add_argument("--precision", choices=("fp32", "fp16", "int8"),
+                        help="Точность модели: int8 - для onnx, fp16 - для openvino или GPU")
+    parser.add_argument("--profile", action="store_true",
+                        help="Замерять время по этапам и вывести сводку p50/p95/p99 в конце")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="Сохранить замеры в Chrome trace JSON (chrome://tracing, ui.perfetto.dev)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    video = subparsers.add_parser("video", help="Обработать видеофайл")
+    video.add_argument("video", help="Путь к видео")
+    video.add_argument("-o", "--output", help="Путь к результату (по умолчанию <имя>_detected рядом с видео)")
+    video.add_argument("--batch-size", type=int, help="Кадров в одном прямом проходе модели")
+    video.add_argument("--output-mode", default=VIDEO_SETTINGS["output_mode"],
+                       choices=("video", "jsonl", "npz", "parquet"),
+                       help="video - размеченное видео; jsonl/npz/parquet - только журнал детекций")
+    video.add_argument("--stride", type=int,
+                       help="Запускать модель на каждом N-м кадре, боксы между ними предсказывает трекер")
+    video.add_argument("--adaptive-stride", action="store_true", default=None,
+                       help="Подбирать шаг по скорости движения объектов")
+    video.add_argument("--clips", action="store_true",
+                       help="После журнала нарезать размеченные клипы участков с детекциями")
+    video.set_defaults(func=run_video)
+
+    clips = subparsers.add_parser("clips", help="Нарезать размеченные клипы по журналу детекций")
+    clips.add_argument("video", help="Путь к исходному видео")
+    clips.add_argument("log", help="Журнал детекций (.jsonl, .npz, .parquet)")
+    clips.add_argument("-o", "--output", help="Папка для клипов (по умолчанию <имя>_clips рядом с видео)")
+    clips.add_argument("--padding", type=float, help="Секунд до и после участка с детекциями")
+    clips.add_argument("--merge-gap", type=float, help="Склеивать участки ближе этого интервала (сек)")
+    clips.set_defaults(func=run_clips)
+
+    images = subparsers.add_parser("images", help="Обработать папку с изображениями")
+    images.add_argument("input", help="Папка с изображениями или одно изображение")
+    images.add_argument("-o", "--output", help="Папка для результатов (по умолчанию detected/ рядом с изображениями)")
+    images.set_defaults(func=run_images)
+
+    screen = subparsers.add_parser("screen", help="Захват экрана с сохранением кадров")
+    screen.add_argument("--fps", type=int, default=2, help="Кадров в секунду")
+    screen.add_argument("--save-dir", help="Папка для скриншотов")
+    screen.add_argument("--region", type=int, nargs=4, metavar=("LEFT", "TOP", "WIDTH", "HEIGHT"),
+                        help="Область захвата")
+    screen.add_argument("--window", metavar="TITLE",
+                        help="Захватывать только окно с точно таким заголовком (область следует за окном, только Windows)")
+    screen.add_argument("--monitors",
+                        help="Мониторы: all, primary или номера через запятую (по умолчанию CAPTURE_SETTINGS)")
+    screen.add_argument("--capture-backend", default="mss", choices=("mss", "pyautogui"), help="Источник кадров")
+    screen.add_argument("--tiled", action="store_true",
+                        help="Детекция по перекрывающимся плиткам (мелкие хот-доги на экранах 4K)")
+    screen.set_defaults(func=run_screen)
+
+    # Разбор аргументов batch выполняет src/batch.py (см. main), здесь только строка справки
+    subparsers.add_parser("batch", help="Пакетная обработка папок с видео (аргументы src/batch.py)", add_help=False)
+
+    return parser
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+
+    # Аргументы пакетной обработки целиком передаются src/batch.py
+    if argv and argv[0] == "batch":
+        from src import batch
+        return batch.main(argv[1:])
+
+    args = build_parser().parse_args(argv)
+    if not (args.profile or args.trace):
+        return args.func(args)
+
+    from src.utils.profiling import profiler
+    profiler.enabled = True
+    try:
+        return args.func(args)
+    finally:
+        print(f"Время по этапам, мс:\n{profiler.format_summary()}")
+        if args.trace:
+            count = profiler.export_chrome_trace(args.trace)
+            print(f"Трасса ({count} интервалов): {args.trace}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,6 +8,19 @@ CLASSES = {
     52: "hot dog",  # Класс 52 в COCO - это хот-дог
 }
 
+# Настройки движка инференса
+INFERENCE_SETTINGS = {
+    "backend": "torch",  # "torch" (PyTorch), "onnx" (ONNX Runtime) или "openvino" - быстрее на CPU
+    "export_imgsz": 640,  # Размер входа при экспорте модели для ONNX Runtime / OpenVINO
+    "cache_dir": os.path.join(os.path.dirname(MODEL_PATH), "cache"),  # Куда сохраняются экспортированные модели
+    "precision": "fp32",  # "fp32"; "int8" - квантизированная модель для onnx; "fp16" - для openvino или GPU
+    "calibration_dir": os.path.join(os.path.dirname(MODEL_PATH), "calibration"),  # Изображения для калибровки INT8
+    "calibration_images": 64,  # Сколько изображений калибровки использовать
+    "validation_dir": os.path.join(os.path.dirname(MODEL_PATH), "validation"),  # Изображения с хот-догами и разметкой YOLO
+    "max_recall_drop": 0.02,  # Допустимое падение recall хот-догов у квантизированной модели
+    "max_map_drop": 0.02,  # Допустимое падение AP@0.5 хот-догов у квантизированной модели
+}
+
 # Настройки оверлея
 OVERLAY_SETTINGS = {
     "hide_timeout": 3000,  # Время в мс, через которое скрываются прямоугольники, если нет хот-догов
@@ -15,6 +28,7 @@ OVERLAY_SETTINGS = {
     "frame_color": (0, 255, 0),  # Цвет рамки (зеленый)
     "text_bg_color": (0, 0, 0, 180),  # Цвет фона текста
     "text_color": (255, 255, 255),  # Цвет текста
+    "repaint_tolerance": 2,  # Сдвиг рамок (px), при котором оверлей не перерисовывается
 }
 
 # Настройки звуковых уведомлений
@@ -22,4 +36,92 @@ SOUND_SETTINGS = {
     "enabled": True,  # Звуковые уведомления включены по умолчанию
     "sound_file": os.path.join(os.path.dirname(os.path.dirname(__file__)), "sounds", "hotdog_alert.mp3"),  # Звук уведомления (поддерживает MP3)
     "min_interval": 2000,  # Минимальный интервал между звуковыми уведомлениями (мс)
-} 
\ No newline at end of file
+    "voices": 3,  # Сколько уведомлений может звучать одновременно
+    "volume": 0.7,  # Громкость (0..1)
+    "cache_dir": os.path.join(os.path.dirname(os.path.dirname(__file__)), "sounds", "cache"),  # Декодированный звук (WAV)
+} 
+# Настройки обработки видео
+VIDEO_SETTINGS = {
+    "batch_size": 8,  # Количество кадров в одном прямом проходе модели
+    "queue_size": 4,  # Размер очередей между стадиями конвейера (в батчах)
+    "segment_frames": 3000,  # Кадров между контрольными точками при фоновой обработке
+    "output_mode": "video",  # "video" - размеченное видео; "jsonl", "npz", "parquet" - только журнал детекций
+    "clip_padding": 1.0,  # Секунд видео до и после участка с детекциями при нарезке клипов
+    "clip_merge_gap": 2.0,  # Участки ближе этого интервала (в секундах) склеиваются в один клип
+    "stride": 1,  # Запускать YOLO на каждом N-м кадре, боксы между ними предсказывает трекер
+    "adaptive_stride": False,  # Подбирать шаг по скорости движения хот-догов
+    "max_stride": 8,  # Наибольший шаг при адаптивной выборке
+    "motion_tolerance": 0.15,  # Допустимое смещение между запусками YOLO (в долях размера бокса)
+    "seek_stride": 30,  # С такого шага промежуточные кадры пропускаются перемоткой, а не grab()
+}
+
+# Настройки пропуска детекции на неизменившемся экране
+CHANGE_DETECTION_SETTINGS = {
+    "enabled": True,  # Не запускать YOLO, пока экран не меняется
+    "thumbnail_size": (160, 90),  # Размер миниатюры для сравнения кадров (ширина, высота)
+    "pixel_threshold": 12,  # Разница яркости пикселя миниатюры (0-255), считающаяся изменением
+    "changed_ratio": 0.002,  # Доля изменившихся пикселей, при которой кадр отправляется на детекцию
+    "refresh_interval": 1000,  # Как часто (мс) повторно отправлять на оверлей сохраненные детекции
+    "roi_enabled": True,  # Запускать детекцию только на изменившихся областях экрана
+    "grid": (16, 9),  # Сетка плиток для поиска изменившихся областей (столбцов, строк)
+    "tile_ratio": 0.02,  # Доля изменившихся пикселей, при которой плитка считается изменившейся
+    "roi_padding": 32,  # Отступ вокруг изменившейся области в пикселях экрана
+    "max_roi_area": 0.5,  # Если изменилось больше этой доли экрана, обрабатываем весь кадр
+}
+
+# Настройки трекинга хот-догов при захвате экрана
+TRACKING_SETTINGS = {
+    "enabled": True,  # Присваивать рамкам постоянные номера и подавать звук только для новых хот-догов
+    "iou_threshold": 0.3,  # Минимальное пересечение (IoU) рамки с треком, чтобы считать их одним объектом
+    "max_missed": 2,  # Сколько детекций подряд трек может не находиться, прежде чем исчезнет
+    "smoothing": 0.6,  # Вес новой детекции при сглаживании рамки (1 - без сглаживания)
+    "velocity_gain": 0.3,  # Насколько быстро трекер подстраивается под скорость движения рамки
+}
+
+# Размер входа модели при захвате экрана
+INPUT_SIZE_SETTINGS = {
+    "adaptive": True,  # Подбирать размер входа по загрузке CPU и размеру найденных хот-догов
+    "sizes": (320, 416, 512, 640, 800, 960),  # Допустимые размеры входа (длинная сторона, кратно 32)
+    "initial": 640,  # Начальный размер (и постоянный, если adaptive выключен)
+    "budget_ratio": 1.0,  # Бюджет времени на инференс в долях интервала между кадрами
+    "small_box": 24,  # Хот-дог меньше этого размера на входе сети (px) считается мелким
+    "low_conf": 0.5,  # Уверенность ниже этой считается низкой - стоит увеличить размер входа
+    "patience": 3,  # Сколько детекций подряд нужно для смены размера
+}
+
+# Детекция по плиткам для мелких хот-догов на экранах высокого разрешения
+TILING_SETTINGS = {
+    "enabled": False,  # Делить кадр на перекрывающиеся плитки (медленнее, но находит мелкие объекты)
+    "max_downscale": 2.0,  # Во сколько раз модель может уменьшать плитку (меньше - больше плиток)
+    "overlap": 0.2,  # Доля перекрытия соседних плиток
+    "include_full_frame": True,  # Добавлять в батч весь кадр для крупных хот-догов
+    "budget_ratio": 1.0,  # Бюджет времени на кадр в долях интервала между кадрами
+    "iou_threshold": 0.5,  # Боксы с соседних плиток с таким IoU считаются одним объектом
+    "ios_threshold": 0.6,  # ...или если меньший бокс на такую долю лежит внутри большего
+}
+
+# Замеры времени по этапам обработки (src/utils/profiling.py)
+PROFILING_SETTINGS = {
+    "enabled": False,  # Включить замеры (выключенные почти ничего не стоят)
+    "window": 300,  # По скольким последним замерам считать перцентили
+    "trace_events": 100000,  # Сколько последних интервалов хранить для Chrome trace
+    "dump_interval": 0,  # Раз в сколько секунд печатать сводку при захвате экрана (0 - только при остановке)
+    "hud": False,  # Показывать сводку поверх экрана на оверлее (переключается клавишей H)
+    "hud_refresh": 500,  # Период обновления HUD, мс
+}
+
+# Настройки захвата экрана
+CAPTURE_SETTINGS = {
+    "backend": "auto",  # Источник кадров: "auto" (mss, если установлен), "mss" или "pyautogui"
+    "detection_workers": 1,  # Потоков детекции (2 - для многоядерных CPU)
+    "latency_window": 200,  # По скольким последним кадрам считать задержку захват -> оверлей
+    "monitors": "all",  # Какие мониторы захватывать: "all", "primary" или список номеров [1, 2]
+    "follow_interval": 250,  # Как часто (мс) проверять положение и размер отслеживаемого окна
+}
+
+# Настройки пакетной обработки папок с видео
+BATCH_SETTINGS = {
+    "workers": 0,  # Количество процессов (0 - по числу ядер CPU)
+    "threads_per_worker": 0,  # Потоков torch на процесс (0 - ядра делятся поровну между процессами)
+    "extensions": (".mp4", ".avi", ".mov", ".mkv", ".flv", ".wmv"),  # Какие файлы считаются видео
+}
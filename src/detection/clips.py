@@ -0,0 +1,114 @@
+import os
+
+import cv2
+
+from src.config import CLASSES, VIDEO_SETTINGS
+from src.detection.detection_log import load_detection_log
+
+
+def detection_ranges(frame_indices, fps, padding=None, merge_gap=None, total_frames=None):
+    """
+    Объединяет кадры с детекциями в непрерывные участки видео.
+
+    Args:
+        frame_indices (iterable): Номера кадров, на которых найдены объекты
+        fps (float): Частота кадров видео
+        padding (float, optional): Секунд до и после участка (по умолчанию из VIDEO_SETTINGS)
+        merge_gap (float, optional): Участки ближе этого интервала (сек) склеиваются
+        total_frames (int, optional): Число кадров в видео: ограничивает конец последнего участка,
+                                      номера кадров за концом видео пропускаются
+
+    Returns:
+        list: Участки [(первый кадр, последний кадр включительно), ...]
+    """
+    if padding is None:
+        padding = VIDEO_SETTINGS["clip_padding"]
+    if merge_gap is None:
+        merge_gap = VIDEO_SETTINGS["clip_merge_gap"]
+    fps = fps or 30.0
+    pad = int(round(padding * fps))
+    gap = int(round(merge_gap * fps))
+
+    ranges = []
+    for index in sorted(frame_indices):
+        if total_frames and index >= total_frames:
+            # Кадров за концом видео нет - дальше участков не будет (номера отсортированы)
+            break
+        start, end = max(0, index - pad), index + pad
+        if total_frames:
+            end = min(end, total_frames - 1)
+        if ranges and start <= ranges[-1][1] + gap:
+            ranges[-1][1] = max(ranges[-1][1], end)
+        else:
+            ranges.append([start, end])
+    return [tuple(r) for r in ranges]
+
+
+def render_clips(video_path, log_path, output_dir=None, padding=None, merge_gap=None, detector=None):
+    """
+    Нарезает размеченные клипы только для участков видео с детекциями.
+
+    Модель не запускается: боксы берутся из журнала детекций, поэтому декодируются
+    и кодируются только кадры внутри участков, а не все видео.
+
+    Args:
+        video_path (str): Путь к исходному видео
+        log_path (str): Журнал детекций (.jsonl, .npz или .parquet)
+        output_dir (str, optional): Папка для клипов (по умолчанию <имя>_clips рядом с видео)
+        padding (float, optional): Секунд до и после участка
+        merge_gap (float, optional): Участки ближе этого интервала (сек) склеиваются
+        detector (HotDogDetector, optional): Используется только для единого вида рамок
+
+    Returns:
+        list: Пути к созданным клипам
+    """
+    meta, frames = load_detection_log(log_path)
+
+    if output_dir is None:
+        name = os.path.splitext(os.path.basename(video_path))[0]
+        output_dir = os.path.join(os.path.dirname(video_path), f"{name}_clips")
+    os.makedirs(output_dir, exist_ok=True)
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Не удалось открыть видео: {video_path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or meta.get("fps") or 30.0
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+
+    ranges = detection_ranges(frames, fps, padding, merge_gap, total_frames)
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    clip_paths = []
+    try:
+        for start, end in ranges:
+            clip_path = os.path.join(output_dir, f"clip_{start / fps:08.2f}s.mp4")
+            writer = cv2.VideoWriter(clip_path, fourcc, fps, (width, height))
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            for index in range(start, end + 1):
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                detections = frames.get(index)
+                if detections:
+                    draw_boxes(frame, detections, detector)
+                writer.write(frame)
+            writer.release()
+            clip_paths.append(clip_path)
+            print(f"Клип {start}-{end} сохранен: {clip_path}")
+    finally:
+        cap.release()
+
+    print(f"Участков с детекциями: {len(ranges)}, клипы сохранены в: {output_dir}")
+    return clip_paths
+
+
+def draw_boxes(frame, detections, detector=None):
+    """Рисует боксы из журнала так же, как HotDogDetector.draw_detections."""
+    if detector is not None:
+        return detector.draw_detections(frame, detections)
+    for cls, x1, y1, x2, y2, conf in detections:
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
+        label = f"{CLASSES.get(cls, str(cls))} {conf:.2f}"
+        cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
+    return frame
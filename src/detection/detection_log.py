@@ -0,0 +1,177 @@
+import json
+
+import numpy as np
+
+# Столбцы журнала детекций: одна строка на найденный объект
+LOG_COLUMNS = ("frame", "time", "cls", "x1", "y1", "x2", "y2", "conf")
+
+
+class JsonlDetectionSink:
+    """
+    Приемник конвейера, который вместо видео пишет журнал детекций в JSONL.
+
+    Первая строка - параметры видео, далее по строке на каждый кадр с найденными объектами:
+    {"frame": 120, "time": 4.0, "boxes": [[52, x1, y1, x2, y2, conf], ...]}
+    Кадры не рисуются и не кодируются.
+    """
+
+    needs_frames = False  # Кадры не нужны: при выборке промежуточные кадры не декодируются
+
+    def __init__(self, output_path, video_info, video_path=None):
+        """
+        Args:
+            output_path (str): Путь к файлу журнала
+            video_info (dict): Параметры видео из probe_video()
+            video_path (str, optional): Путь к исходному видео (сохраняется в журнале)
+        """
+        self.output_path = output_path
+        self.fps = video_info["fps"] or 0.0
+        self.frames_written = 0
+        self.detection_count = 0
+        self.frames_with_detections = 0
+        self._file = open(output_path, 'w', encoding='utf-8')
+        meta = dict(video_info, video=video_path)
+        self._file.write(json.dumps(meta, ensure_ascii=False) + "\n")
+
+    def write(self, index, frame, detections):
+        self.frames_written += 1
+        if not detections:
+            return
+        self.detection_count += len(detections)
+        self.frames_with_detections += 1
+        record = {
+            "frame": index,
+            "time": round(index / self.fps, 3) if self.fps else None,
+            "boxes": [[cls, x1, y1, x2, y2, round(conf, 4)] for cls, x1, y1, x2, y2, conf in detections],
+        }
+        self._file.write(json.dumps(record) + "\n")
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class ColumnarDetectionSink:
+    """
+    Приемник, который пишет журнал детекций в столбцовом формате:
+    NumPy (.npz) или Parquet (.parquet, требуется pyarrow).
+
+    Одна строка на найденный объект со столбцами LOG_COLUMNS.
+    """
+
+    needs_frames = False  # Кадры не нужны: при выборке промежуточные кадры не декодируются
+
+    def __init__(self, output_path, video_info, video_path=None, file_format="npz"):
+        """
+        Args:
+            output_path (str): Путь к файлу журнала
+            video_info (dict): Параметры видео из probe_video()
+            video_path (str, optional): Путь к исходному видео (сохраняется в журнале)
+            file_format (str): "npz" или "parquet"
+        """
+        if file_format not in ("npz", "parquet"):
+            raise ValueError(f"Неизвестный формат журнала: {file_format}")
+        if file_format == "parquet":
+            # Проверяем зависимость сразу, а не после обработки всего видео
+            import pyarrow  # noqa: F401
+        self.output_path = output_path
+        self.file_format = file_format
+        self.video_info = dict(video_info, video=video_path)
+        self.fps = video_info["fps"] or 0.0
+        self.frames_written = 0
+        self.detection_count = 0
+        self.frames_with_detections = 0
+        self._rows = []
+        self._closed = False
+
+    def write(self, index, frame, detections):
+        self.frames_written += 1
+        if not detections:
+            return
+        self.detection_count += len(detections)
+        self.frames_with_detections += 1
+        time_s = index / self.fps if self.fps else 0.0
+        for cls, x1, y1, x2, y2, conf in detections:
+            self._rows.append((index, time_s, cls, x1, y1, x2, y2, conf))
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+
+        rows = np.array(self._rows, dtype=np.float64).reshape(-1, len(LOG_COLUMNS))
+        columns = {
+            "frame": rows[:, 0].astype(np.int64),
+            "time": rows[:, 1],
+            "cls": rows[:, 2].astype(np.int16),
+            "x1": rows[:, 3].astype(np.int32),
+            "y1": rows[:, 4].astype(np.int32),
+            "x2": rows[:, 5].astype(np.int32),
+            "y2": rows[:, 6].astype(np.int32),
+            "conf": rows[:, 7].astype(np.float32),
+        }
+        meta = dict(self.video_info, frames_processed=self.frames_written)
+
+        if self.file_format == "npz":
+            with open(self.output_path, 'wb') as f:
+                np.savez_compressed(f, meta=json.dumps(meta, ensure_ascii=False), **columns)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.table(columns)
+            table = table.replace_schema_metadata({"hotdog": json.dumps(meta, ensure_ascii=False)})
+            pq.write_table(table, self.output_path)
+
+
+def create_detection_sink(output_mode, output_path, video_info, video_path=None):
+    """
+    Создает приемник журнала детекций.
+
+    Args:
+        output_mode (str): "jsonl", "npz" или "parquet"
+        output_path (str): Путь к файлу журнала
+        video_info (dict): Параметры видео из probe_video()
+        video_path (str, optional): Путь к исходному видео
+
+    Returns:
+        Приемник с методами write(index, frame, detections) и close()
+    """
+    if output_mode == "jsonl":
+        return JsonlDetectionSink(output_path, video_info, video_path)
+    return ColumnarDetectionSink(output_path, video_info, video_path, file_format=output_mode)
+
+
+def load_detection_log(path):
+    """
+    Читает журнал детекций в любом из поддерживаемых форматов.
+
+    Returns:
+        tuple: (параметры видео dict, {номер кадра: [(класс, x1, y1, x2, y2, conf), ...]})
+    """
+    frames = {}
+    if path.endswith(".jsonl"):
+        with open(path, 'r', encoding='utf-8') as f:
+            meta = json.loads(f.readline())
+            for line in f:
+                record = json.loads(line)
+                frames[record["frame"]] = [tuple(box) for box in record["boxes"]]
+        return meta, frames
+
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            columns = {name: data[name] for name in LOG_COLUMNS}
+    elif path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        table = pq.read_table(path)
+        meta = json.loads(table.schema.metadata[b"hotdog"])
+        columns = {name: table.column(name).to_numpy() for name in LOG_COLUMNS}
+    else:
+        raise ValueError(f"Неизвестный формат журнала: {path}")
+
+    for i in range(len(columns["frame"])):
+        box = (int(columns["cls"][i]), int(columns["x1"][i]), int(columns["y1"][i]),
+               int(columns["x2"][i]), int(columns["y2"][i]), float(columns["conf"][i]))
+        frames.setdefault(int(columns["frame"][i]), []).append(box)
+    return meta, frames
@@ -0,0 +1,173 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+# Стороны входа YOLO должны быть кратны шагу сети
+MODEL_STRIDE = 32
+
+
+def input_shape(height, width, scale):
+    """
+    Размер входа модели для изображения, уменьшенного в scale раз (поля справа и снизу до кратности 32).
+
+    Returns:
+        tuple: (высота, ширина) входа сети - время инференса примерно пропорционально их произведению
+    """
+    new_h = max(1, int(round(height * scale)))
+    new_w = max(1, int(round(width * scale)))
+    return -(-new_h // MODEL_STRIDE) * MODEL_STRIDE, -(-new_w // MODEL_STRIDE) * MODEL_STRIDE
+
+
+class LetterboxCache:
+    """
+    Переиспользуемые буферы для уменьшения кадров перед инференсом.
+
+    Кадр экрана (1080p/4K) уменьшается так, чтобы длинная сторона стала равна imgsz, а обе
+    стороны - кратны 32. Поля справа и снизу заполняются цветом 114 один раз при создании буфера,
+    дальше каждый кадр только записывается в ту же память через cv2.resize(dst=...).
+    ultralytics получает кадр уже нужного размера и не выделяет память под масштабирование.
+    Хранится не больше max_entries буферов: при захвате окна или вырезок изменившихся областей
+    размер кадра меняется постоянно, и давно не использованные буферы освобождаются.
+    """
+
+    def __init__(self, pad_value=114, interpolation=cv2.INTER_LINEAR, max_entries=4):
+        """
+        Args:
+            pad_value (int): Цвет полей (как в ultralytics)
+            interpolation (int): Метод масштабирования OpenCV (INTER_LINEAR - как в ultralytics)
+            max_entries (int): Сколько буферов разного размера хранить
+        """
+        self.pad_value = pad_value
+        self.interpolation = interpolation
+        self.max_entries = max(1, max_entries)
+        # (высота, ширина, imgsz) -> (буфер, область кадра в буфере, масштаб), от давно использованных к недавним
+        self._buffers = OrderedDict()
+
+    def resize(self, image, imgsz):
+        """
+        Уменьшает кадр в переиспользуемый буфер.
+
+        Буфер действителен до следующего вызова с тем же размером кадра и imgsz.
+
+        Args:
+            image (numpy.ndarray): Кадр (BGR)
+            imgsz (int): Длинная сторона входа модели
+
+        Returns:
+            tuple: (буфер, (масштаб по x, масштаб по y)) - координаты на буфере делятся на масштаб
+                   своей оси, чтобы получить координаты кадра
+        """
+        height, width = image.shape[:2]
+        key = (height, width, imgsz)
+        entry = self._buffers.get(key)
+        if entry is None:
+            entry = self._allocate(height, width, imgsz)
+            self._buffers[key] = entry
+            if len(self._buffers) > self.max_entries:
+                self._buffers.popitem(last=False)
+        else:
+            self._buffers.move_to_end(key)
+        buffer, view, scale = entry
+        if view is buffer and scale == (1.0, 1.0):
+            # Кадр уже нужного размера - масштабировать нечего
+            return image, scale
+        cv2.resize(image, (view.shape[1], view.shape[0]), dst=view, interpolation=self.interpolation)
+        return buffer, scale
+
+    def _allocate(self, height, width, imgsz):
+        scale = min(1.0, imgsz / max(height, width))
+        new_w = max(1, int(round(width * scale)))
+        new_h = max(1, int(round(height * scale)))
+        buffer_w = -(-new_w // MODEL_STRIDE) * MODEL_STRIDE
+        buffer_h = -(-new_h // MODEL_STRIDE) * MODEL_STRIDE
+        buffer = np.full((buffer_h, buffer_w, 3), self.pad_value, dtype=np.uint8)
+        view = buffer[:new_h, :new_w]
+        if view.shape == buffer.shape:
+            view = buffer
+        # Масштаб по каждой оси считаем по фактическому размеру после округления
+        if scale >= 1.0:
+            return buffer, view, (1.0, 1.0)
+        return buffer, view, (new_w / width, new_h / height)
+
+    def clear(self):
+        """Освобождает все буферы (например, после смены разрешения экрана)."""
+        self._buffers.clear()
+
+
+class AdaptiveImageSize:
+    """
+    Выбор размера входа модели (imgsz) по загрузке CPU и качеству детекций.
+
+    - Если инференс не укладывается в бюджет времени кадра (CPU не успевает), размер уменьшается.
+    - Если найденные объекты мелкие на входе сети или уверенность низкая и запас по времени есть,
+      размер увеличивается.
+    - Если размер меньше начального (после кратковременной нагрузки на CPU) и запас по времени есть,
+      размер возвращается к начальному, даже когда на экране нет объектов.
+    Решение меняется только после patience одинаковых оценок подряд, чтобы размер не прыгал.
+    """
+
+    def __init__(self, sizes=(320, 416, 512, 640), initial=640, budget_ms=None, small_box=24,
+                 low_conf=0.5, patience=3):
+        """
+        Args:
+            sizes (tuple): Допустимые размеры входа по возрастанию
+            initial (int): Начальный размер
+            budget_ms (float, optional): Бюджет времени на инференс кадра в мс (None - без ограничения)
+            small_box (int): Сторона бокса на входе сети (px), ниже которой объект считается мелким
+            low_conf (float): Уверенность, ниже которой детекция считается неуверенной
+            patience (int): Сколько оценок подряд нужно для смены размера
+        """
+        self.sizes = tuple(sorted(sizes))
+        self.index = self.sizes.index(initial) if initial in self.sizes else len(self.sizes) - 1
+        self.initial_index = self.index
+        self.budget_ms = budget_ms
+        self.small_box = small_box
+        self.low_conf = low_conf
+        self.patience = max(1, patience)
+        self._pending = 0
+        self._streak = 0
+
+    @property
+    def imgsz(self):
+        return self.sizes[self.index]
+
+    def update(self, latency_ms, detections, frame_shape):
+        """
+        Учитывает результат очередного инференса.
+
+        Args:
+            latency_ms (float): Время инференса кадра
+            detections (list): Найденные боксы [(класс, x1, y1, x2, y2, conf), ...] в координатах кадра
+            frame_shape (tuple): Размер кадра (высота, ширина, ...)
+
+        Returns:
+            int: Размер входа для следующего кадра
+        """
+        want = 0
+        if self.budget_ms and latency_ms > self.budget_ms:
+            want = -1
+        elif self.index < len(self.sizes) - 1:
+            # Время инференса растет примерно как квадрат стороны входа
+            growth = (self.sizes[self.index + 1] / self.imgsz) ** 2
+            if not self.budget_ms or latency_ms * growth <= self.budget_ms:
+                if self.index < self.initial_index:
+                    # Нагрузка спала - возвращаемся к начальному размеру, иначе мелкие объекты
+                    # пропускались бы до конца сеанса
+                    want = 1
+                elif detections:
+                    scale = self.imgsz / max(frame_shape[:2])
+                    smallest = min(min(x2 - x1, y2 - y1) for _, x1, y1, x2, y2, _ in detections) * scale
+                    least_confident = min(conf for *_, conf in detections)
+                    if smallest < self.small_box or least_confident < self.low_conf:
+                        want = 1
+
+        if want != self._pending:
+            self._pending = want
+            self._streak = 0
+        self._streak += 1
+
+        if want and self._streak >= self.patience:
+            self.index = min(len(self.sizes) - 1, max(0, self.index + want))
+            self._streak = 0
+        return self.imgsz
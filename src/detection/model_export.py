@@ -0,0 +1,149 @@
+import hashlib
+import importlib.util
+import os
+import shutil
+import tempfile
+
+# Импорты модулей приложения
+from src.config import INFERENCE_SETTINGS
+
+# Движок инференса -> (формат экспорта ultralytics, модуль, который должен быть установлен)
+BACKEND_FORMATS = {
+    "onnx": ("onnx", "onnxruntime"),
+    "openvino": ("openvino", "openvino"),
+}
+
+# Точности, доступные для каждого движка
+SUPPORTED_PRECISIONS = {
+    "torch": ("fp32", "fp16"),
+    "onnx": ("fp32", "int8"),
+    "openvino": ("fp32", "fp16"),
+}
+
+
+def check_precision(backend, precision):
+    """Проверяет, что движок поддерживает точность, иначе выбрасывает ValueError."""
+    if precision not in SUPPORTED_PRECISIONS.get(backend, ()):
+        supported = ", ".join(
+            f"{name}: {'/'.join(values)}" for name, values in SUPPORTED_PRECISIONS.items()
+        )
+        raise ValueError(f"Движок {backend} не поддерживает точность {precision} ({supported})")
+
+
+def available_backends():
+    """
+    Возвращает движки инференса, доступные в текущем окружении.
+
+    Returns:
+        list: Например ["torch", "onnx"]
+    """
+    backends = ["torch"]
+    for backend, (_, module) in BACKEND_FORMATS.items():
+        if importlib.util.find_spec(module) is not None:
+            backends.append(backend)
+    return backends
+
+
+def weights_hash(model_path, chunk_size=1 << 20):
+    """
+    Хэш файла весов: экспортированная модель пересоздается, если веса изменились.
+
+    Returns:
+        str: Первые 16 символов SHA-256
+    """
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def exported_model_path(model_path, backend, imgsz=None, cache_dir=None, precision="fp32"):
+    """
+    Путь к экспортированной модели в кэше.
+
+    Имя содержит хэш весов, размер входа и точность, например
+    models/cache/yolov8n-1a2b3c4d5e6f7a8b-640.onnx, .../yolov8n-1a2b3c4d5e6f7a8b-640-int8.onnx
+    или .../yolov8n-1a2b3c4d5e6f7a8b-640_openvino_model/
+    """
+    if backend not in BACKEND_FORMATS:
+        raise ValueError(f"Неизвестный движок инференса: {backend}")
+    imgsz = imgsz or INFERENCE_SETTINGS["export_imgsz"]
+    cache_dir = cache_dir or INFERENCE_SETTINGS["cache_dir"]
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+    name = f"{stem}-{weights_hash(model_path)}-{imgsz}"
+    if precision != "fp32":
+        name += f"-{precision}"
+    if backend == "onnx":
+        return os.path.join(cache_dir, name + ".onnx")
+    # ultralytics распознает модель OpenVINO по суффиксу папки
+    return os.path.join(cache_dir, name + "_openvino_model")
+
+
+def export_model(model_path, backend, imgsz=None, cache_dir=None, precision="fp32"):
+    """
+    Экспортирует веса PyTorch в формат движка инференса (один раз) и возвращает путь к результату.
+
+    Повторные вызовы с теми же весами берут модель из кэша. Экспорт выполняется во временной
+    папке и переносится в кэш одной операцией, поэтому параллельные процессы пакетной
+    обработки не увидят недописанную модель.
+
+    Args:
+        model_path (str): Путь к весам YOLO (.pt)
+        backend (str): "onnx" или "openvino"
+        imgsz (int, optional): Размер входа при экспорте (по умолчанию из INFERENCE_SETTINGS).
+                               Модель экспортируется с динамическими размерами, поэтому
+                               инференс возможен и с другим imgsz и любым размером батча.
+        cache_dir (str, optional): Папка кэша (по умолчанию из INFERENCE_SETTINGS)
+        precision (str): "fp32"; "int8" для onnx - квантизация ONNX Runtime с калибровкой
+                         на изображениях INFERENCE_SETTINGS["calibration_dir"]; "fp16" для openvino
+
+    Returns:
+        str: Путь к экспортированной модели
+    """
+    check_precision(backend, precision)
+    target = exported_model_path(model_path, backend, imgsz, cache_dir, precision)
+    if os.path.exists(target):
+        return target
+
+    export_format, module = BACKEND_FORMATS[backend]
+    if importlib.util.find_spec(module) is None:
+        raise ImportError(f"Для движка {backend} нужен пакет {module}")
+
+    if precision == "int8":
+        # INT8 получаем квантизацией уже экспортированной модели fp32
+        from src.detection.quantization import quantize_onnx
+
+        fp32_path = export_model(model_path, backend, imgsz, cache_dir)
+        print(f"Квантизация модели в INT8, результат: {target}")
+        # Своя временная папка у каждого процесса: параллельные квантизации не пишут в один файл
+        with tempfile.TemporaryDirectory(dir=os.path.dirname(target)) as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, os.path.basename(target))
+            method = quantize_onnx(fp32_path, tmp_path, INFERENCE_SETTINGS["calibration_dir"], imgsz=imgsz)
+            os.replace(tmp_path, target)
+        print(f"Квантизация завершена ({'статическая' if method == 'static' else 'динамическая'})")
+        return target
+
+    from ultralytics import YOLO
+
+    cache_dir = os.path.dirname(target)
+    os.makedirs(cache_dir, exist_ok=True)
+    print(f"Экспорт модели {model_path} в формат {backend}, результат: {target}")
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp_dir:
+        # ultralytics пишет результат рядом с весами - экспортируем копию во временной папке
+        weights = os.path.join(tmp_dir, os.path.basename(model_path))
+        shutil.copy2(model_path, weights)
+        exported = YOLO(weights).export(
+            format=export_format,
+            imgsz=imgsz or INFERENCE_SETTINGS["export_imgsz"],
+            dynamic=True,
+            half=precision == "fp16",
+            verbose=False,
+        )
+        try:
+            os.replace(exported, target)
+        except OSError:
+            # Модель уже экспортировал другой процесс
+            if not os.path.exists(target):
+                raise
+    return target
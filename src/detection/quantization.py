@@ -0,0 +1,308 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+# Импорты модулей приложения
+from src.config import CLASSES, CONFIDENCE_THRESHOLD, INFERENCE_SETTINGS
+from src.detection.tracker import iou_matrix
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+
+def list_images(folder, limit=None):
+    """Изображения папки в алфавитном порядке (не больше limit)."""
+    if not folder or not os.path.isdir(folder):
+        return []
+    images = sorted(
+        os.path.join(folder, name) for name in os.listdir(folder)
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+    return images[:limit] if limit else images
+
+
+def letterbox_tensor(image, imgsz):
+    """
+    Готовит кадр так же, как ultralytics перед инференсом: масштаб с сохранением пропорций,
+    поля цветом 114, BGR -> RGB, нормировка в [0, 1], формат NCHW.
+    """
+    height, width = image.shape[:2]
+    scale = min(imgsz / height, imgsz / width)
+    new_w, new_h = int(round(width * scale)), int(round(height * scale))
+    canvas = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    top, left = (imgsz - new_h) // 2, (imgsz - new_w) // 2
+    canvas[top:top + new_h, left:left + new_w] = cv2.resize(image, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    tensor = canvas[:, :, ::-1].transpose(2, 0, 1).astype(np.float32) / 255.0
+    return tensor[None]
+
+
+def quantize_onnx(fp32_path, output_path, calibration_dir=None, max_images=None, imgsz=None):
+    """
+    Квантизирует ONNX-модель в INT8 для ONNX Runtime.
+
+    Если в calibration_dir есть изображения, выполняется статическая квантизация (веса и активации,
+    диапазоны активаций калибруются на этих изображениях), иначе - динамическая (только веса).
+
+    Args:
+        fp32_path (str): Исходная ONNX-модель
+        output_path (str): Куда сохранить квантизированную модель
+        calibration_dir (str, optional): Папка с изображениями для калибровки
+        max_images (int, optional): Сколько изображений использовать для калибровки
+        imgsz (int, optional): Размер входа при калибровке
+
+    Returns:
+        str: "static" или "dynamic" - какой способ был применен
+    """
+    from onnxruntime import InferenceSession
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static,
+    )
+
+    images = list_images(calibration_dir, max_images or INFERENCE_SETTINGS["calibration_images"])
+    if not images:
+        quantize_dynamic(fp32_path, output_path, weight_type=QuantType.QUInt8)
+        return "dynamic"
+
+    imgsz = imgsz or INFERENCE_SETTINGS["export_imgsz"]
+    input_name = InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    class ImageCalibrationReader(CalibrationDataReader):
+        """Подает изображения калибровки по одному в формате входа модели."""
+
+        def __init__(self):
+            self._images = iter(images)
+
+        def get_next(self):
+            for path in self._images:
+                image = cv2.imread(path)
+                if image is not None:
+                    return {input_name: letterbox_tensor(image, imgsz)}
+            return None
+
+    quantize_static(
+        fp32_path,
+        output_path,
+        ImageCalibrationReader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+    )
+    return "static"
+
+
+def read_labels(image_path, class_id):
+    """
+    Читает разметку YOLO (<имя>.txt рядом с изображением или в соседней папке labels/).
+
+    Returns:
+        list или None: Боксы класса class_id [(x1, y1, x2, y2), ...] в пикселях; None - разметки нет
+    """
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    folder = os.path.dirname(image_path)
+    candidates = [
+        os.path.join(folder, stem + ".txt"),
+        os.path.join(os.path.dirname(folder), "labels", stem + ".txt"),
+    ]
+    label_path = next((p for p in candidates if os.path.exists(p)), None)
+    if label_path is None:
+        return None
+
+    image = cv2.imread(image_path)
+    height, width = image.shape[:2]
+    boxes = []
+    with open(label_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) < 5 or int(parts[0]) != class_id:
+                continue
+            cx, cy, w, h = (float(v) for v in parts[1:5])
+            boxes.append(((cx - w / 2) * width, (cy - h / 2) * height, (cx + w / 2) * width, (cy + h / 2) * height))
+    return boxes
+
+
+def match_recall(reference_boxes, predicted_boxes, iou_threshold=0.5):
+    """
+    Считает, сколько эталонных боксов найдено (жадное сопоставление по IoU).
+
+    Returns:
+        tuple: (найдено, всего эталонных)
+    """
+    if not reference_boxes:
+        return 0, 0
+    if not predicted_boxes:
+        return 0, len(reference_boxes)
+    iou = iou_matrix(reference_boxes, predicted_boxes)
+    used = set()
+    found = 0
+    for r in range(len(reference_boxes)):
+        for p in np.argsort(iou[r])[::-1]:
+            if iou[r, p] < iou_threshold:
+                break
+            if p not in used:
+                used.add(p)
+                found += 1
+                break
+    return found, len(reference_boxes)
+
+
+def average_precision(labels, predictions, iou_threshold=0.5):
+    """
+    AP@0.5 одного класса по всем изображениям (площадь под кривой precision-recall, как в COCO/VOC).
+
+    Args:
+        labels (list): Для каждого изображения эталонные боксы [(x1, y1, x2, y2), ...]
+        predictions (list): Для каждого изображения боксы модели [(x1, y1, x2, y2, conf), ...]
+        iou_threshold (float): Порог IoU для совпадения с эталоном
+
+    Returns:
+        float: AP от 0 до 1 (1.0, если эталонных боксов нет)
+    """
+    total = sum(len(boxes) for boxes in labels)
+    if not total:
+        return 1.0
+
+    # Боксы всех изображений по убыванию уверенности: совпал ли каждый с еще не найденным эталоном
+    ranked = sorted(
+        ((box[4], image, box[:4]) for image, boxes in enumerate(predictions) for box in boxes),
+        key=lambda item: item[0], reverse=True,
+    )
+    used = [set() for _ in labels]
+    hits = []
+    for _, image, box in ranked:
+        hit = False
+        if labels[image]:
+            iou = iou_matrix([box], labels[image])[0]
+            for r in np.argsort(iou)[::-1]:
+                if iou[r] < iou_threshold:
+                    break
+                if r not in used[image]:
+                    used[image].add(r)
+                    hit = True
+                    break
+        hits.append(hit)
+    if not hits:
+        return 0.0
+
+    true_positives = np.cumsum(hits)
+    recall = np.concatenate(([0.0], true_positives / total, [1.0]))
+    precision = np.concatenate(([1.0], true_positives / np.arange(1, len(hits) + 1), [0.0]))
+    # Огибающая precision справа налево, затем площадь по точкам изменения recall
+    precision = np.maximum.accumulate(precision[::-1])[::-1]
+    changes = np.where(recall[1:] != recall[:-1])[0]
+    return float(np.sum((recall[changes + 1] - recall[changes]) * precision[changes + 1]))
+
+
+def validation_images(folder=None):
+    """
+    Проверочные изображения с разметкой YOLO (изображения без разметки пропускаются).
+
+    Returns:
+        list: Пути к размеченным изображениям
+    """
+    folder = folder or INFERENCE_SETTINGS["validation_dir"]
+    hot_dog_class = next(iter(CLASSES))
+    return [path for path in list_images(folder) if read_labels(path, hot_dog_class) is not None]
+
+
+def evaluate_accuracy_gate(reference_detector, candidate_detector, images, max_recall_drop=None,
+                           max_map_drop=None, conf=CONFIDENCE_THRESHOLD):
+    """
+    Сравнивает recall и AP@0.5 класса "хот-дог" у исходной и квантизированной модели по разметке.
+
+    Обе модели запускаются с низким порогом, чтобы построить кривую precision-recall для AP;
+    recall считается по боксам с уверенностью не ниже рабочего порога conf.
+
+    Args:
+        reference_detector (HotDogDetector): Исходная модель (fp32)
+        candidate_detector (HotDogDetector): Квантизированная модель
+        images (list): Пути к размеченным проверочным изображениям (см. validation_images)
+        max_recall_drop (float, optional): Допустимое падение recall (по умолчанию из INFERENCE_SETTINGS)
+        max_map_drop (float, optional): Допустимое падение AP@0.5 (по умолчанию из INFERENCE_SETTINGS)
+        conf (float): Рабочий порог уверенности для recall
+
+    Returns:
+        dict: {"passed", "reference_recall", "candidate_recall", "reference_map", "candidate_map",
+               "boxes", "images"}
+    """
+    if max_recall_drop is None:
+        max_recall_drop = INFERENCE_SETTINGS["max_recall_drop"]
+    if max_map_drop is None:
+        max_map_drop = INFERENCE_SETTINGS["max_map_drop"]
+
+    hot_dog_class = next(iter(CLASSES))
+    labels = []
+    predictions = {"reference": [], "candidate": []}
+    for path in images:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        labels.append(read_labels(path, hot_dog_class) or [])
+        for name, detector in (("reference", reference_detector), ("candidate", candidate_detector)):
+            detections = detector.infer_batch([image], CLASSES, conf=0.001)[0]
+            predictions[name].append([d[1:6] for d in detections])
+
+    total = sum(len(boxes) for boxes in labels)
+    result = {"boxes": total, "images": len(images)}
+    for name, per_image in predictions.items():
+        found = sum(
+            match_recall(boxes, [p[:4] for p in preds if p[4] >= conf])[0]
+            for boxes, preds in zip(labels, per_image)
+        )
+        result[f"{name}_recall"] = found / total if total else 1.0
+        result[f"{name}_map"] = average_precision(labels, per_image)
+
+    result["passed"] = (
+        result["reference_recall"] - result["candidate_recall"] <= max_recall_drop
+        and result["reference_map"] - result["candidate_map"] <= max_map_drop
+    )
+    return result
+
+
+def check_accuracy_gate(model_path, backend, precision, conf=CONFIDENCE_THRESHOLD):
+    """
+    Проверяет, можно ли использовать квантизированный вариант модели.
+
+    Recall и AP@0.5 хот-догов считаются по размеченным изображениям INFERENCE_SETTINGS["validation_dir"].
+    Результат сохраняется рядом с квантизированной моделью (<модель>.gate.json) и при следующих
+    запусках не пересчитывается.
+
+    Returns:
+        dict: Результат проверки {"passed", "reference_recall", "candidate_recall", "reference_map", ...}
+
+    Raises:
+        FileNotFoundError: Нет размеченных проверочных изображений - без проверки нельзя
+                           гарантировать, что хот-доги не потеряются
+    """
+    from src.detection.model_export import export_model
+    from src.detection.yolo_detector import HotDogDetector
+
+    images = validation_images()
+    if not images:
+        raise FileNotFoundError(
+            f"Для точности {precision} нужны изображения с хот-догами и разметкой YOLO "
+            f"в {INFERENCE_SETTINGS['validation_dir']} (<имя>.jpg и <имя>.txt или labels/<имя>.txt)"
+        )
+
+    candidate_path = export_model(model_path, backend, precision=precision)
+    gate_path = candidate_path.rstrip("/\\") + ".gate.json"
+    tolerances = {
+        "max_recall_drop": INFERENCE_SETTINGS["max_recall_drop"],
+        "max_map_drop": INFERENCE_SETTINGS["max_map_drop"],
+    }
+    if os.path.exists(gate_path):
+        with open(gate_path, 'r', encoding='utf-8') as f:
+            gate = json.load(f)
+        if all(gate.get(key) == value for key, value in tolerances.items()) and gate.get("images") == len(images):
+            return gate
+
+    reference = HotDogDetector(model_path, conf=conf, verbose=False, backend="torch", precision="fp32")
+    candidate = HotDogDetector(model_path, conf=conf, verbose=False, backend=backend, precision=precision,
+                               check_accuracy=False)
+    gate = evaluate_accuracy_gate(reference, candidate, images, conf=conf, **tolerances)
+    gate.update(tolerances)
+
+    with open(gate_path, 'w', encoding='utf-8') as f:
+        json.dump(gate, f, ensure_ascii=False, indent=2)
+    return gate
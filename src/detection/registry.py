@@ -0,0 +1,135 @@
+import os
+import threading
+
+# Импорты модулей приложения
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD, INFERENCE_SETTINGS
+
+
+class ModelRegistry:
+    """
+    Общий для процесса кэш детекторов.
+
+    Детекторы хранятся по ключу (путь к весам, устройство, точность, движок) и выдаются
+    с подсчётом ссылок. После release() модель остаётся в памяти, поэтому повторный
+    запуск захвата экрана не перечитывает веса с диска. Выгрузка - только явная, через evict().
+    Порог уверенности не входит в ключ и не хранится за владельцем: детектор общий, поэтому
+    каждый владелец передает свой порог в вызовы detect()/infer_*() (conf=...).
+
+    Блокировка реестра держится только пока резервируется запись, а сама модель загружается
+    вне ее: запрос другой модели не ждет чужую загрузку, а запросы той же модели ждут
+    событие "ready" своей записи.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # ключ -> {"detector": HotDogDetector или None, пока модель загружается, "refs": int,
+        #          "ready": threading.Event, "error": исключение загрузки или None}
+        self._entries = {}
+
+    @staticmethod
+    def make_key(model_path=MODEL_PATH, device=None, precision=None, backend=None):
+        """Формирует ключ кэша для набора параметров модели."""
+        return (
+            os.path.abspath(model_path),
+            device,
+            precision or INFERENCE_SETTINGS["precision"],
+            backend or INFERENCE_SETTINGS["backend"],
+        )
+
+    def acquire(self, model_path=MODEL_PATH, device=None, precision=None, backend=None):
+        """
+        Возвращает общий детектор, загружая модель только при первом обращении.
+
+        Args:
+            model_path (str): Путь к весам YOLO
+            device (str, optional): Устройство инференса ("cpu", "cuda:0", ...). None - выбор ultralytics.
+            precision (str, optional): Точность весов ("fp32", "fp16", "int8"), по умолчанию из INFERENCE_SETTINGS
+            backend (str, optional): Движок инференса ("torch", "onnx", "openvino"), по умолчанию из INFERENCE_SETTINGS
+
+        Returns:
+            HotDogDetector: Детектор, общий для всех владельцев этого ключа
+        """
+        # Импорт здесь, чтобы модуль реестра не тянул за собой ultralytics
+        from src.detection.yolo_detector import HotDogDetector
+
+        key = self.make_key(model_path, device, precision, backend)
+        with self._lock:
+            entry = self._entries.get(key)
+            loading = entry is None
+            if loading:
+                # Резервируем запись: остальные запросы этой модели дождутся загрузки
+                entry = {"detector": None, "refs": 0, "ready": threading.Event(), "error": None}
+                self._entries[key] = entry
+            entry["refs"] += 1
+
+        if not loading:
+            entry["ready"].wait()
+            if entry["error"] is not None:
+                raise entry["error"]
+            return entry["detector"]
+
+        try:
+            entry["detector"] = HotDogDetector(model_path, conf=CONFIDENCE_THRESHOLD, device=device,
+                                               precision=key[2], backend=key[3])
+        except Exception as e:
+            # Модель не загрузилась - убираем запись, чтобы следующий запрос попробовал снова
+            entry["error"] = e
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            raise
+        finally:
+            entry["ready"].set()
+        return entry["detector"]
+
+    def release(self, detector):
+        """
+        Возвращает детектор в реестр. Модель остаётся загруженной до вызова evict().
+
+        Args:
+            detector (HotDogDetector): Детектор, полученный через acquire()
+        """
+        with self._lock:
+            for entry in self._entries.values():
+                if entry["detector"] is detector:
+                    entry["refs"] = max(0, entry["refs"] - 1)
+                    return
+
+    def evict(self, model_path=None, device=None, precision=None, force=False, backend=None):
+        """
+        Выгружает модели из кэша.
+
+        Args:
+            model_path (str, optional): Путь к весам. None - выгрузить все неиспользуемые модели.
+            device (str, optional): Устройство модели
+            precision (str): Точность модели
+            force (bool): Выгрузить даже если у модели остались владельцы
+            backend (str, optional): Движок инференса модели
+
+        Returns:
+            int: Количество выгруженных моделей
+        """
+        with self._lock:
+            if model_path is None:
+                keys = list(self._entries)
+            else:
+                keys = [self.make_key(model_path, device, precision, backend)]
+
+            evicted = 0
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is None or (entry["refs"] > 0 and not force):
+                    continue
+                del self._entries[key]
+                evicted += 1
+            return evicted
+
+    def refcount(self, model_path=MODEL_PATH, device=None, precision=None, backend=None):
+        """Возвращает количество владельцев модели (0, если модель не загружена)."""
+        with self._lock:
+            entry = self._entries.get(self.make_key(model_path, device, precision, backend))
+            return entry["refs"] if entry else 0
+
+
+# Реестр по умолчанию, общий для всего приложения
+model_registry = ModelRegistry()
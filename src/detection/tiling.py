@@ -0,0 +1,184 @@
+import math
+import time
+
+import numpy as np
+
+from src.detection.tracker import iou_matrix
+
+
+def plan_tiles(frame_shape, cols, rows, overlap=0.2):
+    """
+    Делит кадр на cols x rows одинаковых перекрывающихся плиток.
+
+    Args:
+        frame_shape (tuple): Размер кадра (высота, ширина, ...)
+        cols (int): Плиток по горизонтали
+        rows (int): Плиток по вертикали
+        overlap (float): Доля перекрытия соседних плиток
+
+    Returns:
+        list: Плитки [(x1, y1, x2, y2), ...]
+    """
+    height, width = frame_shape[:2]
+
+    def spans(length, count):
+        if count <= 1:
+            return [(0, length)]
+        size = int(math.ceil(length / (count - (count - 1) * overlap)))
+        step = (length - size) / (count - 1)
+        return [(int(round(i * step)), int(round(i * step)) + size) for i in range(count)]
+
+    return [
+        (x1, y1, x2, y2)
+        for y1, y2 in spans(height, rows)
+        for x1, x2 in spans(width, cols)
+    ]
+
+
+def merge_detections(detections, iou_threshold=0.5, ios_threshold=0.6):
+    """
+    Объединяет боксы, найденные на разных плитках (межплиточный NMS со слиянием).
+
+    Боксы одного класса объединяются, если их IoU выше iou_threshold (один объект на двух плитках)
+    или если меньший бокс почти целиком лежит в большем (IoS выше ios_threshold) - так
+    склеиваются части объекта, разрезанного границей плитки. Результат - охватывающий бокс
+    с наибольшей уверенностью.
+
+    Args:
+        detections (list): Боксы [(класс, x1, y1, x2, y2, conf), ...] в координатах кадра
+
+    Returns:
+        list: Объединенные боксы
+    """
+    if len(detections) < 2:
+        return list(detections)
+
+    order = sorted(detections, key=lambda d: d[5], reverse=True)
+    boxes = np.array([d[1:5] for d in order], dtype=np.float64)
+    iou = iou_matrix(boxes, boxes)
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    inter = iou * (areas[:, None] + areas[None, :]) / (1 + iou)
+    ios = inter / np.maximum(np.minimum(areas[:, None], areas[None, :]), 1e-9)
+
+    merged = []
+    kept_index = []
+    for i, (cls, x1, y1, x2, y2, conf) in enumerate(order):
+        for k, j in enumerate(kept_index):
+            if merged[k][0] == cls and (iou[i, j] > iou_threshold or ios[i, j] > ios_threshold):
+                _, mx1, my1, mx2, my2, mconf = merged[k]
+                merged[k] = (cls, min(mx1, x1), min(my1, y1), max(mx2, x2), max(my2, y2), mconf)
+                break
+        else:
+            merged.append((cls, x1, y1, x2, y2, conf))
+            kept_index.append(i)
+    return merged
+
+
+class TiledInference:
+    """
+    Инференс по перекрывающимся плиткам для мелких объектов на экранах высокого разрешения.
+
+    Все плитки (и, при include_full_frame, весь кадр целиком - для крупных объектов) обрабатываются
+    одним батчем за один прямой проход, результаты объединяются merge_detections().
+
+    Число плиток выбирается по разрешению: плитка уменьшается моделью не больше чем в max_downscale
+    раз. Бюджет времени ограничивает число плиток: по измеренному времени одной плитки сетка
+    уменьшается, пока батч укладывается в budget_ms.
+    """
+
+    def __init__(self, detector, imgsz=640, max_downscale=2.0, overlap=0.2, include_full_frame=True,
+                 budget_ms=None, iou_threshold=0.5, ios_threshold=0.6):
+        """
+        Args:
+            detector (HotDogDetector): Детектор
+            imgsz (int): Размер входа модели
+            max_downscale (float): Во сколько раз модель может уменьшать плитку
+            overlap (float): Доля перекрытия плиток
+            include_full_frame (bool): Добавлять в батч весь кадр целиком
+            budget_ms (float, optional): Бюджет времени на кадр в мс (None - без ограничения)
+            iou_threshold (float): Порог IoU для объединения боксов
+            ios_threshold (float): Порог доли пересечения от меньшего бокса для объединения
+        """
+        self.detector = detector
+        self.imgsz = imgsz
+        self.max_downscale = max_downscale
+        self.overlap = overlap
+        self.include_full_frame = include_full_frame
+        self.budget_ms = budget_ms
+        self.iou_threshold = iou_threshold
+        self.ios_threshold = ios_threshold
+        self.tile_ms = None  # Сглаженное время инференса одного изображения батча
+        self._warmed_up = False  # Первый вызов модели (прогрев) не учитывается во времени плитки
+        self.last_grid = (1, 1)
+
+    def choose_grid(self, frame_shape):
+        """
+        Выбирает сетку плиток (столбцов, строк) по разрешению и бюджету времени.
+
+        Returns:
+            tuple: (cols, rows); (1, 1) - плитки не нужны
+        """
+        height, width = frame_shape[:2]
+        tile_side = self.imgsz * self.max_downscale
+        cols = max(1, math.ceil(width / tile_side))
+        rows = max(1, math.ceil(height / tile_side))
+
+        if self.budget_ms and self.tile_ms:
+            max_images = int(self.budget_ms // self.tile_ms) - int(self.include_full_frame)
+            # Уменьшаем более длинную сторону сетки, пока батч не уложится в бюджет
+            while cols * rows > max(1, max_images) and cols * rows > 1:
+                if cols >= rows:
+                    cols -= 1
+                else:
+                    rows -= 1
+        return cols, rows
+
+    def detect(self, frame, class_names=None, conf=None):
+        """
+        Детектирует объекты на кадре по плиткам.
+
+        Args:
+            frame (numpy.ndarray): Кадр (BGR)
+            class_names (dict, optional): Классы, которые нужно оставить
+            conf (float, optional): Порог уверенности (по умолчанию порог детектора)
+
+        Returns:
+            list: Боксы [(класс, x1, y1, x2, y2, conf), ...] в координатах кадра
+        """
+        cols, rows = self.choose_grid(frame.shape)
+        self.last_grid = (cols, rows)
+        if cols * rows == 1:
+            # Время кадра без плиток тоже обновляет оценку: иначе после одного медленного
+            # батча сетка осталась бы 1x1 до конца сеанса, даже когда модель снова успевает
+            start_time = time.perf_counter()
+            detections = self.detector.infer_resized(frame, self.imgsz, class_names, conf)
+            self._update_tile_ms(start_time, 1)
+            return detections
+
+        tiles = plan_tiles(frame.shape, cols, rows, self.overlap)
+        images = [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in tiles]
+        if self.include_full_frame:
+            images.append(frame)
+            tiles = tiles + [(0, 0, frame.shape[1], frame.shape[0])]
+
+        start_time = time.perf_counter()
+        results = self.detector.infer_batch(images, class_names, imgsz=self.imgsz, conf=conf)
+        self._update_tile_ms(start_time, len(images))
+
+        detections = []
+        for (ox, oy, _, _), tile_detections in zip(tiles, results):
+            for cls, x1, y1, x2, y2, conf in tile_detections:
+                detections.append((cls, x1 + ox, y1 + oy, x2 + ox, y2 + oy, conf))
+        return merge_detections(detections, self.iou_threshold, self.ios_threshold)
+
+    def _update_tile_ms(self, start_time, images):
+        """Обновляет сглаженное время одного изображения по вызову модели на images изображениях."""
+        if not self._warmed_up:
+            self._warmed_up = True
+            return
+        # Время самой модели, без ожидания блокировки детектора другими потоками
+        elapsed = getattr(self.detector, "last_inference_ms", None)
+        if elapsed is None:
+            elapsed = (time.perf_counter() - start_time) * 1000
+        per_image = elapsed / images
+        self.tile_ms = per_image if self.tile_ms is None else 0.8 * self.tile_ms + 0.2 * per_image
@@ -0,0 +1,171 @@
+import itertools
+
+import numpy as np
+
+
+def iou_matrix(boxes_a, boxes_b):
+    """
+    Попарный IoU двух наборов боксов.
+
+    Args:
+        boxes_a (numpy.ndarray): Боксы формы (N, 4) в формате x1, y1, x2, y2
+        boxes_b (numpy.ndarray): Боксы формы (M, 4)
+
+    Returns:
+        numpy.ndarray: Матрица IoU формы (N, M)
+    """
+    a = np.asarray(boxes_a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(boxes_b, dtype=np.float64).reshape(-1, 4)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return np.where(union > 0, inter / np.maximum(union, 1e-9), 0.0)
+
+
+class Track:
+    """Отслеживаемый объект: сглаженный бокс и его скорость (пикселей на кадр)."""
+
+    def __init__(self, track_id, detection, frame_index):
+        cls, x1, y1, x2, y2, conf = detection
+        self.id = track_id
+        self.cls = cls
+        self.conf = conf
+        self.box = np.array([x1, y1, x2, y2], dtype=np.float64)
+        self.velocity = np.zeros(4)
+        self.last_frame = frame_index  # Кадр последнего обновления детекцией
+        self.hits = 1  # Сколько раз трек подтверждался детекцией
+        self.misses = 0  # Сколько обновлений подряд трек не находил пары
+
+    def predict(self, frame_index):
+        """Бокс, экстраполированный на кадр frame_index по постоянной скорости."""
+        return self.box + self.velocity * (frame_index - self.last_frame)
+
+    def as_detection(self, frame_index=None):
+        """Бокс в формате детектора (класс, x1, y1, x2, y2, conf)."""
+        box = self.box if frame_index is None else self.predict(frame_index)
+        x1, y1, x2, y2 = (int(round(v)) for v in box)
+        return (self.cls, x1, y1, x2, y2, self.conf)
+
+
+class IoUTracker:
+    """
+    Трекер по пересечению боксов (IoU) с фильтром постоянной скорости.
+
+    Детекции сопоставляются с предсказанными положениями треков жадно по убыванию IoU
+    (только боксы одного класса). Положение и скорость трека обновляются альфа-бета фильтром -
+    установившейся формой фильтра Калмана для модели постоянной скорости: smoothing=1
+    берет бокс детекции как есть, меньшие значения сглаживают дрожание рамок.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_missed=2, smoothing=0.85, velocity_gain=0.5):
+        """
+        Args:
+            iou_threshold (float): Минимальный IoU для сопоставления детекции с треком
+            max_missed (int): Сколько обновлений подряд трек может не находить пары до удаления
+            smoothing (float): Вес новой детекции при обновлении положения (0..1]
+            velocity_gain (float): Вес невязки при обновлении скорости
+        """
+        self.iou_threshold = iou_threshold
+        self.max_missed = max_missed
+        self.smoothing = smoothing
+        self.velocity_gain = velocity_gain
+        self.tracks = []
+        self.new_tracks = []  # Треки, появившиеся при последнем update()
+        self._ids = itertools.count(1)
+
+    def reset(self):
+        """Удаляет все треки (нумерация идентификаторов продолжается)."""
+        self.tracks = []
+        self.new_tracks = []
+
+    def update(self, detections, frame_index):
+        """
+        Обновляет треки детекциями кадра.
+
+        Args:
+            detections (list): Боксы [(класс, x1, y1, x2, y2, conf), ...]
+            frame_index (int): Номер кадра (для расчета скорости)
+
+        Returns:
+            list: Активные треки, подтвержденные на этом кадре
+        """
+        self.new_tracks = []
+        matched_tracks = set()
+        matched_detections = set()
+
+        if self.tracks and detections:
+            predicted = np.array([t.predict(frame_index) for t in self.tracks])
+            boxes = np.array([d[1:5] for d in detections], dtype=np.float64)
+            iou = iou_matrix(predicted, boxes)
+            # Боксы разных классов не сопоставляются
+            track_cls = np.array([t.cls for t in self.tracks])
+            det_cls = np.array([d[0] for d in detections])
+            iou[track_cls[:, None] != det_cls[None, :]] = 0.0
+
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                t, d = divmod(int(flat), iou.shape[1])
+                if iou[t, d] < self.iou_threshold:
+                    break
+                if t in matched_tracks or d in matched_detections:
+                    continue
+                matched_tracks.add(t)
+                matched_detections.add(d)
+                self._correct(self.tracks[t], detections[d], frame_index, predicted[t])
+
+        alive = []
+        for i, track in enumerate(self.tracks):
+            if i not in matched_tracks:
+                track.misses += 1
+                if track.misses > self.max_missed:
+                    continue
+            alive.append(track)
+
+        for d, detection in enumerate(detections):
+            if d not in matched_detections:
+                track = Track(next(self._ids), detection, frame_index)
+                alive.append(track)
+                self.new_tracks.append(track)
+
+        self.tracks = alive
+        return [t for t in self.tracks if t.misses == 0]
+
+    def predict(self, frame_index):
+        """
+        Боксы всех активных треков, экстраполированные на кадр frame_index.
+
+        Returns:
+            list: Боксы [(класс, x1, y1, x2, y2, conf), ...]
+        """
+        return [t.as_detection(frame_index) for t in self.tracks if t.misses == 0]
+
+    def _correct(self, track, detection, frame_index, predicted):
+        cls, x1, y1, x2, y2, conf = detection
+        measured = np.array([x1, y1, x2, y2], dtype=np.float64)
+        dt = max(1, frame_index - track.last_frame)
+        residual = measured - predicted
+        track.box = predicted + self.smoothing * residual
+        track.velocity = track.velocity + self.velocity_gain * residual / dt
+        track.conf = conf
+        track.last_frame = frame_index
+        track.hits += 1
+        track.misses = 0
+
+    def motion(self):
+        """
+        Наибольшая скорость среди активных треков в долях размера бокса за кадр.
+
+        Используется для адаптивного шага выборки кадров: чем быстрее движутся объекты,
+        тем чаще нужно запускать детектор.
+        """
+        speeds = []
+        for track in self.tracks:
+            if track.misses:
+                continue
+            size = max(track.box[2] - track.box[0], track.box[3] - track.box[1], 1.0)
+            speeds.append(np.abs(track.velocity).max() / size)
+        return max(speeds, default=0.0)
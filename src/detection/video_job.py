@@ -0,0 +1,316 @@
+import json
+import os
+import shutil
+import subprocess
+
+import cv2
+
+# Импорты модулей приложения
+from src.config import VIDEO_SETTINGS
+from src.detection.video_pipeline import VideoPipeline, AnnotatedVideoSink, probe_video
+
+
+class SegmentedVideoSink(AnnotatedVideoSink):
+    """
+    Приемник, который пишет видео отрезками по segment_frames кадров.
+
+    Каждый закрытый отрезок - корректный видеофайл, поэтому после остановки или сбоя
+    обработку можно продолжить с последнего записанного кадра.
+    """
+
+    def __init__(self, detector, parts_dir, video_info, start_frame, segment_frames,
+                 on_segment_closed, class_names=None):
+        """
+        Args:
+            detector (HotDogDetector): Детектор, который рисует рамки
+            parts_dir (str): Папка для отрезков
+            video_info (dict): Параметры видео из probe_video()
+            start_frame (int): Номер первого кадра первого отрезка
+            segment_frames (int): Максимальная длина отрезка в кадрах
+            on_segment_closed (callable): Вызывается как callback(отрезок) со словарем
+                                          {"path", "end", "detections", "frames_with_detections"}
+            class_names (dict, optional): Словарь с названиями классов для подписей
+        """
+        self.parts_dir = parts_dir
+        self.segment_frames = max(1, int(segment_frames))
+        self.on_segment_closed = on_segment_closed
+        self.next_frame = start_frame
+        self.segment_written = 0
+        self._segment_start_counts = (0, 0)
+        super().__init__(detector, self._segment_path(start_frame), video_info, class_names)
+
+    def _segment_path(self, start_frame):
+        return os.path.join(self.parts_dir, f"part_{start_frame:09d}.mp4")
+
+    def write(self, index, frame, detections):
+        super().write(index, frame, detections)
+        self.segment_written += 1
+        self.next_frame = index + 1
+        if self.segment_written >= self.segment_frames:
+            self._close_segment()
+            self.output_path = self._segment_path(self.next_frame)
+            self._out = self._open(self.output_path)
+
+    def _close_segment(self):
+        super().close()
+        if self.segment_written > 0:
+            detections, frames_with_detections = self._segment_start_counts
+            self.on_segment_closed({
+                "path": self.output_path,
+                "end": self.next_frame,
+                "detections": self.detection_count - detections,
+                "frames_with_detections": self.frames_with_detections - frames_with_detections,
+            })
+        elif os.path.exists(self.output_path):
+            os.remove(self.output_path)
+        self.segment_written = 0
+        self._segment_start_counts = (self.detection_count, self.frames_with_detections)
+
+    def close(self):
+        if self._out is not None:
+            self._close_segment()
+
+
+class VideoDetectionJob:
+    """
+    Возобновляемая обработка видео.
+
+    Прогресс сохраняется в файл контрольной точки рядом с результатом
+    (<результат>.checkpoint.json), а обработанные кадры - отрезками в папке <результат>.parts.
+    Если обработку прервать (cancel() или сбой), следующий запуск продолжит
+    с последнего записанного кадра, а не начнет сначала.
+    """
+
+    def __init__(self, detector, video_path, output_path=None, class_names=None, batch_size=None,
+                 segment_frames=None, verbose=True, stride=None, adaptive_stride=None, conf=None):
+        """
+        Args:
+            detector (HotDogDetector): Детектор хот-догов
+            video_path (str): Путь к видеофайлу
+            output_path (str, optional): Путь для сохранения обработанного видео
+            class_names (dict, optional): Словарь с названиями классов (по умолчанию detector.classes)
+            batch_size (int, optional): Размер батча (по умолчанию из VIDEO_SETTINGS)
+            segment_frames (int, optional): Длина отрезка между контрольными точками (по умолчанию из VIDEO_SETTINGS)
+            verbose (bool): Выводить прогресс в консоль
+            stride (int, optional): Запускать модель на каждом stride-м кадре (по умолчанию из VIDEO_SETTINGS)
+            adaptive_stride (bool, optional): Подбирать шаг по скорости движения объектов
+            conf (float, optional): Порог уверенности (по умолчанию порог детектора)
+        """
+        self.detector = detector
+        self.video_path = video_path
+        if output_path is None:
+            name, ext = os.path.splitext(os.path.basename(video_path))
+            output_path = os.path.join(os.path.dirname(video_path), f"{name}_detected{ext}")
+        self.output_path = output_path
+        self.class_names = class_names if class_names is not None else detector.classes
+        self.batch_size = batch_size or VIDEO_SETTINGS["batch_size"]
+        self.segment_frames = segment_frames or VIDEO_SETTINGS["segment_frames"]
+        self.stride = stride or VIDEO_SETTINGS["stride"]
+        self.adaptive_stride = VIDEO_SETTINGS["adaptive_stride"] if adaptive_stride is None else adaptive_stride
+        self.conf = conf
+        self.checkpoint_path = output_path + ".checkpoint.json"
+        self.parts_dir = output_path + ".parts"
+        self.verbose = verbose
+        self.cancelled = False
+        self.summary = None  # Итоги последней завершенной обработки
+        self._pipeline = None
+
+    def load_checkpoint(self):
+        """
+        Читает контрольную точку, если она относится к этому же видео.
+
+        Returns:
+            dict или None: {"video": ..., "video_size": ..., "completed_frames": ..., "segments": [...]}
+        """
+        if not os.path.exists(self.checkpoint_path):
+            return None
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        # Контрольная точка другого или измененного видео не подходит
+        if (checkpoint.get("video") != os.path.abspath(self.video_path)
+                or checkpoint.get("video_size") != os.path.getsize(self.video_path)):
+            return None
+
+        # Оставляем только отрезки, которые действительно есть на диске
+        segments = [seg for seg in checkpoint.get("segments", []) if os.path.exists(seg["path"])]
+        checkpoint["segments"] = segments
+        checkpoint["completed_frames"] = segments[-1]["end"] if segments else 0
+        return checkpoint
+
+    def resume_frame(self):
+        """Номер кадра, с которого продолжится обработка (0 - с начала)."""
+        checkpoint = self.load_checkpoint()
+        return checkpoint["completed_frames"] if checkpoint else 0
+
+    def discard_checkpoint(self):
+        """Удаляет контрольную точку и отрезки, чтобы начать обработку заново."""
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+    def _save_checkpoint(self, checkpoint):
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def run(self, progress_callback=None):
+        """
+        Обрабатывает видео, продолжая с контрольной точки, если она есть.
+
+        Args:
+            progress_callback (callable, optional): Вызывается как callback(обработано, всего, fps)
+
+        Returns:
+            str или None: Путь к готовому видео или None, если обработка отменена
+        """
+        self.cancelled = False
+        video_info = probe_video(self.video_path)
+
+        checkpoint = self.load_checkpoint()
+        if checkpoint is None:
+            self.discard_checkpoint()
+            checkpoint = {
+                "video": os.path.abspath(self.video_path),
+                "video_size": os.path.getsize(self.video_path),
+                "total_frames": video_info["frames"],
+                "completed_frames": 0,
+                "segments": [],
+            }
+        start_frame = checkpoint["completed_frames"]
+        os.makedirs(self.parts_dir, exist_ok=True)
+
+        if start_frame > 0 and self.verbose:
+            print(f"Продолжение обработки с кадра {start_frame}/{video_info['frames']}")
+
+        def on_segment_closed(segment):
+            checkpoint["segments"].append(segment)
+            checkpoint["completed_frames"] = segment["end"]
+            self._save_checkpoint(checkpoint)
+
+        sink = SegmentedVideoSink(
+            self.detector, self.parts_dir, video_info, start_frame, self.segment_frames,
+            on_segment_closed, self.class_names
+        )
+        self._pipeline = VideoPipeline(
+            self.detector,
+            batch_size=self.batch_size,
+            queue_size=VIDEO_SETTINGS["queue_size"],
+            class_names=self.class_names,
+            verbose=self.verbose,
+            stride=self.stride,
+            adaptive_stride=self.adaptive_stride,
+            max_stride=VIDEO_SETTINGS["max_stride"],
+            motion_tolerance=VIDEO_SETTINGS["motion_tolerance"],
+            seek_stride=VIDEO_SETTINGS["seek_stride"],
+            conf=self.conf,
+        )
+        if self.cancelled:
+            sink.close()
+            return None
+        stats = self._pipeline.run(self.video_path, sink, progress_callback, start_frame=start_frame)
+        self.detector.last_video_stats = stats
+
+        if self.cancelled:
+            print(f"Обработка остановлена на кадре {checkpoint['completed_frames']}, прогресс сохранен")
+            return None
+
+        segments = checkpoint["segments"]
+        self.summary = {
+            "video": self.video_path,
+            "output": self.output_path,
+            "frames": checkpoint["completed_frames"],
+            "detections": sum(seg.get("detections", 0) for seg in segments),
+            "frames_with_detections": sum(seg.get("frames_with_detections", 0) for seg in segments),
+            "fps": stats["fps"],
+        }
+
+        self._merge_segments(segments, video_info)
+        self.discard_checkpoint()
+        if self.verbose:
+            print(f"Обработка завершена. Результат сохранен в: {self.output_path}")
+        return self.output_path
+
+    def cancel(self):
+        """Останавливает обработку. Записанные кадры сохраняются в контрольной точке."""
+        self.cancelled = True
+        if self._pipeline is not None:
+            self._pipeline.stop()
+
+    def _merge_segments(self, segments, video_info):
+        """
+        Склеивает отрезки в итоговое видео (без повторного инференса).
+
+        С ffmpeg отрезки склеиваются без перекодирования (concat, -c copy): кадры не теряют
+        качество, и нет лишнего прохода декодирования и кодирования. Без ffmpeg кадры
+        перекодируются через OpenCV.
+        """
+        if len(segments) == 1:
+            os.replace(segments[0]["path"], self.output_path)
+            return
+
+        ffmpeg = find_ffmpeg()
+        if ffmpeg is not None:
+            try:
+                concat_segments(ffmpeg, [segment["path"] for segment in segments], self.output_path)
+                return
+            except (OSError, subprocess.CalledProcessError) as e:
+                print(f"Не удалось склеить отрезки через ffmpeg ({e}), видео будет перекодировано")
+        elif self.verbose:
+            print("ffmpeg не найден, отрезки склеиваются с перекодированием")
+
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        size = (video_info["width"], video_info["height"])
+        out = cv2.VideoWriter(self.output_path, fourcc, video_info["fps"], size)
+        try:
+            for segment in segments:
+                cap = cv2.VideoCapture(segment["path"])
+                while True:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    out.write(frame)
+                cap.release()
+        finally:
+            out.release()
+
+
+def find_ffmpeg():
+    """Путь к ffmpeg: из PATH или из пакета imageio-ffmpeg; None, если ffmpeg нет."""
+    path = shutil.which("ffmpeg")
+    if path is not None:
+        return path
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        return None
+
+
+def concat_segments(ffmpeg, paths, output_path):
+    """
+    Склеивает видеофайлы с одинаковыми параметрами без перекодирования (concat demuxer ffmpeg).
+
+    Args:
+        ffmpeg (str): Путь к ffmpeg
+        paths (list): Отрезки по порядку
+        output_path (str): Итоговое видео
+    """
+    list_path = output_path + ".concat.txt"
+    with open(list_path, 'w', encoding='utf-8') as f:
+        for path in paths:
+            # Одинарные кавычки в пути экранируются по правилам concat demuxer
+            escaped = os.path.abspath(path).replace("'", "'\\''")
+            f.write(f"file '{escaped}'\n")
+    try:
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_path,
+             "-c", "copy", output_path],
+            check=True, stdin=subprocess.DEVNULL, capture_output=True,
+        )
+    finally:
+        os.remove(list_path)
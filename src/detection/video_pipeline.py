@@ -0,0 +1,378 @@
+import queue
+import threading
+import time
+
+import cv2
+
+from src.detection.tracker import IoUTracker
+from src.utils.profiling import profiler
+
+# Маркер конца потока кадров между стадиями конвейера
+_SENTINEL = None
+
+
+class VideoPipeline:
+    """
+    Конвейер обработки видео из трёх стадий:
+    поток декодирования -> батчевый инференс YOLO -> поток записи.
+
+    Стадии связаны ограниченными очередями, поэтому на длинных видео память не растёт,
+    а декодирование и кодирование идут параллельно с работой нейросети.
+    """
+
+    def __init__(self, detector, batch_size=8, queue_size=4, class_names=None, verbose=True,
+                 stride=1, adaptive_stride=False, max_stride=8, motion_tolerance=0.15, seek_stride=30,
+                 conf=None):
+        """
+        Args:
+            detector (HotDogDetector): Детектор, модель которого используется для инференса
+            batch_size (int): Количество кадров в одном прямом проходе модели
+            queue_size (int): Размер очередей между стадиями (в батчах)
+            class_names (dict, optional): Словарь с названиями классов для фильтрации и подписей
+            verbose (bool): Выводить прогресс в консоль
+            stride (int): Запускать детектор на каждом stride-м кадре (1 - на каждом кадре).
+                          Боксы промежуточных кадров предсказывает трекер.
+            adaptive_stride (bool): Подбирать шаг по скорости движения объектов (от 1 до max_stride)
+            max_stride (int): Наибольший шаг при адаптивной выборке
+            motion_tolerance (float): Допустимое смещение объекта между запусками детектора
+                                      (в долях размера бокса) при адаптивной выборке
+            seek_stride (int): Начиная с такого шага промежуточные кадры пропускаются перемоткой,
+                               а не grab() (только для приемников, которым не нужны кадры)
+            conf (float, optional): Порог уверенности (по умолчанию порог детектора)
+        """
+        self.detector = detector
+        self.batch_size = max(1, int(batch_size))
+        self.queue_size = max(1, int(queue_size))
+        self.class_names = class_names
+        self.verbose = verbose
+        self.stride = max(1, int(stride))
+        self.adaptive_stride = adaptive_stride
+        self.max_stride = max(self.stride, int(max_stride))
+        self.motion_tolerance = motion_tolerance
+        self.seek_stride = max(2, int(seek_stride))
+        self.conf = conf
+        self.tracker = None
+        self.stats = {"frames": 0, "elapsed": 0.0, "fps": 0.0, "inferred": 0}
+        self._current_stride = self.stride
+        self._inferred = 0
+        self._frame_index = 0
+        self._start_time = 0.0
+        self._stop_event = threading.Event()
+        self._errors = []
+
+    def run(self, video_path, sink, progress_callback=None, start_frame=0):
+        """
+        Обрабатывает видео и передает кадры с детекциями в приемник.
+
+        Args:
+            video_path (str): Путь к видеофайлу
+            sink: Приемник результатов с методами write(index, frame, detections) и close()
+            progress_callback (callable, optional): Вызывается как callback(обработано, всего, fps)
+            start_frame (int): Номер кадра, с которого начинать (для продолжения обработки)
+
+        Returns:
+            dict: Статистика обработки {"frames": ..., "elapsed": ..., "fps": ..., "inferred": ...}
+        """
+        self.stats = {"frames": 0, "elapsed": 0.0, "fps": 0.0, "inferred": 0}
+        self._stop_event.clear()
+        self._errors = []
+        self._inferred = 0
+        self._frame_index = start_frame
+        self._current_stride = self.stride
+        sampled = self.stride > 1 or self.adaptive_stride
+        self.tracker = IoUTracker() if sampled else None
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            sink.close()
+            raise IOError(f"Не удалось открыть видео: {video_path}")
+
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if start_frame > 0:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+
+        decode_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+
+        if sampled:
+            # Кадры без инференса не декодируются, если приемнику нужны только боксы
+            keep_frames = getattr(sink, "needs_frames", True)
+            decoder = threading.Thread(
+                target=self._sampled_decode_loop,
+                args=(cap, decode_queue, keep_frames, start_frame, total_frames),
+            )
+        else:
+            decoder = threading.Thread(target=self._decode_loop, args=(cap, decode_queue))
+        writer = threading.Thread(
+            target=self._write_loop, args=(sink, write_queue, start_frame, total_frames, progress_callback)
+        )
+        decoder.daemon = True
+        writer.daemon = True
+
+        self._start_time = time.perf_counter()
+        decoder.start()
+        writer.start()
+
+        try:
+            # Стадия инференса работает в вызывающем потоке
+            while True:
+                batch = self._get(decode_queue)
+                if batch is _SENTINEL:
+                    break
+                if sampled:
+                    batch, detections = self._infer_sampled(batch)
+                else:
+                    detections = self.detector.infer_batch(batch, self.class_names, conf=self.conf)
+                    self._inferred += len(batch)
+                if not self._put(write_queue, (batch, detections)):
+                    break
+        except BaseException:
+            self._stop_event.set()
+            raise
+        finally:
+            self._put(write_queue, _SENTINEL)
+            decoder.join()
+            writer.join()
+            cap.release()
+            sink.close()
+
+        if self._errors:
+            raise self._errors[0]
+
+        return self.stats
+
+    @property
+    def stopped(self):
+        """True, если обработка была прервана вызовом stop()."""
+        return self._stop_event.is_set()
+
+    def stop(self):
+        """Прерывает обработку: все стадии завершаются при ближайшей проверке."""
+        self._stop_event.set()
+
+    def _put(self, q, item):
+        """Кладёт элемент в очередь, не зависая навсегда при остановке конвейера."""
+        while not self._stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """Забирает элемент из очереди или возвращает маркер конца при остановке конвейера."""
+        while not self._stop_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _SENTINEL
+
+    def _decode_loop(self, cap, decode_queue):
+        """Стадия декодирования: читает кадры и собирает их в батчи."""
+        try:
+            batch = []
+            while cap.isOpened() and not self._stop_event.is_set():
+                with profiler.span("decode"):
+                    ret, frame = cap.read()
+                if not ret:
+                    break
+                batch.append(frame)
+                if len(batch) == self.batch_size:
+                    if not self._put(decode_queue, batch):
+                        return
+                    batch = []
+            if batch:
+                self._put(decode_queue, batch)
+        except Exception as e:
+            self._errors.append(e)
+            self._stop_event.set()
+        finally:
+            self._put(decode_queue, _SENTINEL)
+
+    def _sampled_decode_loop(self, cap, decode_queue, keep_frames, start_frame, total_frames):
+        """
+        Стадия декодирования при выборке кадров.
+
+        Собирает записи (кадр, ключевой ли кадр); в батче batch_size ключевых кадров.
+        Если приемнику кадры не нужны, промежуточные кадры пропускаются через grab()
+        (без преобразования в BGR), а при большом шаге - перемоткой CAP_PROP_POS_FRAMES.
+        """
+        try:
+            entries = []
+            keys = 0
+            offset = 0
+            next_key = 0
+            while cap.isOpened() and not self._stop_event.is_set():
+                if offset >= next_key:
+                    with profiler.span("decode"):
+                        ret, frame = cap.read()
+                    if not ret:
+                        break
+                    entries.append((frame, True))
+                    keys += 1
+                    next_key = offset + self._current_stride
+                    offset += 1
+                elif keep_frames:
+                    ret, frame = cap.read()
+                    if not ret:
+                        break
+                    entries.append((frame, False))
+                    offset += 1
+                elif next_key - offset >= self.seek_stride and total_frames > 0:
+                    target = min(next_key, total_frames - start_frame)
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame + target)
+                    entries.extend((None, False) for _ in range(target - offset))
+                    offset = target
+                    if offset >= total_frames - start_frame:
+                        break
+                else:
+                    if not cap.grab():
+                        break
+                    entries.append((None, False))
+                    offset += 1
+
+                # Кадры держим в памяти не больше нескольких батчей
+                if keys == self.batch_size or (keep_frames and len(entries) >= 4 * self.batch_size):
+                    if not self._put(decode_queue, entries):
+                        return
+                    entries = []
+                    keys = 0
+            if entries:
+                self._put(decode_queue, entries)
+        except Exception as e:
+            self._errors.append(e)
+            self._stop_event.set()
+        finally:
+            self._put(decode_queue, _SENTINEL)
+
+    def _infer_sampled(self, entries):
+        """
+        Запускает модель только на ключевых кадрах, боксы остальных кадров предсказывает трекер.
+
+        Returns:
+            tuple: (кадры, боксы для каждого кадра)
+        """
+        keyframes = [frame for frame, is_key in entries if is_key]
+        key_detections = iter(
+            self.detector.infer_batch(keyframes, self.class_names, conf=self.conf) if keyframes else []
+        )
+        self._inferred += len(keyframes)
+
+        frames = []
+        detections = []
+        for frame, is_key in entries:
+            if is_key:
+                frame_detections = next(key_detections)
+                self.tracker.update(frame_detections, self._frame_index)
+            else:
+                frame_detections = self.tracker.predict(self._frame_index)
+            frames.append(frame)
+            detections.append(frame_detections)
+            self._frame_index += 1
+
+        if self.adaptive_stride:
+            # Чем быстрее движутся объекты, тем чаще запускаем детектор
+            motion = self.tracker.motion()
+            if motion > 0:
+                stride = int(self.motion_tolerance / motion)
+            else:
+                stride = self.max_stride
+            self._current_stride = min(self.max_stride, max(1, stride))
+        return frames, detections
+
+    def _write_loop(self, sink, write_queue, start_frame, total_frames, progress_callback):
+        """Стадия записи: передает кадры в приемник в исходном порядке."""
+        try:
+            frame_count = 0
+            while True:
+                item = self._get(write_queue)
+                if item is _SENTINEL:
+                    break
+                frames, detections = item
+                for frame, frame_detections in zip(frames, detections):
+                    with profiler.span("write"):
+                        sink.write(start_frame + frame_count, frame, frame_detections)
+                    frame_count += 1
+
+                    elapsed = time.perf_counter() - self._start_time
+                    self.stats = {
+                        "frames": frame_count,
+                        "elapsed": elapsed,
+                        "fps": frame_count / elapsed if elapsed > 0 else 0.0,
+                        "inferred": self._inferred,
+                    }
+
+                    # Выводим прогресс
+                    done = start_frame + frame_count
+                    if self.verbose and frame_count % 10 == 0 and total_frames > 0:
+                        progress = (done / total_frames) * 100
+                        print(f"Обработано {done}/{total_frames} кадров ({progress:.1f}%), "
+                              f"{self.stats['fps']:.1f} кадр/с")
+                    if progress_callback:
+                        progress_callback(done, total_frames, self.stats["fps"])
+        except Exception as e:
+            self._errors.append(e)
+            self._stop_event.set()
+
+
+def probe_video(video_path):
+    """
+    Читает параметры видео.
+
+    Returns:
+        dict: {"fps": ..., "width": ..., "height": ..., "frames": ...}
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise IOError(f"Не удалось открыть видео: {video_path}")
+    info = {
+        "fps": cap.get(cv2.CAP_PROP_FPS),
+        "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+        "frames": int(cap.get(cv2.CAP_PROP_FRAME_COUNT)),
+    }
+    cap.release()
+    return info
+
+
+class AnnotatedVideoSink:
+    """Приемник, который рисует рамки на кадрах и кодирует их в видеофайл (mp4v)."""
+
+    needs_frames = True  # Приемнику нужны все декодированные кадры
+
+    def __init__(self, detector, output_path, video_info, class_names=None):
+        """
+        Args:
+            detector (HotDogDetector): Детектор, который рисует рамки
+            output_path (str): Путь к выходному видео
+            video_info (dict): Параметры видео из probe_video()
+            class_names (dict, optional): Словарь с названиями классов для подписей
+        """
+        self.detector = detector
+        self.output_path = output_path
+        self.video_info = video_info
+        self.class_names = class_names
+        self.frames_written = 0
+        self.detection_count = 0  # Всего найдено объектов
+        self.frames_with_detections = 0  # Кадров, на которых найден хотя бы один объект
+        self._out = self._open(output_path)
+
+    def _open(self, path):
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        size = (self.video_info["width"], self.video_info["height"])
+        return cv2.VideoWriter(path, fourcc, self.video_info["fps"], size)
+
+    def write(self, index, frame, detections):
+        self.detector.draw_detections(frame, detections, self.class_names)
+        self._out.write(frame)
+        self.frames_written += 1
+        if detections:
+            self.detection_count += len(detections)
+            self.frames_with_detections += 1
+
+    def close(self):
+        if self._out is not None:
+            self._out.release()
+            self._out = None
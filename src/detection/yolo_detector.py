@@ -1,136 +1,374 @@
 import cv2
-from ultralytics import YOLO
 import numpy as np
 import os
-import sys
-
-# Добавляем пути импорта
-current_dir = os.path.dirname(os.path.abspath(__file__))
-src_dir = os.path.dirname(current_dir)
-sys.path.insert(0, src_dir)
+import threading
+import time
 
 # Импорты модулей приложения
-from src.config import CLASSES
+from src.config import CLASSES, VIDEO_SETTINGS, INFERENCE_SETTINGS
+from src.detection.video_pipeline import VideoPipeline, AnnotatedVideoSink, probe_video
+from src.detection.detection_log import create_detection_sink
+from src.detection.model_export import check_precision, export_model
+from src.detection.quantization import check_accuracy_gate
+from src.detection.input_size import LetterboxCache
+from src.utils.profiling import profiler
+
+# Расширения выходных файлов для режимов вывода видео
+OUTPUT_MODE_EXTENSIONS = {"jsonl": ".jsonl", "npz": ".npz", "parquet": ".parquet"}
+
+def prepare_weights(model_path, backend, precision=None, conf=0.5, check_accuracy=True):
+    """
+    Готовит веса для движка инференса: экспорт, квантизация и проверка точности.
+    
+    Результаты кэшируются на диске, поэтому пакетная обработка вызывает эту функцию один раз
+    в главном процессе, а процессы-исполнители получают уже готовые веса и итоговую точность.
+    
+    Args:
+        model_path (str): Путь к весам YOLO
+        backend (str): Движок инференса: "torch", "onnx" или "openvino"
+        precision (str, optional): Точность весов (по умолчанию из INFERENCE_SETTINGS)
+        conf (float): Порог уверенности при проверке точности
+        check_accuracy (bool): Проверять квантизированный вариант на размеченных проверочных изображениях
+        
+    Returns:
+        tuple: (путь к весам для YOLO, точность) - точность становится "fp32", если вариант
+               не прошел проверку
+    
+    Raises:
+        FileNotFoundError: Для квантизированного варианта нет размеченных проверочных изображений
+    """
+    precision = precision or INFERENCE_SETTINGS["precision"]
+    check_precision(backend, precision)
+    if backend == "torch":
+        return model_path, precision
+    
+    if precision != "fp32" and check_accuracy:
+        # Квантизированная модель не должна молча терять хот-доги
+        gate = check_accuracy_gate(model_path, backend, precision, conf)
+        if not gate["passed"]:
+            print(f"Вариант модели {precision} не прошел проверку точности "
+                  f"(recall {gate['candidate_recall']:.3f} против {gate['reference_recall']:.3f} у fp32, "
+                  f"AP@0.5 {gate['candidate_map']:.3f} против {gate['reference_map']:.3f}), используется fp32")
+            precision = "fp32"
+    return export_model(model_path, backend, precision=precision), precision
+
 
 class HotDogDetector:
-    def __init__(self, model_path, conf=0.5):
-        self.model = YOLO(model_path)
+    def __init__(self, model_path, conf=0.5, device=None, precision=None, verbose=True, backend=None,
+                 check_accuracy=True):
+        """
+        Args:
+            model_path (str): Путь к весам YOLO
+            conf (float): Порог уверенности по умолчанию (свой порог можно передать в каждый вызов)
+            device (str, optional): Устройство инференса ("cpu", "cuda:0", ...). None - выбор ultralytics.
+            precision (str, optional): Точность весов: "fp32", "fp16" (torch на GPU, openvino)
+                                       или "int8" (onnx). По умолчанию из INFERENCE_SETTINGS.
+            verbose (bool): Выводить в консоль журнал ultralytics по каждому кадру
+            backend (str, optional): Движок инференса: "torch", "onnx" или "openvino"
+                                     (по умолчанию из INFERENCE_SETTINGS). Для ONNX Runtime и OpenVINO
+                                     веса один раз экспортируются в кэш.
+            check_accuracy (bool): Проверять квантизированный вариант на размеченных проверочных изображениях
+                                   и откатываться на fp32, если recall или AP@0.5 хот-догов падает
+                                   сильнее допуска
+        """
+        # ultralytics (и torch) загружаются только при создании детектора:
+        # импорт модуля остается быстрым для CLI и процессов без модели
+        from ultralytics import YOLO
+        
+        self.backend = backend or INFERENCE_SETTINGS["backend"]
+        weights, precision = prepare_weights(model_path, self.backend, precision, conf, check_accuracy)
+        
+        self.model = YOLO(weights, task="detect")
+        self.model_path = model_path
         self.conf = conf
+        self.device = device
+        self.precision = precision
+        self.verbose = verbose
+        self.imgsz = None  # Размер входа модели (None - размер по умолчанию, 640)
+        self.letterbox = LetterboxCache()  # Буферы уменьшения кадров экрана (используются под self.lock)
         self.classes = CLASSES  # Используем классы из config
+        self.lock = threading.Lock()  # Модель YOLO не потокобезопасна
+        self._call_timing = threading.local()  # Время последнего вызова модели в каждом потоке
+        self.last_video_stats = None  # Статистика последней обработки видео
 
-    def detect_on_video(self, video_path, output_path=None, class_names=None):
+    def detect_on_video(self, video_path, output_path=None, class_names=None, batch_size=None,
+                        progress_callback=None, output_mode=None, stride=None, adaptive_stride=None, conf=None):
         """
         Детектирует хот-доги на видео.
         
+        Декодирование, инференс и запись выполняются конвейером VideoPipeline:
+        модель получает сразу batch_size кадров за один прямой проход.
+        
         Args:
             video_path (str): Путь к видеофайлу
             output_path (str, optional): Путь для сохранения обработанного видео
             class_names (dict, optional): Словарь с названиями классов (переопределяет self.classes)
+            batch_size (int, optional): Размер батча (по умолчанию из VIDEO_SETTINGS).
+                                        При batch_size=1 модель вызывается покадрово, как раньше.
+            progress_callback (callable, optional): Вызывается как callback(обработано, всего, fps)
+            output_mode (str, optional): "video" - размеченное видео; "jsonl", "npz" или "parquet" -
+                                         только журнал детекций без рисования и кодирования кадров
+                                         (по умолчанию из VIDEO_SETTINGS)
+            stride (int, optional): Запускать модель на каждом stride-м кадре, боксы между
+                                    ними предсказывает трекер (по умолчанию из VIDEO_SETTINGS)
+            adaptive_stride (bool, optional): Подбирать шаг по скорости движения объектов
+            conf (float, optional): Порог уверенности (по умолчанию self.conf)
         """
         # Используем self.classes по умолчанию, если не переданы class_names
         if class_names is None and hasattr(self, 'classes'):
             class_names = self.classes
-            
-        cap = cv2.VideoCapture(video_path)
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        if batch_size is None:
+            batch_size = VIDEO_SETTINGS["batch_size"]
+        if output_mode is None:
+            output_mode = VIDEO_SETTINGS["output_mode"]
+        if stride is None:
+            stride = VIDEO_SETTINGS["stride"]
+        if adaptive_stride is None:
+            adaptive_stride = VIDEO_SETTINGS["adaptive_stride"]
+        if output_mode != "video" and output_mode not in OUTPUT_MODE_EXTENSIONS:
+            raise ValueError(f"Неизвестный режим вывода: {output_mode}")
         
         # Создаем имя выходного файла, если не передано
         if output_path is None:
             base_name = os.path.basename(video_path)
             name, ext = os.path.splitext(base_name)
-            output_path = os.path.join(os.path.dirname(video_path), f"{name}_detected{ext}")
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        out = cv2.VideoWriter(output_path, fourcc, fps, (w, h))
+            if output_mode == "video":
+                output_path = os.path.join(os.path.dirname(video_path), f"{name}_detected{ext}")
+            else:
+                output_path = os.path.join(os.path.dirname(video_path),
+                                           f"{name}_detections{OUTPUT_MODE_EXTENSIONS[output_mode]}")
         
         print(f"Обработка видео, результат будет сохранен в: {output_path}")
         
-        frame_count = 0
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        pipeline = VideoPipeline(
+            self,
+            batch_size=batch_size,
+            queue_size=VIDEO_SETTINGS["queue_size"],
+            class_names=class_names,
+            stride=stride,
+            adaptive_stride=adaptive_stride,
+            max_stride=VIDEO_SETTINGS["max_stride"],
+            motion_tolerance=VIDEO_SETTINGS["motion_tolerance"],
+            seek_stride=VIDEO_SETTINGS["seek_stride"],
+            conf=conf,
+        )
+        video_info = probe_video(video_path)
+        if output_mode == "video":
+            sink = AnnotatedVideoSink(self, output_path, video_info, class_names)
+        else:
+            sink = create_detection_sink(output_mode, output_path, video_info, video_path)
+        self.last_video_stats = pipeline.run(video_path, sink, progress_callback)
+        
+        print(f"Обработка завершена. Результат сохранен в: {output_path}")
+        print(f"Кадров: {self.last_video_stats['frames']}, "
+              f"средняя скорость: {self.last_video_stats['fps']:.1f} кадр/с, "
+              f"кадров с инференсом: {self.last_video_stats['inferred']}")
+        return output_path
+
+    def infer_batch(self, images, class_names=None, imgsz=None, conf=None):
+        """
+        Запускает модель на нескольких кадрах за один прямой проход.
         
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                break
-                
-            # Запускаем детекцию
-            results = self.model(frame, conf=self.conf)
+        Args:
+            images (list): Список изображений (BGR)
+            class_names (dict, optional): Классы, которые нужно оставить. Пустой словарь - все классы.
+            imgsz (int, optional): Размер входа модели (по умолчанию self.imgsz)
+            conf (float, optional): Порог уверенности (по умолчанию self.conf)
             
+        Returns:
+            list: Для каждого кадра список боксов [(класс, x1, y1, x2, y2, conf), ...]
+        """
+        args = self._predict_args(class_names, conf)
+        if imgsz:
+            args["imgsz"] = imgsz
+        with self.lock:
+            start = time.perf_counter()
+            results = self.model(images, **args)
+            self._profile_model_call(start, results)
+            self._call_timing.ms = (time.perf_counter() - start) * 1000
+        with profiler.span("postprocess"):
+            return [self._extract_detections(r, class_names) for r in results]
+    
+    @property
+    def last_inference_ms(self):
+        """
+        Время последнего вызова модели из текущего потока в мс или None.
+        
+        Считается под блокировкой детектора, поэтому не включает ожидание, пока модель
+        занята другим потоком (другим монитором, вторым потоком детекции).
+        """
+        return getattr(self._call_timing, "ms", None)
+    
+    def _profile_model_call(self, start, results):
+        """
+        Записывает вызов модели в профайлер тремя этапами по замерам ultralytics
+        (Results.speed - мс на изображение): подготовка тензора, прямой проход и NMS.
+        """
+        if not profiler.enabled or not results:
+            return
+        speed = results[0].speed
+        for stage in ("preprocess", "inference", "postprocess"):
+            end = start + (speed.get(stage) or 0.0) * len(results) / 1000
+            profiler.record(stage, start, end)
+            start = end
+
+    def _predict_args(self, class_names=None, conf=None):
+        """
+        Аргументы вызова модели: порог уверенности, устройство, точность, размер входа и классы.
+        
+        Фильтр классов передается в саму модель (classes=), поэтому NMS и постобработка
+        выполняются только для нужных классов, а не для всех 80 классов COCO.
+        Порог уверенности передается в каждый вызов: детектор из реестра общий, и порог
+        одного владельца не должен меняться для остальных.
+        """
+        args = {"conf": self.conf if conf is None else conf, "verbose": self.verbose}
+        if self.precision == "fp16" and self.backend == "torch":
+            args["half"] = True
+        if self.imgsz:
+            args["imgsz"] = self.imgsz
+        if class_names:
+            args["classes"] = sorted(class_names)
+        if self.device is not None:
+            args["device"] = self.device
+        return args
+
+    def infer_resized(self, image, imgsz, class_names=None, conf=None):
+        """
+        Запускает модель на кадре, предварительно уменьшенном в переиспользуемый буфер.
+        
+        В отличие от передачи кадра как есть, ultralytics не масштабирует 1080p/4K кадр сам
+        и не выделяет под это память на каждом вызове. Боксы возвращаются в координатах исходного кадра.
+        
+        Args:
+            image (numpy.ndarray): Кадр (BGR)
+            imgsz (int): Длинная сторона входа модели
+            class_names (dict, optional): Классы, которые нужно оставить
+            conf (float, optional): Порог уверенности (по умолчанию self.conf)
+            
+        Returns:
+            list: Боксы [(класс, x1, y1, x2, y2, conf), ...]
+        """
+        args = self._predict_args(class_names, conf)
+        args["imgsz"] = imgsz
+        with self.lock:
+            locked_at = time.perf_counter()
+            # Буфер общий для всех вызовов, поэтому заполняем его под той же блокировкой, что и модель
+            with profiler.span("preprocess"):
+                resized, scale = self.letterbox.resize(image, imgsz)
+            start = time.perf_counter()
+            results = self.model(resized, **args)
+            self._profile_model_call(start, results)
+            self._call_timing.ms = (time.perf_counter() - locked_at) * 1000
+        detections = []
+        with profiler.span("postprocess"):
             for r in results:
-                boxes = r.boxes
-                for box in boxes:
-                    cls = int(box.cls[0])
-                    
-                    # Если мы хотим отображать только хот-доги и текущий класс не хот-дог, пропускаем
-                    if class_names and cls not in class_names:
-                        continue
-                        
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    conf = float(box.conf[0])
-                    
-                    # Рамка зелёного цвета
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    
-                    # Название объекта и уверенность
-                    label = f"{class_names.get(cls, str(cls))} {conf:.2f}"
-                    cv2.putText(frame, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
+                detections.extend(self._extract_detections(r, class_names, scale, image.shape))
+        return detections
+
+    def _extract_detections(self, result, class_names=None, scale=(1.0, 1.0), frame_shape=None):
+        """
+        Преобразует результат YOLO в список боксов [(класс, x1, y1, x2, y2, conf), ...].
+        
+        scale - (по x, по y), во сколько раз кадр был уменьшен перед инференсом: координаты делятся
+        на него и обрезаются по размеру исходного кадра frame_shape (боксы могут заходить на поля буфера).
+        """
+        # Одно копирование всего тензора результатов вместо обращений к каждому боксу.
+        # Столбцы: x1, y1, x2, y2, [track_id], conf, cls
+        data = result.boxes.cpu().numpy().data
+        if len(data) == 0:
+            return []
+        
+        cls = data[:, -1].astype(int)
+        
+        # Если мы хотим отображать только хот-доги, отбрасываем остальные классы
+        if class_names:
+            keep = (cls[:, None] == np.array(list(class_names))).any(axis=1)
+            data = data[keep]
+            cls = cls[keep]
+        
+        # astype(int) отбрасывает дробную часть так же, как int() для отдельного бокса
+        xyxy = data[:, :4]
+        if scale != (1.0, 1.0):
+            xyxy = xyxy / [scale[0], scale[1], scale[0], scale[1]]
+        if frame_shape is not None:
+            xyxy = np.clip(xyxy, 0, [frame_shape[1], frame_shape[0], frame_shape[1], frame_shape[0]])
+        xyxy = xyxy.astype(int)
+        conf = data[:, -2]
+        return list(zip(cls.tolist(), *xyxy.T.tolist(), conf.tolist()))
+
+    def draw_detections(self, image, detections, class_names=None):
+        """
+        Рисует рамки и подписи на изображении (на месте).
+        
+        Args:
+            image (numpy.ndarray): Изображение (BGR), на котором рисуем
+            detections (list): Боксы в формате [(класс, x1, y1, x2, y2, conf), ...]
+            class_names (dict, optional): Словарь с названиями классов для подписей
+        """
+        if class_names is None:
+            class_names = self.classes
+        for cls, x1, y1, x2, y2, conf in detections:
+            # Рамка зелёного цвета
+            cv2.rectangle(image, (x1, y1), (x2, y2), (0, 255, 0), 2)
             
-            # Записываем результат в выходной файл
-            out.write(frame)
+            # Название объекта и уверенность
+            label = f"{class_names.get(cls, str(cls))} {conf:.2f}"
+            cv2.putText(image, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
+        return image
+        
+    def detect(self, image, imgsz=None, class_names=None, conf=None):
+        """
+        Детектирует хот-доги на одном изображении и возвращает только боксы.
+        
+        В отличие от detect_on_image, не копирует кадр и ничего не рисует: для оверлея
+        нужны только координаты. Размеченное изображение можно получить потом через
+        draw_detections, если оно действительно нужно (сохранение скриншота, видео).
+        
+        Args:
+            image (numpy.ndarray): Входное изображение (BGR)
+            imgsz (int, optional): Размер входа модели. Если задан, кадр уменьшается
+                                   в переиспользуемый буфер (см. infer_resized).
+            class_names (dict, optional): Классы, которые нужно оставить (по умолчанию self.classes)
+            conf (float, optional): Порог уверенности (по умолчанию self.conf)
             
-            # Выводим прогресс
-            frame_count += 1
-            if frame_count % 10 == 0:
-                progress = (frame_count / total_frames) * 100
-                print(f"Обработано {frame_count}/{total_frames} кадров ({progress:.1f}%)")
-                
-        cap.release()
-        out.release()
+        Returns:
+            list: Список найденных боксов в формате [(класс, x1, y1, x2, y2, conf), ...]
+        """
+        if class_names is None:
+            class_names = self.classes
+        if imgsz:
+            return self.infer_resized(image, imgsz, class_names, conf)
         
-        print(f"Обработка завершена. Результат сохранен в: {output_path}")
-        return output_path
+        with self.lock:
+            start = time.perf_counter()
+            results = self.model(image, **self._predict_args(class_names, conf))
+            self._profile_model_call(start, results)
+            self._call_timing.ms = (time.perf_counter() - start) * 1000
         
-    def detect_on_image(self, image):
+        detected_objects = []
+        with profiler.span("postprocess"):
+            for r in results:
+                detected_objects.extend(self._extract_detections(r, class_names))
+        return detected_objects
+    
+    def detect_on_image(self, image, imgsz=None, conf=None):
         """
-        Детектирует хот-доги на одном изображении.
+        Детектирует хот-доги на одном изображении и рисует их на копии.
         
         Args:
             image (numpy.ndarray): Входное изображение (BGR)
+            imgsz (int, optional): Размер входа модели. Если задан, кадр уменьшается
+                                   в переиспользуемый буфер (см. infer_resized).
+            conf (float, optional): Порог уверенности (по умолчанию self.conf)
             
         Returns:
             numpy.ndarray: Изображение с отмеченными хот-догами
             list: Список найденных боксов в формате [(класс, x1, y1, x2, y2, conf), ...]
         """
-        # Создаем копию изображения для рисования
-        result_image = image.copy()
+        detected_objects = self.detect(image, imgsz, conf=conf)
         
-        # Запускаем детекцию
-        results = self.model(image, conf=self.conf)
-        
-        detected_objects = []
+        # Рамки зелёного цвета с названием объекта и уверенностью - на копии изображения
+        with profiler.span("draw"):
+            result_image = self.draw_detections(image.copy(), detected_objects)
         
-        for r in results:
-            boxes = r.boxes
-            for box in boxes:
-                cls = int(box.cls[0])
-                
-                # Если это не хот-дог, пропускаем
-                if cls not in self.classes:
-                    continue
-                    
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                conf = float(box.conf[0])
-                
-                # Добавляем в список детекций
-                detected_objects.append((cls, x1, y1, x2, y2, conf))
-                
-                # Рамка зелёного цвета
-                cv2.rectangle(result_image, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                
-                # Название объекта и уверенность
-                label = f"{self.classes.get(cls, str(cls))} {conf:.2f}"
-                cv2.putText(result_image, label, (x1, y1-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
-        
-        return result_image, detected_objects 
\ No newline at end of file
+        return result_image, detected_objects
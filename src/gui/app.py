@@ -1,23 +1,25 @@
 import sys
 import os
 import json
+from functools import partial
 from PyQt5.QtWidgets import (
     QApplication, QMainWindow, QPushButton, QLabel, QFileDialog, QVBoxLayout, QWidget, QComboBox, QHBoxLayout,
-    QTabWidget, QGroupBox, QSlider, QCheckBox, QMessageBox, QColorDialog
+    QTabWidget, QGroupBox, QSlider, QCheckBox, QMessageBox, QColorDialog, QProgressBar
 )
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtGui import QColor
 
-# Добавляем пути импорта
-current_dir = os.path.dirname(os.path.abspath(__file__))
-src_dir = os.path.dirname(current_dir)
-sys.path.insert(0, src_dir)
-
 # Импорты модулей приложения
-from src.detection.yolo_detector import HotDogDetector
+from src.detection.registry import model_registry
+from src.detection.video_job import VideoDetectionJob
+from src.gui.workers import VideoDetectionWorker, BatchDetectionWorker
+from src.gui.region_selector import RegionSelector
+from src.utils.multi_screen import MultiScreenCapture, list_monitors
+from src.utils.alert_sound import shared_alert_sound
+from src.utils.overlay import DetectionOverlay, OverlayChannel, screen_for_monitor
 from src.utils.screen_capture import ScreenCapture
-from src.utils.overlay import DetectionOverlay
-from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD, OVERLAY_SETTINGS, SOUND_SETTINGS
+from src.utils.window_tracking import WindowTracker, list_windows, monitor_for_region
+from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD, OVERLAY_SETTINGS, SOUND_SETTINGS, CAPTURE_SETTINGS
 
 LANG_DIR = os.path.join(os.path.dirname(__file__), 'lang')
 
@@ -41,14 +43,24 @@ class MainWindow(QMainWindow):
         super().__init__()
         self.translator = Translator('ru')
         self.video_path = None
-        self.detector = HotDogDetector(MODEL_PATH, conf=CONFIDENCE_THRESHOLD)
+        self.video_worker = None  # Фоновая обработка видео
+        self.batch_worker = None  # Фоновая пакетная обработка папки
+        self.detector = model_registry.acquire(MODEL_PATH)  # Общий детектор из реестра
+        self.conf = CONFIDENCE_THRESHOLD  # Порог уверенности окна (у общего детектора не меняется)
         self.screen_capturer = None  # Будет создан при необходимости
-        self.overlay = None  # Оверлей для обнаружения
+        self.overlays = {}  # Оверлеи по номерам мониторов
+        self.overlay_channels = {}  # Доставка детекций каждого монитора из потока детекции в GUI-поток
+        self.capture_region = None  # Выделенная мышью область (left, top, width, height) в пикселях экрана
+        self.region_selector = None
         
         # Копируем настройки оверлея, чтобы не изменять глобальные
         self.overlay_settings = OVERLAY_SETTINGS.copy()
         self.sound_settings = SOUND_SETTINGS.copy()
         
+        # Звук уведомления декодируется заранее, пока открыто главное окно
+        if os.path.exists(SOUND_SETTINGS["sound_file"]):
+            shared_alert_sound(SOUND_SETTINGS["sound_file"])
+        
         self.init_ui()
 
     def init_ui(self):
@@ -93,10 +105,23 @@ class MainWindow(QMainWindow):
         self.detect_btn.setEnabled(False)
         self.detect_btn.clicked.connect(self.start_detection)
         
+        # Пакетная обработка всех видео в папке
+        self.batch_btn = QPushButton(self.translator.t('process_folder'))
+        self.batch_btn.clicked.connect(self.start_batch_detection)
+        
+        # Прогресс обработки видео
+        self.video_progress = QProgressBar()
+        self.video_progress.setVisible(False)
+        self.video_progress_label = QLabel("")
+        self.video_progress_label.setAlignment(Qt.AlignCenter)
+        
         # Добавляем виджеты на вкладку
         layout.addWidget(self.video_label)
         layout.addWidget(self.open_btn)
         layout.addWidget(self.detect_btn)
+        layout.addWidget(self.batch_btn)
+        layout.addWidget(self.video_progress)
+        layout.addWidget(self.video_progress_label)
         
         self.video_tab.setLayout(layout)
     
@@ -129,6 +154,20 @@ class MainWindow(QMainWindow):
         self.use_sound_checkbox.setChecked(self.sound_settings["enabled"])
         overlay_layout.addWidget(self.use_sound_checkbox)
         
+        # Что захватывать: все мониторы, выделенную область или окно приложения
+        target_layout = QHBoxLayout()
+        self.capture_target_label = QLabel(self.translator.t('capture_target'))
+        target_layout.addWidget(self.capture_target_label)
+        self.capture_target_combo = QComboBox()
+        target_layout.addWidget(self.capture_target_combo, 1)
+        self.select_region_btn = QPushButton(self.translator.t('select_region'))
+        self.select_region_btn.clicked.connect(self.select_capture_region)
+        target_layout.addWidget(self.select_region_btn)
+        self.refresh_windows_btn = QPushButton(self.translator.t('refresh_windows'))
+        self.refresh_windows_btn.clicked.connect(self.refresh_capture_targets)
+        target_layout.addWidget(self.refresh_windows_btn)
+        self.refresh_capture_targets()
+        
         # Кнопки запуска и остановки захвата экрана
         self.start_screen_btn = QPushButton(self.translator.t('start_screen_capture'))
         self.start_screen_btn.clicked.connect(self.start_screen_capture)
@@ -140,6 +179,7 @@ class MainWindow(QMainWindow):
         # Добавляем виджеты в группу
         screen_layout.addLayout(fps_layout)
         screen_layout.addLayout(overlay_layout)
+        screen_layout.addLayout(target_layout)
         screen_layout.addWidget(self.start_screen_btn)
         screen_layout.addWidget(self.stop_screen_btn)
         
@@ -243,30 +283,33 @@ class MainWindow(QMainWindow):
             # Обновляем настройки оверлея
             self.overlay_settings["frame_color"] = (color.red(), color.green(), color.blue())
             
-            # Если оверлей активен, обновляем его настройки
-            if self.overlay:
+            # Если оверлеи активны, обновляем их настройки
+            if self.overlays:
                 OVERLAY_SETTINGS["frame_color"] = self.overlay_settings["frame_color"]
-                self.overlay.update()  # Обновляем отображение
+                for overlay in self.overlays.values():
+                    overlay.update()  # Обновляем отображение
 
     def change_hide_timeout(self, value):
         """Изменяет время автоскрытия рамок"""
         self.overlay_settings["hide_timeout"] = value
         self.hide_label.setText(f"{value / 1000:.1f} {self.translator.t('seconds')}")
         
-        # Обновляем глобальные настройки, если оверлей активен
-        if self.overlay:
+        # Обновляем глобальные настройки, если оверлеи активны
+        if self.overlays:
             OVERLAY_SETTINGS["hide_timeout"] = value
-            self.overlay.hide_timeout = value
+            for overlay in self.overlays.values():
+                overlay.hide_timeout = value
     
     def change_sound_interval(self, value):
         """Изменяет минимальный интервал между звуковыми уведомлениями"""
         self.sound_settings["min_interval"] = value
         self.sound_label.setText(f"{value / 1000:.1f} {self.translator.t('seconds')}")
         
-        # Обновляем глобальные настройки, если оверлей активен
-        if self.overlay:
+        # Обновляем глобальные настройки, если оверлеи активны
+        if self.overlays:
             SOUND_SETTINGS["min_interval"] = value
-            self.overlay.min_sound_interval = value
+            for overlay in self.overlays.values():
+                overlay.min_sound_interval = value
 
     def open_video(self):
         file_name, _ = QFileDialog.getOpenFileName(
@@ -291,10 +334,11 @@ class MainWindow(QMainWindow):
     def change_confidence(self):
         value = self.conf_slider.value() / 100
         self.conf_label.setText(f"{value:.2f}")
-        # Обновляем порог уверенности в детекторе
-        self.detector.conf = value
-        if self.screen_capturer:
-            self.screen_capturer.detector.conf = value
+        # Детектор общий для всех владельцев из реестра, поэтому порог хранит окно
+        # и передает его в запущенный захват экрана и в новые обработки видео
+        self.conf = value
+        if self.screen_capturer is not None:
+            self.screen_capturer.conf = value
 
     def update_ui_texts(self):
         # Обновляем заголовок окна
@@ -311,12 +355,20 @@ class MainWindow(QMainWindow):
         else:
             self.video_label.setText(self.translator.t('no_video_selected'))
         self.open_btn.setText(self.translator.t('open_video'))
-        self.detect_btn.setText(self.translator.t('start_detection'))
+        self.batch_btn.setText(self.translator.t('stop_batch' if self.batch_worker else 'process_folder'))
+        if self.video_worker:
+            self.detect_btn.setText(self.translator.t('stop_detection'))
+        else:
+            self.detect_btn.setText(self.translator.t('start_detection'))
         
         # Обновляем тексты на вкладке захвата экрана
         self.screen_group.setTitle(self.translator.t('screen_capture_settings'))
         self.use_overlay_checkbox.setText(self.translator.t('use_overlay'))
         self.use_sound_checkbox.setText(self.translator.t('use_sound'))
+        self.capture_target_label.setText(self.translator.t('capture_target'))
+        self.select_region_btn.setText(self.translator.t('select_region'))
+        self.refresh_windows_btn.setText(self.translator.t('refresh_windows'))
+        self.refresh_capture_targets()
         self.start_screen_btn.setText(self.translator.t('start_screen_capture'))
         self.stop_screen_btn.setText(self.translator.t('stop_screen_capture'))
         
@@ -331,34 +383,200 @@ class MainWindow(QMainWindow):
         self.sound_label.setText(f"{self.sound_settings['min_interval'] / 1000:.1f} {self.translator.t('seconds')}")
 
     def start_detection(self):
-        if self.video_path:
-            self.video_label.setText(self.translator.t('detection_in_progress'))
-            # Отключаем кнопку, чтобы избежать повторного нажатия
+        # Повторное нажатие во время обработки останавливает ее
+        if self.video_worker:
             self.detect_btn.setEnabled(False)
-            # Запускаем детекцию
-            try:
-                output_path = self.detector.detect_on_video(self.video_path)
-                QMessageBox.information(
+            self.video_worker.cancel()
+            return
+        
+        if self.video_path:
+            job = VideoDetectionJob(self.detector, self.video_path, conf=self.conf)
+            
+            # Предлагаем продолжить прерванную обработку
+            resume_frame = job.resume_frame()
+            if resume_frame > 0:
+                checkpoint = job.load_checkpoint()
+                answer = QMessageBox.question(
                     self,
                     self.translator.t('info'),
-                    f"{self.translator.t('detection_complete')}\n{self.translator.t('saved_to')}: {output_path}"
-                )
-            except Exception as e:
-                QMessageBox.critical(
-                    self,
-                    self.translator.t('error'),
-                    f"{self.translator.t('detection_error')}: {str(e)}"
+                    self.translator.t('resume_detection').format(frame=resume_frame, total=checkpoint["total_frames"]),
+                    QMessageBox.Yes | QMessageBox.No,
+                    QMessageBox.Yes
                 )
-            # После завершения детекции возвращаем исходное состояние кнопки
-            self.detect_btn.setEnabled(True)
+                if answer == QMessageBox.No:
+                    job.discard_checkpoint()
+            
+            self.video_label.setText(self.translator.t('detection_in_progress'))
+            self.open_btn.setEnabled(False)
+            self.detect_btn.setText(self.translator.t('stop_detection'))
+            self.video_progress.setValue(0)
+            self.video_progress.setVisible(True)
+            self.video_progress_label.setText("")
+            
+            # Запускаем детекцию в фоновом потоке
+            self.video_worker = VideoDetectionWorker(job, self)
+            self.video_worker.progress.connect(self.on_detection_progress)
+            self.video_worker.completed.connect(self.on_detection_completed)
+            self.video_worker.cancelled.connect(self.on_detection_cancelled)
+            self.video_worker.failed.connect(self.on_detection_failed)
+            self.video_worker.finished.connect(self.on_detection_finished)
+            self.video_worker.start()
+
+    def on_detection_progress(self, done, total, fps, eta):
+        """Обновляет прогресс обработки видео."""
+        if total > 0:
+            self.video_progress.setMaximum(total)
+            self.video_progress.setValue(min(done, total))
+        minutes, seconds = divmod(int(eta), 60)
+        self.video_progress_label.setText(
+            self.translator.t('detection_progress').format(
+                done=done, total=total, fps=fps, eta=f"{minutes:d}:{seconds:02d}"
+            )
+        )
+
+    def on_detection_completed(self, output_path):
+        QMessageBox.information(
+            self,
+            self.translator.t('info'),
+            f"{self.translator.t('detection_complete')}\n{self.translator.t('saved_to')}: {output_path}"
+        )
+
+    def on_detection_cancelled(self, frame):
+        self.video_progress_label.setText(self.translator.t('detection_cancelled').format(frame=frame))
+
+    def on_detection_failed(self, error):
+        QMessageBox.critical(
+            self,
+            self.translator.t('error'),
+            f"{self.translator.t('detection_error')}: {error}"
+        )
+
+    def on_detection_finished(self):
+        """Возвращает вкладку видео в исходное состояние после завершения фоновой обработки."""
+        self.video_worker = None
+        self.video_progress.setVisible(False)
+        self.open_btn.setEnabled(True)
+        self.detect_btn.setEnabled(True)
+        self.detect_btn.setText(self.translator.t('start_detection'))
+        if self.video_path:
             self.video_label.setText(os.path.basename(self.video_path))
 
-    def update_overlay(self, boxes):
+    def start_batch_detection(self):
+        """Обрабатывает все видео в выбранной папке пулом процессов."""
+        from src.batch import find_videos
+        
+        # Повторное нажатие во время обработки останавливает пакет
+        if self.batch_worker:
+            self.batch_btn.setEnabled(False)
+            self.batch_worker.cancel()
+            return
+        
+        folder = QFileDialog.getExistingDirectory(self, self.translator.t('select_folder'))
+        if not folder:
+            return
+        
+        videos = find_videos([folder])
+        if not videos:
+            QMessageBox.information(self, self.translator.t('info'), self.translator.t('no_videos_found'))
+            return
+        
+        self.batch_btn.setText(self.translator.t('stop_batch'))
+        self.detect_btn.setEnabled(False)
+        self.open_btn.setEnabled(False)
+        self.video_progress.setMaximum(len(videos))
+        self.video_progress.setValue(0)
+        self.video_progress.setVisible(True)
+        self.video_progress_label.setText(self.translator.t('detection_in_progress'))
+        
+        self.batch_worker = BatchDetectionWorker(
+            videos, os.path.join(folder, "batch_summary.json"), MODEL_PATH, self.conf, self
+        )
+        self.batch_worker.file_done.connect(self.on_batch_file_done)
+        self.batch_worker.completed.connect(self.on_batch_completed)
+        self.batch_worker.failed.connect(self.on_detection_failed)
+        self.batch_worker.finished.connect(self.on_batch_finished)
+        self.batch_worker.start()
+
+    def on_batch_file_done(self, name, done, total):
+        self.video_progress.setValue(done)
+        self.video_progress_label.setText(
+            self.translator.t('batch_progress').format(done=done, total=total, name=name)
+        )
+
+    def on_batch_completed(self, summaries, summary_path):
+        ok = sum(1 for s in summaries if s["status"] == "ok")
+        errors = sum(1 for s in summaries if s["status"] == "error")
+        message = 'batch_cancelled' if ok + errors < len(summaries) else 'batch_complete'
+        QMessageBox.information(
+            self,
+            self.translator.t('info'),
+            f"{self.translator.t(message).format(ok=ok, total=len(summaries), errors=errors)}"
+            f"\n{self.translator.t('saved_to')}: {summary_path}"
+        )
+
+    def on_batch_finished(self):
+        self.batch_worker = None
+        self.video_progress.setVisible(False)
+        self.batch_btn.setText(self.translator.t('process_folder'))
+        self.batch_btn.setEnabled(True)
+        self.open_btn.setEnabled(True)
+        self.detect_btn.setEnabled(self.video_path is not None)
+
+    def update_overlay(self, monitor_index, boxes, captured_at=None):
         """
-        Обновляет оверлей с обнаруженными объектами.
+        Обновляет оверлей монитора с обнаруженными объектами (в GUI-потоке, через OverlayChannel).
         """
-        if self.overlay and boxes is not None:
-            self.overlay.update_boxes(boxes)
+        overlay = self.overlays.get(monitor_index)
+        if overlay and boxes is not None:
+            overlay.update_boxes(boxes, captured_at)
+
+    def refresh_capture_targets(self):
+        """Заполняет список областей захвата: все мониторы, выделенная область и открытые окна."""
+        current = self.capture_target_combo.currentData()
+        self.capture_target_combo.clear()
+        self.capture_target_combo.addItem(self.translator.t('all_monitors'), "all")
+        if self.capture_region is not None:
+            left, top, width, height = self.capture_region
+            self.capture_target_combo.addItem(
+                self.translator.t('selected_region').format(left=left, top=top, width=width, height=height),
+                "region"
+            )
+        for title in list_windows():
+            if title != self.windowTitle():
+                self.capture_target_combo.addItem(self.translator.t('window_item').format(title=title), f"window:{title}")
+        # Сохраняем выбор, если он еще есть в списке
+        index = self.capture_target_combo.findData(current)
+        if index >= 0:
+            self.capture_target_combo.setCurrentIndex(index)
+
+    def select_capture_region(self):
+        """Прячет окно и открывает выделение области мышью на экране, где находится окно."""
+        screen = self.windowHandle().screen() if self.windowHandle() else None
+        self.region_selector = RegionSelector(screen)
+        self.region_selector.selected.connect(self.on_region_selected)
+        self.region_selector.cancelled.connect(self.show)
+        self.hide()
+        self.region_selector.show()
+        self.region_selector.activateWindow()
+
+    def on_region_selected(self, rect):
+        """
+        Переводит выделение из логических координат Qt в пиксели экрана и выбирает его для захвата.
+        """
+        screen = self.region_selector.target_screen
+        geometry = screen.geometry()
+        monitors = list_monitors("all")
+        monitor = next((m for m in monitors if screen_for_monitor(m) is screen), monitors[0])
+        scale = monitor["width"] / geometry.width()  # Физических пикселей на логический (DPI)
+        self.capture_region = (
+            monitor["left"] + int((rect.x() - geometry.x()) * scale),
+            monitor["top"] + int((rect.y() - geometry.y()) * scale),
+            int(rect.width() * scale),
+            int(rect.height() * scale),
+        )
+        self.refresh_capture_targets()
+        self.capture_target_combo.setCurrentIndex(self.capture_target_combo.findData("region"))
+        self.show()
 
     def start_screen_capture(self):
         try:
@@ -374,26 +592,70 @@ class MainWindow(QMainWindow):
             for key, value in self.sound_settings.items():
                 SOUND_SETTINGS[key] = value
             
-            # Создаем оверлей, если нужно
+            # Каждый монитор захватывается отдельно и получает свой оверлей;
+            # при захвате области или окна оверлей открывается только на его мониторе
+            target, _, title = (self.capture_target_combo.currentData() or "all").partition(":")
+            region = None
+            tracker = None
+            if target == "all":
+                monitors = list_monitors(CAPTURE_SETTINGS["monitors"])
+            else:
+                region = self.capture_region
+                if target == "window":
+                    tracker = WindowTracker(title)
+                    region = tracker.geometry()
+                    if region is None:
+                        raise RuntimeError(self.translator.t('window_not_found').format(title=title))
+                monitors = [monitor_for_region(region, list_monitors("all"))]
+                if tracker is not None:
+                    # Окно обрезается по своему монитору: за его пределами нет оверлея
+                    monitor = monitors[0]
+                    tracker.bounds = (monitor["left"], monitor["top"], monitor["width"], monitor["height"])
+                    region = None  # Область возьмет ScreenCapture из положения окна
+            overlay_callbacks = {}
             if use_overlay:
-                if not self.overlay:
-                    self.overlay = DetectionOverlay()
-                    self.overlay.closed.connect(self.stop_screen_capture)
-                
-                # Устанавливаем состояние звука
-                self.overlay.enable_sound(use_sound)
-                self.overlay.show()
+                for monitor in monitors:
+                    index = monitor["index"]
+                    overlay = DetectionOverlay(screen_for_monitor(monitor))
+                    # Рамки приходят в пикселях кадра монитора - оверлей переводит их с учетом DPI
+                    overlay.set_capture_size(monitor["width"], monitor["height"])
+                    overlay.closed.connect(self.stop_screen_capture)
+                    # Устанавливаем состояние звука
+                    overlay.enable_sound(use_sound)
+                    overlay.show()
+                    self.overlays[index] = overlay
+                    
+                    if index not in self.overlay_channels:
+                        # Детекции приходят из потока детекции - в виджет их передает очередь событий Qt
+                        self.overlay_channels[index] = OverlayChannel(partial(self.update_overlay, index), self)
+                    overlay_callbacks[index] = self.overlay_channels[index].publish
                 
                 # Скрываем главное окно
                 self.hide()
             
             # Создаем объект захвата экрана
             fps = self.fps_slider.value()
-            self.screen_capturer = ScreenCapture(
-                detection_enabled=True, 
-                overlay_callback=self.update_overlay if use_overlay else None
-            )
-            self.screen_capturer.detector.conf = self.detector.conf  # Установка того же порога уверенности
+            # Передаем уже загруженный детектор, чтобы не загружать модель повторно
+            if target == "all":
+                self.screen_capturer = MultiScreenCapture(
+                    monitors=monitors,
+                    detection_enabled=True,
+                    overlay_callbacks=overlay_callbacks,
+                    detector=self.detector,
+                    conf=self.conf
+                )
+            else:
+                # В детектор попадает только область или окно, рамки сдвигаются на ее положение на мониторе
+                monitor = monitors[0]
+                self.screen_capturer = ScreenCapture(
+                    region=region,
+                    detection_enabled=True,
+                    overlay_callback=overlay_callbacks.get(monitor["index"]),
+                    detector=self.detector,
+                    follow=tracker,
+                    conf=self.conf
+                )
+                self.screen_capturer.overlay_origin = (monitor["left"], monitor["top"])
             
             # Меняем состояние кнопок
             self.start_screen_btn.setEnabled(False)
@@ -432,13 +694,14 @@ class MainWindow(QMainWindow):
 
     def stop_screen_capture(self):
         if self.screen_capturer:
-            self.screen_capturer.stop_capture()
+            self.screen_capturer.close()
             self.screen_capturer = None
         
-        # Закрываем оверлей, если он открыт
-        if self.overlay:
-            self.overlay.close()
-            self.overlay = None
+        # Закрываем оверлеи, если они открыты (закрытие оверлея снова вызывает этот метод)
+        overlays, self.overlays = self.overlays, {}
+        for overlay in overlays.values():
+            overlay.close()
+        if overlays:
             # Показываем главное окно снова
             self.show()
         
@@ -449,6 +712,16 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         # При закрытии окна останавливаем захват экрана, если он был запущен
         self.stop_screen_capture()
+        
+        # Останавливаем обработку видео: прогресс сохранится в контрольной точке
+        if self.video_worker:
+            self.video_worker.cancel()
+            self.video_worker.wait()
+        if self.batch_worker:
+            # Не ждем весь пакет: текущие видео останавливаются с сохранением контрольной точки
+            self.batch_worker.cancel()
+            self.batch_worker.wait()
+        model_registry.release(self.detector)
         event.accept()
 
 if __name__ == '__main__':
@@ -0,0 +1,80 @@
+from PyQt5.QtWidgets import QWidget, QApplication
+from PyQt5.QtGui import QPainter, QColor, QPen
+from PyQt5.QtCore import Qt, QRect, QPoint, pyqtSignal
+
+
+class RegionSelector(QWidget):
+    """
+    Полупрозрачное окно поверх экрана для выделения области захвата мышью.
+
+    После отпускания кнопки мыши отправляет сигнал selected с областью в логических
+    координатах Qt (рабочего стола); Esc отменяет выделение.
+    """
+    selected = pyqtSignal(QRect)  # Выделенная область
+    cancelled = pyqtSignal()
+
+    MIN_SIZE = 16  # Меньшие области считаются случайным щелчком
+
+    def __init__(self, screen=None):
+        """
+        Args:
+            screen (QScreen, optional): Экран, на котором выделяется область (по умолчанию основной)
+        """
+        super().__init__()
+        self.target_screen = screen or QApplication.primaryScreen()
+        self.origin = None
+        self.current = None
+
+        self.setWindowFlags(Qt.WindowStaysOnTopHint | Qt.FramelessWindowHint | Qt.Tool)
+        self.setAttribute(Qt.WA_TranslucentBackground)
+        self.setGeometry(self.target_screen.geometry())
+        self.setCursor(Qt.CrossCursor)
+
+    def selection(self):
+        """Выделение в координатах окна или None."""
+        if self.origin is None or self.current is None:
+            return None
+        return QRect(self.origin, self.current).normalized()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.LeftButton:
+            self.origin = event.pos()
+            self.current = event.pos()
+            self.update()
+
+    def mouseMoveEvent(self, event):
+        if self.origin is not None:
+            self.current = event.pos()
+            self.update()
+
+    def mouseReleaseEvent(self, event):
+        rect = self.selection()
+        if event.button() != Qt.LeftButton or rect is None:
+            return
+        self.close()
+        if rect.width() < self.MIN_SIZE or rect.height() < self.MIN_SIZE:
+            self.cancelled.emit()
+            return
+        # Переводим в координаты рабочего стола
+        self.selected.emit(rect.translated(self.geometry().topLeft()))
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key_Escape:
+            self.close()
+            self.cancelled.emit()
+        event.accept()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        # Затемняем экран, выделенная область остается прозрачной
+        painter.fillRect(self.rect(), QColor(0, 0, 0, 100))
+        rect = self.selection()
+        if rect is not None:
+            painter.setCompositionMode(QPainter.CompositionMode_Clear)
+            painter.fillRect(rect, Qt.transparent)
+            painter.setCompositionMode(QPainter.CompositionMode_SourceOver)
+            pen = QPen(QColor(255, 0, 0))
+            pen.setWidth(2)
+            painter.setPen(pen)
+            painter.drawRect(rect)
+            painter.drawText(rect.topLeft() + QPoint(4, -6), f"{rect.width()}x{rect.height()}")
@@ -0,0 +1,102 @@
+import os
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class VideoDetectionWorker(QThread):
+    """
+    Фоновая обработка видео, чтобы окно приложения не зависало.
+
+    Прогресс передается сигналами в главный поток; скорость и оставшееся время
+    считаются по измеренной производительности конвейера.
+    """
+    progress = pyqtSignal(int, int, float, float)  # обработано, всего, кадр/с, осталось (с)
+    completed = pyqtSignal(str)  # путь к готовому видео
+    cancelled = pyqtSignal(int)  # кадр, с которого продолжится обработка
+    failed = pyqtSignal(str)  # текст ошибки
+
+    PROGRESS_INTERVAL = 0.2  # Минимальный интервал между сигналами прогресса (с)
+
+    def __init__(self, job, parent=None):
+        """
+        Args:
+            job (VideoDetectionJob): Задача обработки видео
+            parent (QObject, optional): Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.job = job
+        self._last_progress_time = 0.0
+
+    def run(self):
+        try:
+            output_path = self.job.run(self._report_progress)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        if output_path is None:
+            self.cancelled.emit(self.job.resume_frame())
+        else:
+            self.completed.emit(output_path)
+
+    def cancel(self):
+        """Просит задачу остановиться; записанные кадры сохраняются в контрольной точке."""
+        self.job.cancel()
+
+    def _report_progress(self, done, total, fps):
+        current_time = time.time()
+        if current_time - self._last_progress_time < self.PROGRESS_INTERVAL and done < total:
+            return
+        self._last_progress_time = current_time
+
+        eta = (total - done) / fps if fps > 0 and total > done else 0.0
+        self.progress.emit(done, total, fps, eta)
+
+
+class BatchDetectionWorker(QThread):
+    """Фоновая пакетная обработка списка видео пулом процессов (с возможностью отмены)."""
+    file_done = pyqtSignal(str, int, int)  # имя файла, готово, всего
+    completed = pyqtSignal(list, str)  # сводки по файлам, путь к файлу сводки
+    failed = pyqtSignal(str)  # текст ошибки
+
+    def __init__(self, videos, summary_path, model_path, conf, parent=None):
+        """
+        Args:
+            videos (list): Пути к видеофайлам
+            summary_path (str): Куда сохранить сводку JSON
+            model_path (str): Путь к весам YOLO
+            conf (float): Порог уверенности
+            parent (QObject, optional): Родительский объект Qt
+        """
+        super().__init__(parent)
+        self.videos = videos
+        self.summary_path = summary_path
+        self.model_path = model_path
+        self.conf = conf
+        # Импорт здесь, чтобы пул процессов не загружался вместе с окном
+        from src.batch import create_cancel_event
+        self.cancel_event = create_cancel_event()
+
+    def cancel(self):
+        """Останавливает пакет: текущие видео сохраняют контрольную точку, остальные не начинаются."""
+        self.cancel_event.set()
+
+    def run(self):
+        from src.batch import run_batch, write_summary
+
+        try:
+            summaries = run_batch(
+                self.videos,
+                model_path=self.model_path,
+                conf=self.conf,
+                on_file_done=lambda summary, done, total: self.file_done.emit(
+                    os.path.basename(summary["video"]), done, total
+                ),
+                cancel_event=self.cancel_event,
+            )
+            write_summary(summaries, self.summary_path)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.completed.emit(summaries, self.summary_path)
@@ -0,0 +1,255 @@
+import os
+import time
+import wave
+from functools import partial
+
+import numpy as np
+from PyQt5.QtCore import QObject, QUrl
+from PyQt5.QtMultimedia import QAudioDecoder, QAudioFormat, QMediaContent, QMediaPlayer, QSoundEffect
+
+from src.config import SOUND_SETTINGS
+from src.utils.detection_worker import LatencyStats
+
+
+def pcm_cache_path(sound_file, cache_dir):
+    """
+    Путь к декодированной копии звука (WAV).
+
+    В имя входят размер и время изменения исходного файла, поэтому при замене
+    звука он декодируется заново.
+    """
+    stat = os.stat(sound_file)
+    name = os.path.splitext(os.path.basename(sound_file))[0]
+    return os.path.join(cache_dir, f"{name}-{stat.st_size:x}-{int(stat.st_mtime):x}.wav")
+
+
+def to_int16(data, sample_type, sample_size):
+    """
+    Переводит PCM-данные в 16-битные целые со знаком (формат WAV для QSoundEffect).
+
+    Args:
+        data (bytes): Отсчеты
+        sample_type: QAudioFormat.SignedInt, UnSignedInt или Float
+        sample_size (int): Бит на отсчет
+
+    Returns:
+        bytes: Отсчеты int16
+    """
+    if sample_type == QAudioFormat.Float:
+        samples = np.frombuffer(data, dtype=np.float32 if sample_size == 32 else np.float64)
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    if sample_size == 16 and sample_type == QAudioFormat.SignedInt:
+        return bytes(data)
+    if sample_size == 8:
+        samples = np.frombuffer(data, dtype=np.uint8 if sample_type == QAudioFormat.UnSignedInt else np.int8)
+        offset = 128 if sample_type == QAudioFormat.UnSignedInt else 0
+        return ((samples.astype(np.int16) - offset) << 8).astype(np.int16).tobytes()
+    if sample_size == 32:
+        samples = np.frombuffer(data, dtype=np.int32)
+        return (samples >> 16).astype(np.int16).tobytes()
+    raise ValueError(f"Неподдерживаемый формат звука: {sample_size} бит")
+
+
+def write_wav(path, data, channels, sample_rate):
+    """Записывает 16-битный PCM в WAV (через временный файл, чтобы не оставить недописанный кэш)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with wave.open(tmp_path, "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(data)
+    os.replace(tmp_path, path)
+
+
+class AlertSound(QObject):
+    """
+    Звук уведомления с малой задержкой.
+
+    MP3 декодируется один раз в PCM (QAudioDecoder) и сохраняется в WAV в SOUND_SETTINGS["cache_dir"],
+    при следующих запусках декодирование не нужно. Воспроизводит несколько QSoundEffect с уже
+    загруженным звуком: новое уведомление не останавливает текущее, а звучит поверх него
+    свободным голосом. Если декодирование недоступно, используется QMediaPlayer.
+    Создается и вызывается в GUI-потоке.
+    """
+
+    def __init__(self, sound_file, voices=None, volume=None, parent=None):
+        """
+        Args:
+            sound_file (str): Звук уведомления (MP3 или WAV)
+            voices (int, optional): Сколько уведомлений может звучать одновременно
+                                    (по умолчанию SOUND_SETTINGS["voices"])
+            volume (float, optional): Громкость 0..1 (по умолчанию SOUND_SETTINGS["volume"])
+            parent (QObject, optional): Родитель
+        """
+        super().__init__(parent)
+        self.sound_file = sound_file
+        self.voice_count = max(1, SOUND_SETTINGS["voices"] if voices is None else voices)
+        self.volume = SOUND_SETTINGS["volume"] if volume is None else volume
+        self.voices = []  # QSoundEffect с одним и тем же звуком
+        self.player = None  # Запасной путь без декодирования
+        self.decoder = None
+        self._chunks = []
+        self._format = None
+        self._started = {}  # голос -> время последнего запуска
+        self._requests = {}  # голос -> (время вызова play, время захвата кадра)
+
+        # Задержки: от вызова play() до начала звучания и от захвата кадра до звука
+        self.latency = LatencyStats()
+        self.stats = {"played": 0, "overlapped": 0}
+
+        if os.path.exists(sound_file):
+            self.load()
+        else:
+            print(f"Звуковой файл не найден: {sound_file}")
+
+    @property
+    def ready(self):
+        return bool(self.voices) or self.player is not None
+
+    def load(self):
+        """Готовит звук: WAV загружается сразу, MP3 - из кэша или после однократного декодирования."""
+        if self.sound_file.lower().endswith(".wav"):
+            self._create_voices(self.sound_file)
+            return
+        cached = pcm_cache_path(self.sound_file, SOUND_SETTINGS["cache_dir"])
+        if os.path.exists(cached):
+            self._create_voices(cached)
+            return
+        self._decode(cached)
+
+    def _decode(self, target):
+        self.decoder = QAudioDecoder(self)
+        if self.decoder.error() == QAudioDecoder.ServiceMissingError:
+            # Например, macOS: декодер Qt недоступен
+            self._use_player()
+            return
+        audio_format = QAudioFormat()
+        audio_format.setCodec("audio/pcm")
+        audio_format.setSampleType(QAudioFormat.SignedInt)
+        audio_format.setSampleSize(16)
+        audio_format.setByteOrder(QAudioFormat.LittleEndian)
+        self.decoder.setAudioFormat(audio_format)
+        self.decoder.setSourceFilename(self.sound_file)
+        self.decoder.bufferReady.connect(self._on_buffer)
+        self.decoder.finished.connect(partial(self._on_decoded, target))
+        self.decoder.error[QAudioDecoder.Error].connect(self._on_decode_error)
+        self.decoder.start()
+
+    def _on_buffer(self):
+        buffer = self.decoder.read()
+        if not buffer.isValid():
+            return
+        self._format = buffer.format()
+        data = buffer.constData().asstring(buffer.byteCount())
+        self._chunks.append(to_int16(data, self._format.sampleType(), self._format.sampleSize()))
+
+    def _on_decoded(self, target):
+        if not self._chunks:
+            self._use_player()
+            return
+        try:
+            write_wav(target, b"".join(self._chunks), self._format.channelCount(), self._format.sampleRate())
+        except (OSError, ValueError) as e:
+            print(f"Не удалось сохранить декодированный звук: {e}")
+            self._use_player()
+            return
+        finally:
+            self._chunks = []
+        self._create_voices(target)
+
+    def _on_decode_error(self, error):
+        print(f"Не удалось декодировать звук: {self.decoder.errorString()}")
+        self._chunks = []
+        self._use_player()
+
+    def _use_player(self):
+        if self.player is not None:
+            return
+        self.player = QMediaPlayer(self)
+        self.player.setMedia(QMediaContent(QUrl.fromLocalFile(self.sound_file)))
+        self.player.setVolume(int(self.volume * 100))
+
+    def _create_voices(self, path):
+        url = QUrl.fromLocalFile(path)
+        for _ in range(self.voice_count):
+            voice = QSoundEffect(self)
+            voice.setSource(url)  # Звук загружается в память один раз и дальше не декодируется
+            voice.setVolume(self.volume)
+            voice.playingChanged.connect(partial(self._on_playing_changed, voice))
+            self.voices.append(voice)
+
+    def play(self, captured_at=None):
+        """
+        Воспроизводит уведомление, не прерывая уже звучащие.
+
+        Args:
+            captured_at (float, optional): Время захвата кадра по time.perf_counter() -
+                                           для замера задержки детекция -> звук
+
+        Returns:
+            bool: False, если звук еще не готов
+        """
+        now = time.perf_counter()
+        if self.voices:
+            voice = next((v for v in self.voices if not v.isPlaying()), None)
+            if voice is None:
+                # Все голоса заняты - перезапускаем тот, что запущен раньше остальных
+                voice = min(self.voices, key=lambda v: self._started.get(v, 0.0))
+                voice.stop()
+            elif any(v.isPlaying() for v in self.voices):
+                self.stats["overlapped"] += 1
+            self._requests[voice] = (now, captured_at)
+            self._started[voice] = now
+            voice.play()
+        elif self.player is not None:
+            # Запасной путь: перемотка в начало вместо stop(), чтобы не загружать файл заново
+            self.player.setPosition(0)
+            self.player.play()
+            self._record(now, captured_at)
+        else:
+            return False
+        self.stats["played"] += 1
+        return True
+
+    def _on_playing_changed(self, voice):
+        if not voice.isPlaying():
+            return
+        request = self._requests.pop(voice, None)
+        if request is not None:
+            self._record(*request)
+
+    def _record(self, called_at, captured_at):
+        now = time.perf_counter()
+        values = {"play": (now - called_at) * 1000}
+        if captured_at is not None:
+            values["detection_to_sound"] = (now - captured_at) * 1000
+        self.latency.add(**values)
+
+    def stop(self):
+        for voice in self.voices:
+            voice.stop()
+        if self.player is not None:
+            self.player.stop()
+
+    def format_latency(self):
+        """Строка с p50 / p95 / максимумом задержек или пустая строка, если замеров нет."""
+        summary = self.latency.summary()
+        return ", ".join(
+            f"{name} {p50:.0f} / {p95:.0f} / {worst:.0f}"
+            for name, (p50, p95, worst) in summary.items()
+        )
+
+
+_shared_sounds = {}
+
+
+def shared_alert_sound(sound_file):
+    """
+    Общий AlertSound для файла: оверлеи всех мониторов используют один декодированный звук.
+    """
+    sound = _shared_sounds.get(sound_file)
+    if sound is None:
+        sound = AlertSound(sound_file)
+        _shared_sounds[sound_file] = sound
+    return sound
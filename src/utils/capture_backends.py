@@ -0,0 +1,203 @@
+import os
+import threading
+
+import cv2
+import numpy as np
+
+
+class CaptureEnded(Exception):
+    """Источник кадров закончился (например, воспроизведение изображений без повтора)."""
+
+
+class CaptureBackend:
+    """
+    Базовый интерфейс источника кадров экрана.
+
+    Все источники возвращают кадр BGR (формат, который ожидают OpenCV и YOLO) и умеют
+    заполнять заранее выделенный буфер, чтобы захват не создавал новый массив на каждый кадр.
+    """
+
+    name = "base"
+
+    def __init__(self, region=None):
+        """
+        Args:
+            region (tuple, optional): Область захвата (left, top, width, height). None для полного экрана.
+        """
+        self.region = region
+
+    def grab(self, out=None):
+        """
+        Захватывает один кадр.
+
+        Args:
+            out (numpy.ndarray, optional): Буфер (H, W, 3) uint8 для записи кадра.
+                                           Если размер не подходит, выделяется новый.
+
+        Returns:
+            numpy.ndarray: Кадр BGR (тот же объект, что out, если буфер подошел)
+
+        Raises:
+            CaptureEnded: Кадров больше не будет - захват нужно завершить
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """Освобождает ресурсы источника."""
+
+    @staticmethod
+    def _buffer(out, height, width):
+        """Возвращает out, если он подходит по размеру, иначе новый буфер."""
+        if out is None or out.shape != (height, width, 3) or out.dtype != np.uint8:
+            out = np.empty((height, width, 3), dtype=np.uint8)
+        return out
+
+
+class PyAutoGUIBackend(CaptureBackend):
+    """Захват через pyautogui (PIL). Медленный, но работает везде, где работает pyautogui."""
+
+    name = "pyautogui"
+
+    def __init__(self, region=None):
+        super().__init__(region)
+        # Импорт здесь, чтобы pyautogui не требовался другим источникам
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def grab(self, out=None):
+        screenshot = self._pyautogui.screenshot(region=self.region)
+        rgb = np.asarray(screenshot)
+        out = self._buffer(out, rgb.shape[0], rgb.shape[1])
+        # Конвертация из RGB в BGR сразу в буфер
+        return cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR, dst=out)
+
+
+class MSSBackend(CaptureBackend):
+    """
+    Быстрый захват через mss (XShm/XGetImage, GDI, CoreGraphics).
+
+    mss отдает кадр в порядке BGRA - это уже порядок каналов модели, поэтому
+    достаточно одного прохода, который отбрасывает альфа-канал прямо в буфер.
+    """
+
+    name = "mss"
+
+    def __init__(self, region=None, monitor=1):
+        """
+        Args:
+            region (tuple, optional): Область захвата (left, top, width, height). None для полного экрана.
+            monitor (int): Номер монитора mss для полного экрана (1 - основной)
+        """
+        super().__init__(region)
+        import mss
+        self._mss = mss
+        self.monitor = monitor
+        self._local = threading.local()  # Объект mss привязан к потоку, в котором создан
+
+    def _sct(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is None:
+            sct = self._mss.mss()
+            self._local.sct = sct
+        return sct
+
+    def _area(self, sct):
+        if self.region is None:
+            return sct.monitors[self.monitor]
+        left, top, width, height = self.region
+        return {"left": left, "top": top, "width": width, "height": height}
+
+    def grab(self, out=None):
+        sct = self._sct()
+        shot = sct.grab(self._area(sct))
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        out = self._buffer(out, shot.height, shot.width)
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2BGR, dst=out)
+
+    def close(self):
+        sct = getattr(self._local, "sct", None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+class ReplayBackend(CaptureBackend):
+    """
+    Источник, который по кругу воспроизводит изображения с диска вместо захвата экрана.
+    Нужен для тестов и бенчмарков без дисплея.
+    """
+
+    name = "replay"
+
+    IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+    def __init__(self, source, region=None, size=None, loop=True):
+        """
+        Args:
+            source (str или list): Папка с изображениями, путь к изображению или список путей
+            region (tuple, optional): Область (left, top, width, height), вырезаемая из изображений
+            size (tuple, optional): Размер кадров (ширина, высота), например (3840, 2160)
+            loop (bool): Начинать сначала после последнего изображения
+                         (иначе после него grab() вызывает CaptureEnded)
+        """
+        super().__init__(region)
+        if isinstance(source, str):
+            if os.path.isdir(source):
+                source = sorted(
+                    os.path.join(source, name) for name in os.listdir(source)
+                    if name.lower().endswith(self.IMAGE_EXTENSIONS)
+                )
+            else:
+                source = [source]
+
+        # Изображения декодируются один раз, чтобы grab() не зависел от скорости диска
+        self.frames = []
+        for path in source:
+            image = cv2.imread(path)
+            if image is None:
+                raise IOError(f"Не удалось прочитать изображение: {path}")
+            if size is not None:
+                image = cv2.resize(image, tuple(size), interpolation=cv2.INTER_AREA)
+            if region is not None:
+                left, top, width, height = region
+                image = image[top:top + height, left:left + width]
+            self.frames.append(image)
+        if not self.frames:
+            raise IOError("Нет изображений для воспроизведения")
+
+        self.loop = loop
+        self.index = 0
+
+    def grab(self, out=None):
+        if self.index >= len(self.frames):
+            if not self.loop:
+                raise CaptureEnded("Изображения для воспроизведения закончились")
+            self.index = 0
+        frame = self.frames[self.index]
+        self.index += 1
+        out = self._buffer(out, frame.shape[0], frame.shape[1])
+        np.copyto(out, frame)
+        return out
+
+
+def create_capture_backend(name="auto", region=None):
+    """
+    Создает источник кадров по имени.
+
+    Args:
+        name (str): "auto", "mss" или "pyautogui". "auto" выбирает mss, если он установлен.
+        region (tuple, optional): Область захвата (left, top, width, height)
+
+    Returns:
+        CaptureBackend: Источник кадров
+    """
+    if name == "auto":
+        try:
+            return MSSBackend(region)
+        except ImportError:
+            return PyAutoGUIBackend(region)
+    if name == "mss":
+        return MSSBackend(region)
+    if name == "pyautogui":
+        return PyAutoGUIBackend(region)
+    raise ValueError(f"Неизвестный источник захвата: {name}")
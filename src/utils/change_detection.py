@@ -0,0 +1,149 @@
+import cv2
+import numpy as np
+
+
+class FrameChangeDetector:
+    """
+    Определяет, изменилось ли содержимое экрана с момента последнего кадра, отправленного на детекцию.
+
+    Кадр уменьшается до миниатюры в оттенках серого и сравнивается с миниатюрой
+    последнего обработанного кадра. Это стоит доли миллисекунды и позволяет не запускать
+    YOLO, пока экран не меняется.
+    """
+
+    def __init__(self, thumbnail_size=(160, 90), pixel_threshold=12, changed_ratio=0.002):
+        """
+        Args:
+            thumbnail_size (tuple): Размер миниатюры (ширина, высота)
+            pixel_threshold (int): Разница яркости пикселя миниатюры (0-255), считающаяся изменением
+            changed_ratio (float): Доля изменившихся пикселей, при которой кадр считается новым
+        """
+        self.thumbnail_size = tuple(thumbnail_size)
+        self.pixel_threshold = pixel_threshold
+        self.changed_ratio = changed_ratio
+        self.reference = None  # Миниатюра последнего кадра, отправленного на детекцию
+        self.last_thumbnail = None  # Миниатюра последнего проверенного кадра
+        self.last_diff = None  # Разница последнего проверенного кадра с опорным
+
+    def make_thumbnail(self, frame):
+        """
+        Строит миниатюру кадра в оттенках серого.
+
+        Args:
+            frame (numpy.ndarray): Кадр (BGR)
+
+        Returns:
+            numpy.ndarray: Миниатюра (uint8, один канал)
+        """
+        # Сначала уменьшаем, потом переводим в серый - так cvtColor работает с малым изображением
+        small = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+    def has_changed(self, frame):
+        """
+        Проверяет, отличается ли кадр от последнего кадра, отправленного на детекцию.
+
+        Args:
+            frame (numpy.ndarray): Кадр (BGR)
+
+        Returns:
+            bool: True, если экран изменился (или сравнивать пока не с чем)
+        """
+        self.last_thumbnail = self.make_thumbnail(frame)
+        if self.reference is None:
+            self.last_diff = None
+            return True
+
+        self.last_diff = cv2.absdiff(self.last_thumbnail, self.reference)
+        changed = np.count_nonzero(self.last_diff > self.pixel_threshold)
+        return changed > self.changed_ratio * self.last_diff.size
+
+    def changed_regions(self, frame_shape, grid=(16, 9), tile_ratio=0.02, padding=32, max_area_ratio=0.5):
+        """
+        Находит изменившиеся области последнего проверенного кадра (после has_changed).
+
+        Миниатюра делится на сетку плиток; соседние изменившиеся плитки объединяются
+        в прямоугольники, которые расширяются на padding пикселей кадра.
+
+        Args:
+            frame_shape (tuple): Форма исходного кадра (высота, ширина, ...)
+            grid (tuple): Размер сетки плиток (столбцов, строк)
+            tile_ratio (float): Доля изменившихся пикселей, при которой плитка считается изменившейся
+            padding (int): Отступ вокруг изменившейся области в пикселях кадра
+            max_area_ratio (float): Если области покрывают большую долю кадра, выгоднее обработать его целиком
+
+        Returns:
+            list или None: Области [(x1, y1, x2, y2), ...] в координатах кадра,
+                           [] если ничего не изменилось, None если нужно обработать весь кадр
+        """
+        if self.last_diff is None:
+            return None
+
+        # Доля изменившихся пикселей в каждой плитке: INTER_AREA усредняет блоки миниатюры
+        changed = (self.last_diff > self.pixel_threshold).astype(np.float32)
+        tile_changed = cv2.resize(changed, tuple(grid), interpolation=cv2.INTER_AREA)
+        dirty = (tile_changed > tile_ratio).astype(np.uint8)
+        if not dirty.any():
+            return []
+
+        frame_h, frame_w = frame_shape[:2]
+        scale_x = frame_w / grid[0]
+        scale_y = frame_h / grid[1]
+
+        # Соседние плитки объединяем в прямоугольники
+        count, _, stats, _ = cv2.connectedComponentsWithStats(dirty, connectivity=8)
+        regions = []
+        for x, y, w, h, _ in stats[1:count]:
+            regions.append((
+                max(0, int(x * scale_x) - padding),
+                max(0, int(y * scale_y) - padding),
+                min(frame_w, int((x + w) * scale_x) + padding),
+                min(frame_h, int((y + h) * scale_y) + padding),
+            ))
+        regions = merge_overlapping(regions)
+
+        area = sum((x2 - x1) * (y2 - y1) for x1, y1, x2, y2 in regions)
+        if area > max_area_ratio * frame_w * frame_h:
+            return None
+        return regions
+
+    def mark_inferred(self):
+        """Запоминает последний проверенный кадр как отправленный на детекцию."""
+        self.reference = self.last_thumbnail
+
+    def reset(self):
+        """Сбрасывает состояние: следующий кадр будет считаться изменившимся."""
+        self.reference = None
+        self.last_thumbnail = None
+        self.last_diff = None
+
+
+def boxes_intersect(a, b):
+    """Проверяет, пересекаются ли прямоугольники (x1, y1, x2, y2)."""
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def merge_overlapping(regions):
+    """
+    Объединяет пересекающиеся прямоугольники, чтобы один участок экрана не обрабатывался дважды.
+
+    Args:
+        regions (list): Прямоугольники [(x1, y1, x2, y2), ...]
+
+    Returns:
+        list: Непересекающиеся прямоугольники
+    """
+    regions = list(regions)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(regions)):
+            for j in range(i + 1, len(regions)):
+                if boxes_intersect(regions[i], regions[j]):
+                    a, b = regions[i], regions.pop(j)
+                    regions[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                    merged = True
+                    break
+            if merged:
+                break
+    return regions
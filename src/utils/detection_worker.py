@@ -0,0 +1,273 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from src.utils.change_detection import merge_overlapping
+
+
+class DetectionJob:
+    """Кадр, отправленный на детекцию, и время его захвата."""
+
+    __slots__ = ("frame", "regions", "captured_at", "seq", "started_at", "origin")
+
+    def __init__(self, frame, regions=None, captured_at=None, seq=0, origin=(0, 0)):
+        """
+        Args:
+            frame (numpy.ndarray): Кадр (BGR); буфер принадлежит заданию до конца обработки
+            regions (list, optional): Изменившиеся области [(x1, y1, x2, y2), ...]; None - весь кадр
+            captured_at (float, optional): Время захвата по time.perf_counter()
+            seq (int): Порядковый номер кадра - по нему отбрасываются устаревшие результаты
+            origin (tuple): Левый верхний угол области захвата на экране в момент захвата
+        """
+        self.frame = frame
+        self.regions = regions
+        self.captured_at = time.perf_counter() if captured_at is None else captured_at
+        self.seq = seq
+        self.started_at = None  # Когда задание взял обработчик
+        self.origin = origin
+
+
+def merge_jobs(pending, job):
+    """
+    Объединяет вытесненное задание (или задание, которое еще в обработке) с новым.
+
+    Вытесненный кадр так и не был обработан, а детектор изменений уже сравнивает новый кадр
+    с ним, поэтому новое задание должно покрыть и его изменившиеся области. То же для кадра,
+    который обрабатывает другой поток: его результат будет отброшен, если новый кадр закончится раньше.
+    """
+    if pending.regions is None or job.regions is None:
+        job.regions = None
+    else:
+        job.regions = merge_overlapping(pending.regions + job.regions)
+    return job
+
+
+class FrameMailbox:
+    """
+    Почтовый ящик на один кадр: «побеждает последний кадр».
+
+    Новый кадр вытесняет еще не взятый обработчиком, поэтому очередь не растет,
+    а детекция всегда получает самый свежий кадр экрана.
+    """
+
+    def __init__(self, track_in_flight=False):
+        """
+        Args:
+            track_in_flight (bool): Объединять новое задание и с заданиями, которые обработчики
+                                    уже взяли, но еще не закончили (см. done()). Нужно при нескольких
+                                    обработчиках: их результаты могут прийти позже более нового кадра
+                                    и быть отброшены как устаревшие.
+        """
+        self._condition = threading.Condition()
+        self._item = None
+        self._closed = False
+        self._track_in_flight = track_in_flight
+        self._in_flight = []  # Взятые задания, обработка которых еще не закончена
+
+    def put(self, item, merge=None):
+        """
+        Кладет задание в ящик.
+
+        Args:
+            item: Новое задание
+            merge (callable, optional): merge(вытесненное, новое) -> задание, которое останется в ящике
+
+        Returns:
+            Вытесненное задание или None
+        """
+        with self._condition:
+            replaced = self._item
+            if merge is not None:
+                for taken in self._in_flight:
+                    item = merge(taken, item)
+                if replaced is not None:
+                    item = merge(replaced, item)
+            self._item = item
+            self._condition.notify()
+            return replaced
+
+    def take(self, timeout=None):
+        """
+        Ждет и забирает задание.
+
+        Returns:
+            Задание или None, если ящик закрыт или истек timeout
+        """
+        with self._condition:
+            if self._item is None and not self._closed:
+                self._condition.wait(timeout)
+            item, self._item = self._item, None
+            if item is not None and self._track_in_flight:
+                self._in_flight.append(item)
+            return item
+
+    def done(self, item):
+        """Отмечает, что обработка взятого задания закончена."""
+        with self._condition:
+            if item in self._in_flight:
+                self._in_flight.remove(item)
+
+    def pending(self):
+        """Есть ли задание, которое еще не взял обработчик."""
+        with self._condition:
+            return self._item is not None
+
+    def open(self):
+        with self._condition:
+            self._closed = False
+
+    def close(self):
+        """Будит ожидающих обработчиков. Невзятое задание возвращается."""
+        with self._condition:
+            self._closed = True
+            item, self._item = self._item, None
+            self._condition.notify_all()
+            return item
+
+
+class FramePool:
+    """
+    Пул буферов кадров: захват пишет в освободившийся буфер вместо выделения нового.
+
+    Буфер возвращается в пул, когда обработчик закончил с кадром или кадр был вытеснен.
+    """
+
+    def __init__(self, max_size=4):
+        """
+        Args:
+            max_size (int): Сколько свободных буферов хранить (лишние отдаются сборщику мусора)
+        """
+        self.max_size = max_size
+        self._free = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Свободный буфер или None (источник кадров выделит новый)."""
+        with self._lock:
+            return self._free.pop() if self._free else None
+
+    def release(self, buffer):
+        if buffer is None:
+            return
+        with self._lock:
+            if len(self._free) < self.max_size:
+                self._free.append(buffer)
+
+    def clear(self):
+        with self._lock:
+            self._free.clear()
+
+
+class LatencyStats:
+    """Скользящее окно задержек по этапам (мс) для вывода p50 / p95 / максимума."""
+
+    def __init__(self, window=200):
+        self.window = window
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def add(self, **values_ms):
+        with self._lock:
+            for name, value in values_ms.items():
+                self._values.setdefault(name, deque(maxlen=self.window)).append(value)
+
+    def summary(self):
+        """
+        Returns:
+            dict: Имя этапа -> (p50, p95, максимум) в мс
+        """
+        with self._lock:
+            values = {name: np.asarray(v) for name, v in self._values.items() if v}
+        return {
+            name: (float(np.percentile(v, 50)), float(np.percentile(v, 95)), float(v.max()))
+            for name, v in values.items()
+        }
+
+    def values(self, name):
+        """Копия окна задержек этапа name (мс)."""
+        with self._lock:
+            return np.asarray(self._values.get(name, ()), dtype=np.float64)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class DetectionWorkers:
+    """
+    Долгоживущие потоки детекции, которые берут кадры из FrameMailbox.
+
+    Потоки создаются один раз на сеанс захвата вместо нового потока на каждый кадр.
+    Второй обработчик имеет смысл на многоядерном CPU: пока один ждет модель, другой
+    готовит кадр, переводит боксы и рисует рамки (сам вызов модели защищен блокировкой детектора).
+    """
+
+    def __init__(self, process, workers=1, on_done=None, name="detection"):
+        """
+        Args:
+            process (callable): process(job) - обработка одного задания
+            workers (int): Количество потоков
+            on_done (callable, optional): on_done(job) после обработки (например, вернуть буфер в пул)
+            name (str): Префикс имени потоков
+        """
+        self.process = process
+        self.workers = max(1, workers)
+        self.on_done = on_done
+        self.name = name
+        # Несколько обработчиков могут закончить кадры не по порядку, и результат более старого кадра
+        # будет отброшен - поэтому новое задание покрывает и области кадров, которые еще в обработке
+        self.mailbox = FrameMailbox(track_in_flight=self.workers > 1)
+        self._threads = []
+        self._running = False
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self.mailbox.open()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"{self.name}-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, job, merge=merge_jobs):
+        """
+        Отправляет кадр на детекцию; необработанный предыдущий кадр вытесняется.
+
+        Returns:
+            DetectionJob: Вытесненное задание или None
+        """
+        return self.mailbox.put(job, merge)
+
+    def stop(self, timeout=1.0):
+        """
+        Останавливает потоки, дождавшись текущих заданий не дольше timeout.
+
+        Returns:
+            DetectionJob: Задание, которое осталось невзятым, или None
+        """
+        self._running = False
+        pending = self.mailbox.close()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+        return pending
+
+    def _loop(self):
+        while self._running:
+            job = self.mailbox.take(timeout=0.5)
+            if job is None:
+                continue
+            job.started_at = time.perf_counter()
+            try:
+                self.process(job)
+            except Exception as e:
+                print(f"Ошибка при детекции кадра: {e}")
+            finally:
+                self.mailbox.done(job)
+                if self.on_done is not None:
+                    self.on_done(job)
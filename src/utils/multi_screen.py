@@ -0,0 +1,171 @@
+import os
+import threading
+
+from src.utils.capture_backends import create_capture_backend
+from src.utils.profiling import profiler
+from src.utils.screen_capture import ScreenCapture
+from src.config import CAPTURE_SETTINGS
+
+
+def list_monitors(selection="all"):
+    """
+    Список мониторов в физических пикселях экрана.
+
+    Args:
+        selection: "all" - все мониторы, "primary" - только основной,
+                   или список номеров мониторов [1, 2, ...] (нумерация mss, с 1)
+
+    Returns:
+        list: [{"index": 1, "left": 0, "top": 0, "width": 1920, "height": 1080}, ...]
+    """
+    try:
+        import mss
+        with mss.mss() as sct:
+            # sct.monitors[0] - весь виртуальный рабочий стол, дальше - отдельные мониторы
+            areas = sct.monitors[1:]
+    except ImportError:
+        # Без mss pyautogui знает только основной монитор
+        import pyautogui
+        width, height = pyautogui.size()
+        areas = [{"left": 0, "top": 0, "width": width, "height": height}]
+
+    monitors = [
+        {"index": index, "left": area["left"], "top": area["top"],
+         "width": area["width"], "height": area["height"]}
+        for index, area in enumerate(areas, 1)
+    ]
+    if selection == "primary":
+        return monitors[:1]
+    if selection != "all":
+        monitors = [monitor for monitor in monitors if monitor["index"] in selection]
+    return monitors
+
+
+class MultiScreenCapture:
+    """
+    Захват нескольких мониторов: на каждый монитор свой ScreenCapture.
+
+    У каждого монитора свой поток захвата, свой детектор изменений, свои потоки детекции
+    с ящиком на один кадр, трекер и размер входа модели. Модель общая (вызовы защищены
+    блокировкой детектора), а монитор, на котором ничего не меняется, не отправляет кадры
+    на детекцию и не занимает время модели. Рамки приходят в координатах монитора.
+    """
+
+    def __init__(self, monitors=None, detection_enabled=True, overlay_callbacks=None, detector=None,
+                 backend=None, tiled=None, workers=None, conf=None):
+        """
+        Args:
+            monitors (list, optional): Мониторы из list_monitors()
+                                       (по умолчанию по CAPTURE_SETTINGS["monitors"])
+            detection_enabled (bool): Включить детекцию хот-догов
+            overlay_callbacks (dict, optional): Номер монитора -> overlay_callback(boxes[, captured_at])
+                                                с рамками в координатах этого монитора
+            detector (HotDogDetector, optional): Общий детектор для всех мониторов
+            backend (str, optional): Имя источника кадров (по умолчанию CAPTURE_SETTINGS["backend"])
+            tiled (bool, optional): Детекция по плиткам (см. ScreenCapture)
+            workers (int, optional): Потоков детекции на монитор (см. ScreenCapture)
+            conf (float, optional): Порог уверенности (по умолчанию порог детектора)
+        """
+        self.monitors = list_monitors(CAPTURE_SETTINGS["monitors"]) if monitors is None else monitors
+        if not self.monitors:
+            raise ValueError("Не найдено ни одного монитора для захвата")
+        overlay_callbacks = overlay_callbacks or {}
+        backend = CAPTURE_SETTINGS["backend"] if backend is None else backend
+
+        self.captures = []
+        for monitor in self.monitors:
+            region = (monitor["left"], monitor["top"], monitor["width"], monitor["height"])
+            screen_cap = ScreenCapture(
+                region=region,
+                detection_enabled=detection_enabled,
+                overlay_callback=overlay_callbacks.get(monitor["index"]),
+                detector=detector,
+                backend=create_capture_backend(backend, region),
+                tiled=tiled,
+                workers=workers,
+                name=f"Монитор {monitor['index']}",
+                conf=conf,
+            )
+            screen_cap.overlay_origin = (monitor["left"], monitor["top"])  # Рамки - в координатах монитора
+            # Модель одна на все мониторы - каждому достается доля интервала между кадрами
+            screen_cap.budget_share = 1.0 / len(self.monitors)
+            self.captures.append(screen_cap)
+        self.threads = []
+
+    @property
+    def conf(self):
+        """Порог уверенности захвата (общий для всех мониторов)."""
+        return self.captures[0].conf
+
+    @conf.setter
+    def conf(self, value):
+        for screen_cap in self.captures:
+            screen_cap.conf = value
+
+    @property
+    def frame_stats(self):
+        """Счетчики кадров, сложенные по всем мониторам."""
+        stats = {}
+        for screen_cap in self.captures:
+            for name, value in screen_cap.frame_stats.items():
+                stats[name] = stats.get(name, 0) + value
+        return stats
+
+    def start_capture(self, callback=None, fps=10, save_path=None, use_overlay=False):
+        """
+        Запускает захват всех мониторов и ждет его завершения.
+
+        Args:
+            callback (callable, optional): callback(frame) - вызывается из потоков захвата всех мониторов
+            fps (int, optional): Целевое количество кадров в секунду на каждом мониторе
+            save_path (str, optional): Папка для скриншотов; кадры каждого монитора - в своей подпапке
+            use_overlay (bool, optional): Рамки отображаются оверлеями вместо сохранения кадров
+        """
+        if not use_overlay and callback is None:
+            if save_path is None:
+                save_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "screenshots")
+
+        if use_overlay:
+            print(f"Захват экрана запущен (мониторов: {len(self.captures)}). Нажмите ESC для выхода.")
+        self.threads = []
+        for monitor, screen_cap in zip(self.monitors, self.captures):
+            monitor_path = None
+            if save_path is not None:
+                monitor_path = os.path.join(save_path, f"monitor{monitor['index']}")
+                os.makedirs(monitor_path, exist_ok=True)
+            thread = threading.Thread(
+                target=screen_cap.start_capture,
+                kwargs={"callback": callback, "fps": fps, "save_path": monitor_path, "use_overlay": use_overlay},
+                name=f"capture-{monitor['index']}",
+                daemon=True,
+            )
+            self.threads.append(thread)
+            thread.start()
+
+        try:
+            # join с таймаутом, чтобы главный поток получил KeyboardInterrupt
+            while any(thread.is_alive() for thread in self.threads):
+                for thread in self.threads:
+                    thread.join(timeout=0.5)
+        except KeyboardInterrupt:
+            print("Захват экрана остановлен")
+            self.stop_capture()
+        if use_overlay:
+            print("Захват экрана завершен.")
+
+    def stop_capture(self):
+        """Останавливает захват всех мониторов."""
+        was_running = any(screen_cap.running for screen_cap in self.captures)
+        for screen_cap in self.captures:
+            screen_cap.stop_capture()
+        for thread in self.threads:
+            thread.join(timeout=2.0)
+        self.threads = []
+        if was_running and profiler.enabled:
+            print(f"Время по этапам, мс:\n{profiler.format_summary()}")
+
+    def close(self):
+        """Останавливает захват и возвращает детекторы в реестр моделей."""
+        self.stop_capture()
+        for screen_cap in self.captures:
+            screen_cap.close()
@@ -1,18 +1,93 @@
-import sys
 import os
+import threading
 import time
 from PyQt5.QtWidgets import QWidget, QApplication, QPushButton
-from PyQt5.QtGui import QPainter, QColor, QPen, QFont
-from PyQt5.QtCore import Qt, QRect, pyqtSignal, QTimer, QUrl
-from PyQt5.QtMultimedia import QMediaPlayer, QMediaContent
-
-# Добавляем пути импорта
-current_dir = os.path.dirname(os.path.abspath(__file__))
-src_dir = os.path.dirname(current_dir)
-sys.path.insert(0, src_dir)
+from PyQt5.QtGui import QPainter, QColor, QPen, QFont, QFontMetrics, QFontDatabase, QPixmap, QRegion
+from PyQt5.QtCore import Qt, QRect, QObject, pyqtSignal, QTimer
 
 # Импорт настроек
-from src.config import OVERLAY_SETTINGS, SOUND_SETTINGS
+from src.config import OVERLAY_SETTINGS, SOUND_SETTINGS, PROFILING_SETTINGS
+from src.utils.alert_sound import shared_alert_sound
+from src.utils.profiling import profiler
+from src.utils.detection_worker import LatencyStats
+
+
+class OverlayChannel(QObject):
+    """
+    Потокобезопасная доставка детекций из потока детекции в GUI-поток.
+    
+    publish() можно вызывать из любого потока: он только запоминает последний результат
+    и, если доставка еще не запланирована, отправляет сигнал. Сигнал ставится в очередь
+    событий GUI-потока (QueuedConnection), и за один проход цикла событий виджет получает
+    только самый свежий результат - серия результатов между проходами схлопывается.
+    """
+    _wake = pyqtSignal()
+    
+    def __init__(self, target, parent=None):
+        """
+        Args:
+            target (callable): target(boxes, captured_at) - вызывается в GUI-потоке
+            parent (QObject, optional): Родитель; канал должен жить в GUI-потоке
+        """
+        super().__init__(parent)
+        self.target = target
+        self._lock = threading.Lock()
+        self._latest = None  # (boxes, captured_at) - еще не доставленный результат
+        self._scheduled = False
+        self.stats = {"published": 0, "delivered": 0}
+        self._wake.connect(self._deliver, Qt.QueuedConnection)
+    
+    def publish(self, boxes, captured_at=None):
+        """
+        Передает результат на доставку (из любого потока).
+        
+        Args:
+            boxes (list): Рамки для оверлея
+            captured_at (float, optional): Время захвата кадра по time.perf_counter()
+        """
+        with self._lock:
+            self.stats["published"] += 1
+            if (self._latest is not None and captured_at is not None
+                    and self._latest[1] is not None and self._latest[1] > captured_at):
+                # Второй поток детекции уже прислал результат по более новому кадру
+                return
+            self._latest = (boxes, captured_at)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wake.emit()
+    
+    def _deliver(self):
+        with self._lock:
+            latest, self._latest = self._latest, None
+            self._scheduled = False
+        if latest is not None:
+            self.stats["delivered"] += 1
+            self.target(*latest)
+
+
+def screen_for_monitor(monitor):
+    """
+    Экран Qt, соответствующий монитору из list_monitors().
+    
+    Мониторы заданы в физических пикселях, а геометрия экранов Qt - в логических,
+    поэтому начало экрана сравнивается в обоих масштабах.
+    
+    Args:
+        monitor (dict): {"left", "top", "width", "height"} в пикселях экрана
+        
+    Returns:
+        QScreen: Ближайший по положению экран
+    """
+    def distance(screen):
+        geometry = screen.geometry()
+        ratio = screen.devicePixelRatio()
+        return min(
+            abs(geometry.x() - monitor["left"]) + abs(geometry.y() - monitor["top"]),
+            abs(geometry.x() * ratio - monitor["left"]) + abs(geometry.y() * ratio - monitor["top"]),
+        )
+    return min(QApplication.screens(), key=distance)
+
 
 class DetectionOverlay(QWidget):
     """
@@ -20,9 +95,15 @@ class DetectionOverlay(QWidget):
     """
     closed = pyqtSignal()  # Сигнал, отправляемый при закрытии оверлея
     
-    def __init__(self):
+    def __init__(self, screen=None):
+        """
+        Args:
+            screen (QScreen, optional): Экран, который закрывает оверлей (по умолчанию основной)
+        """
         super().__init__()
-        self.boxes = []  # Список обнаруженных боксов [(x1, y1, x2, y2, class_name, conf), ...]
+        self.target_screen = screen
+        self.box_scale = 1.0  # Пикселей кадра на логический пиксель оверлея (масштаб DPI)
+        self.boxes = []  # Список обнаруженных боксов [(x1, y1, x2, y2, class_name, conf[, track_id]), ...]
         self.last_update_time = None  # Время последнего обновления с боксами
         self.show_boxes = True  # Флаг отображения боксов
         self.hide_timeout = OVERLAY_SETTINGS["hide_timeout"]  # Время в мс, через которое скрываются прямоугольники, если нет хот-догов
@@ -31,19 +112,36 @@ class DetectionOverlay(QWidget):
         self.min_sound_interval = SOUND_SETTINGS["min_interval"]  # Минимальный интервал между звуками
         self.last_sound_time = 0  # Время последнего звукового уведомления
         
+        # Задержка от захвата кадра до отрисовки его рамок и счетчики перерисовок
+        self.paint_captured_at = None
+        self.paint_latency = LatencyStats()
+        self.repaint_stats = {"painted": 0, "skipped": 0}
+        
+        # Перо, шрифт и готовые изображения подписей создаются один раз, а не на каждой отрисовке
+        self._style_key = None
+        self._pen = None
+        self._font = None
+        self._label_pixmaps = {}  # текст подписи -> QPixmap с фоном и текстом
+        
         # Инициализируем таймер для скрытия прямоугольников
         self.hide_timer = QTimer(self)
         self.hide_timer.timeout.connect(self.check_boxes_age)
         self.hide_timer.start(1000)  # Проверка каждую секунду
         
-        # Подготавливаем медиаплеер для звуков
-        self.sound_player = None
-        if self.sound_enabled and os.path.exists(self.sound_file):
-            self.sound_player = QMediaPlayer()
-            # Проверяем расширение файла
-            file_url = QUrl.fromLocalFile(self.sound_file)
-            self.sound_player.setMedia(QMediaContent(file_url))
-            self.sound_player.setVolume(70)  # Громкость 70%
+        # HUD со временем этапов обработки (клавиша H); обновляется по таймеру, только пока виден
+        self.show_hud = False
+        self.hud_text = ""
+        self.hud_font = QFontDatabase.systemFont(QFontDatabase.FixedFont)  # Моноширинный - столбцы таблицы ровные
+        self.hud_timer = QTimer(self)
+        self.hud_timer.timeout.connect(self.refresh_hud)
+        if PROFILING_SETTINGS["hud"]:
+            self.set_hud_visible(True)
+        
+        # Звук декодируется один раз и готовится, даже если сейчас выключен:
+        # его можно включить позже через enable_sound()
+        self.alert_sound = None
+        if os.path.exists(self.sound_file):
+            self.alert_sound = shared_alert_sound(self.sound_file)
         
         self.init_ui()
         
@@ -58,7 +156,10 @@ class DetectionOverlay(QWidget):
         self.setAttribute(Qt.WA_TranslucentBackground)
         
         # Разворачиваем на весь экран
-        self.setGeometry(QApplication.desktop().screenGeometry())
+        if self.target_screen is not None:
+            self.setGeometry(self.target_screen.geometry())
+        else:
+            self.setGeometry(QApplication.desktop().screenGeometry())
         
         # Создаем кнопку закрытия
         self.close_button = QPushButton("✕", self)
@@ -83,6 +184,29 @@ class DetectionOverlay(QWidget):
         # Не делаем окно прозрачным для событий мыши, только в области кнопки
         self.setAttribute(Qt.WA_TransparentForMouseEvents, False)
         
+    def set_capture_size(self, width, height):
+        """
+        Задает размер захватываемого кадра, чтобы переводить рамки в координаты оверлея.
+        
+        Кадр экрана захватывается в физических пикселях, а оверлей при масштабе 150%
+        или 200% рисует в логических, поэтому рамки делятся на отношение размеров.
+        
+        Args:
+            width (int): Ширина кадра в пикселях
+            height (int): Высота кадра в пикселях
+        """
+        self.box_scale = max(width / max(self.width(), 1), height / max(self.height(), 1))
+    
+    def scale_boxes(self, boxes):
+        """Переводит рамки из пикселей кадра в логические пиксели оверлея."""
+        if abs(self.box_scale - 1.0) < 1e-3:
+            return boxes
+        scale = self.box_scale
+        return [
+            (int(box[0] / scale), int(box[1] / scale), int(box[2] / scale), int(box[3] / scale)) + tuple(box[4:])
+            for box in boxes
+        ]
+    
     def enable_sound(self, enabled):
         """
         Включает или выключает звуковые уведомления.
@@ -92,43 +216,189 @@ class DetectionOverlay(QWidget):
         """
         self.sound_enabled = enabled
         
-    def play_notification_sound(self):
+    def play_notification_sound(self, captured_at=None):
         """
         Воспроизводит звук уведомления, если прошло достаточно времени с момента последнего звука.
+        
+        Args:
+            captured_at (float, optional): Время захвата кадра по time.perf_counter() -
+                                           для замера задержки детекция -> звук
         """
-        if not self.sound_enabled or not self.sound_player:
+        if not self.sound_enabled or not self.alert_sound:
             return
         
         current_time = int(time.time() * 1000)  # Текущее время в мс
         if current_time - self.last_sound_time >= self.min_sound_interval:
-            # Если плеер уже играет, сначала остановим его
-            if self.sound_player.state() == QMediaPlayer.PlayingState:
-                self.sound_player.stop()
-            
-            # Начинаем воспроизведение
-            self.sound_player.play()
-            self.last_sound_time = current_time
-            
-            # Выводим отладочную информацию
-            print(f"Воспроизведение звука: {self.sound_file}")
+            # Звук уже декодирован: новое уведомление звучит сразу, не прерывая предыдущее
+            if self.alert_sound.play(captured_at):
+                self.last_sound_time = current_time
+                
+                # Выводим отладочную информацию
+                print(f"Воспроизведение звука: {self.sound_file}")
         
-    def update_boxes(self, boxes):
+    def update_boxes(self, boxes, captured_at=None):
         """
-        Обновляет список боксов для отображения.
+        Обновляет список боксов для отображения. Вызывается только из GUI-потока
+        (из других потоков - через OverlayChannel).
         
         Args:
-            boxes: список кортежей (x1, y1, x2, y2, class_name, conf)
+            boxes: список кортежей (x1, y1, x2, y2, class_name, conf[, track_id])
+            captured_at (float, optional): Время захвата кадра по time.perf_counter() -
+                                           для замера задержки захват -> отрисовка
         """
-        # Проверяем, появились ли новые боксы
-        if len(boxes) > 0 and (not self.boxes or len(boxes) > len(self.boxes)):
+        boxes = self.scale_boxes(boxes)
+        if self.has_new_objects(boxes):
             # Воспроизводим звук уведомления при обнаружении новых объектов
-            self.play_notification_sound()
+            self.play_notification_sound(captured_at)
         
-        self.boxes = boxes
         self.last_update_time = time.time()
+        
+        # Те же рамки уже на экране - перерисовка не нужна, только продлеваем их показ
+        if self.show_boxes and self.same_boxes(boxes):
+            self.repaint_stats["skipped"] += 1
+            return
+        
+        # Перерисовываем только области старых и новых рамок, а не весь экран
+        damage = self.boxes_region(self.boxes) if self.show_boxes else QRegion()
+        self.boxes = boxes
         self.show_boxes = True  # При обновлении показываем боксы
-        self.update()  # Вызываем перерисовку
+        self.paint_captured_at = captured_at
+        self.repaint_stats["painted"] += 1
+        self.update(damage.united(self.boxes_region(boxes)))
+    
+    def same_boxes(self, boxes):
+        """
+        Проверяет, что набор рамок не изменился: те же объекты, рамки сдвинулись не больше чем
+        на repaint_tolerance пикселей, а подпись уверенности та же.
+        """
+        if len(boxes) != len(self.boxes):
+            return False
+        tolerance = OVERLAY_SETTINGS["repaint_tolerance"]
+        for new, old in zip(boxes, self.boxes):
+            if new[4] != old[4] or new[6:] != old[6:] or f"{new[5]:.2f}" != f"{old[5]:.2f}":
+                return False
+            if any(abs(a - b) > tolerance for a, b in zip(new[:4], old[:4])):
+                return False
+        return True
+        
+    def has_new_objects(self, boxes):
+        """
+        Проверяет, появились ли среди боксов новые объекты.
+        
+        Если у боксов есть номера треков, новым считается трек, которого не было
+        на экране: дрожание или движение уже найденного хот-дога звук не вызывает.
+        Без номеров сравнивается количество боксов.
+        """
+        if not boxes:
+            return False
+        if all(len(box) > 6 for box in boxes):
+            shown_ids = {box[6] for box in self.boxes if len(box) > 6} if self.show_boxes else set()
+            return any(box[6] not in shown_ids for box in boxes)
+        return not self.boxes or len(boxes) > len(self.boxes)
+        
+    def set_hud_visible(self, visible):
+        """
+        Показывает или скрывает HUD со статистикой этапов. Показ HUD включает профайлер.
+        
+        Args:
+            visible (bool): True для показа
+        """
+        self.show_hud = visible
+        if visible:
+            profiler.enabled = True
+            self.refresh_hud()
+            self.hud_timer.start(PROFILING_SETTINGS["hud_refresh"])
+        else:
+            self.hud_timer.stop()
+            self.update(self.hud_rect())
+    
+    def refresh_hud(self):
+        """Обновляет текст HUD и перерисовывает только его область."""
+        old_rect = self.hud_rect()
+        self.hud_text = profiler.format_summary()
+        self.update(old_rect.united(self.hud_rect()))
+    
+    def hud_rect(self):
+        """Область HUD в правом верхнем углу."""
+        metrics = QFontMetrics(self.hud_font)
+        lines = self.hud_text.splitlines() or [""]
+        width = max(metrics.width(line) for line in lines) + 20
+        height = metrics.lineSpacing() * len(lines) + 20
+        return QRect(self.width() - width - 20, 20, width, height)
+    
+    def draw_hud(self, painter):
+        """Рисует HUD: таблицу p50 / p95 / p99 / максимума по этапам в мс."""
+        if not self.hud_text:
+            return
+        rect = self.hud_rect()
+        painter.fillRect(rect, QColor(*OVERLAY_SETTINGS["text_bg_color"]))
+        painter.setPen(QColor(*OVERLAY_SETTINGS["text_color"]))
+        painter.setFont(self.hud_font)
+        painter.drawText(rect.adjusted(10, 10, -10, -10), Qt.AlignLeft | Qt.AlignTop, self.hud_text)
+    
+    def _ensure_style(self):
+        """Создает перо и шрифт заново, только если цвета в OVERLAY_SETTINGS изменились."""
+        key = (
+            tuple(OVERLAY_SETTINGS["frame_color"]),
+            tuple(OVERLAY_SETTINGS["text_bg_color"]),
+            tuple(OVERLAY_SETTINGS["text_color"]),
+        )
+        if key == self._style_key:
+            return
+        self._style_key = key
+        self._pen = QPen(QColor(*OVERLAY_SETTINGS["frame_color"]))
+        self._pen.setWidth(3)  # Толщина линии
+        self._font = QFont("Arial", 10)
+        self._label_pixmaps.clear()
+    
+    def label_pixmap(self, label):
+        """
+        Готовое изображение подписи (фон и текст) из кэша по тексту.
         
+        Подписи вида "hot dog 0.87" повторяются от кадра к кадру, поэтому текст
+        измеряется и рисуется один раз.
+        """
+        self._ensure_style()
+        pixmap = self._label_pixmaps.get(label)
+        if pixmap is not None:
+            return pixmap
+        if len(self._label_pixmaps) >= 512:
+            self._label_pixmaps.clear()
+        
+        ratio = self.devicePixelRatioF()
+        width = QFontMetrics(self._font).width(label) + 10
+        pixmap = QPixmap(int(width * ratio), int(20 * ratio))
+        pixmap.setDevicePixelRatio(ratio)
+        pixmap.fill(Qt.transparent)
+        painter = QPainter(pixmap)
+        painter.fillRect(QRect(0, 0, width, 20), QColor(*OVERLAY_SETTINGS["text_bg_color"]))
+        painter.setPen(QColor(*OVERLAY_SETTINGS["text_color"]))
+        painter.setFont(self._font)
+        painter.drawText(5, 15, label)
+        painter.end()
+        self._label_pixmaps[label] = pixmap
+        return pixmap
+    
+    @staticmethod
+    def box_label(box):
+        return f"{box[4]} {box[5]:.2f}"
+    
+    def box_rect(self, box):
+        """Область экрана, которую занимает рамка вместе с подписью над ней."""
+        x1, y1, x2, y2 = box[:4]
+        label = self.label_pixmap(self.box_label(box))
+        label_width = int(label.width() / label.devicePixelRatio())
+        # Перо толщиной 3 выходит за границу рамки на 2 пикселя
+        rect = QRect(x1 - 2, y1 - 2, x2 - x1 + 5, y2 - y1 + 5)
+        return rect.united(QRect(x1, y1 - 25, label_width, 20))
+    
+    def boxes_region(self, boxes):
+        """Объединение областей рамок для частичной перерисовки."""
+        region = QRegion()
+        for box in boxes:
+            region = region.united(self.box_rect(box))
+        return region
+    
     def check_boxes_age(self):
         """
         Проверяет, сколько времени прошло с момента последнего обновления боксов.
@@ -144,60 +414,70 @@ class DetectionOverlay(QWidget):
         if elapsed_ms > self.hide_timeout:
             if self.show_boxes:
                 self.show_boxes = False
-                self.update()  # Вызываем перерисовку для скрытия боксов
+                self.update(self.boxes_region(self.boxes))  # Перерисовываем только области скрываемых рамок
         
     def paintEvent(self, event):
         """
         Отрисовывает боксы на экране.
         """
+        paint_start = time.perf_counter()
         painter = QPainter(self)
         
+        if self.show_hud:
+            self.draw_hud(painter)
+        
         # Если флаг показа боксов выключен, не рисуем их
         if not self.show_boxes:
             return
-            
-        # Устанавливаем кисть для рамок
-        frame_color = OVERLAY_SETTINGS["frame_color"]
-        pen = QPen(QColor(*frame_color))  # Зеленый цвет
-        pen.setWidth(3)  # Толщина линии
-        painter.setPen(pen)
         
-        # Устанавливаем шрифт для текста
-        font = QFont("Arial", 10)
-        painter.setFont(font)
+        # Перо для рамок из кэша
+        self._ensure_style()
+        painter.setPen(self._pen)
         
-        # Рисуем все боксы
+        # Рисуем только рамки, попавшие в перерисовываемую область
+        damaged = event.region()
         for box in self.boxes:
-            x1, y1, x2, y2, class_name, conf = box
+            if not damaged.intersects(self.box_rect(box)):
+                continue
+            x1, y1, x2, y2 = box[:4]
             
             # Рисуем прямоугольник
             painter.drawRect(QRect(x1, y1, x2 - x1, y2 - y1))
             
-            # Добавляем текст с названием класса и уверенностью
-            label = f"{class_name} {conf:.2f}"
-            
-            # Добавляем фон для текста
-            text_bg_color = OVERLAY_SETTINGS["text_bg_color"]
-            label_rect = QRect(x1, y1 - 25, painter.fontMetrics().width(label) + 10, 20)
-            painter.fillRect(label_rect, QColor(*text_bg_color))
-            
-            # Рисуем текст белым цветом
-            text_color = OVERLAY_SETTINGS["text_color"]
-            painter.setPen(QColor(*text_color))
-            painter.drawText(x1 + 5, y1 - 10, label)
-            
-            # Возвращаем перо для следующих рамок
-            painter.setPen(pen)
+            # Подпись с названием класса и уверенностью - готовое изображение с фоном
+            painter.drawPixmap(x1, y1 - 25, self.label_pixmap(self.box_label(box)))
+        
+        paint_end = time.perf_counter()
+        profiler.record("paint", paint_start, paint_end)
+        if self.paint_captured_at is not None:
+            # Задержка от захвата кадра до его рамок на экране
+            self.paint_latency.add(capture_to_paint=(paint_end - self.paint_captured_at) * 1000)
+            profiler.record("capture_to_paint", self.paint_captured_at, paint_end)
+            self.paint_captured_at = None
             
     def closeEvent(self, event):
         """
         Обрабатывает закрытие оверлея.
         """
         self.hide_timer.stop()
+        self.hud_timer.stop()
+        
+        latency = self.paint_latency.summary().get("capture_to_paint")
+        if latency:
+            print(f"Задержка захват -> отрисовка, мс (p50 / p95 / макс): "
+                  f"{latency[0]:.0f} / {latency[1]:.0f} / {latency[2]:.0f}; "
+                  f"перерисовок: {self.repaint_stats['painted']}, "
+                  f"пропущено без изменений: {self.repaint_stats['skipped']}")
         
-        # Останавливаем медиаплеер, если он существует
-        if self.sound_player:
-            self.sound_player.stop()
+        # Останавливаем звук и выводим задержку детекция -> звук (звук общий для оверлеев всех мониторов)
+        if self.alert_sound:
+            self.alert_sound.stop()
+            sound_latency = self.alert_sound.format_latency()
+            if sound_latency:
+                print(f"Задержка звука, мс (p50 / p95 / макс): {sound_latency}; "
+                      f"уведомлений: {self.alert_sound.stats['played']}, "
+                      f"из них поверх звучащего: {self.alert_sound.stats['overlapped']}")
+                self.alert_sound.latency.reset()
             
         self.closed.emit()
         event.accept()
@@ -209,4 +489,7 @@ class DetectionOverlay(QWidget):
         # Закрываем оверлей по нажатию Esc
         if event.key() == Qt.Key_Escape:
             self.close()
+        # H - показать / скрыть HUD со временем этапов
+        elif event.key() == Qt.Key_H:
+            self.set_hud_visible(not self.show_hud)
         event.accept() 
\ No newline at end of file
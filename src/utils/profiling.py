@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# Импорты модулей приложения
+from src.config import PROFILING_SETTINGS
+
+# Порядок этапов в сводке; остальные этапы выводятся после них
+STAGES = (
+    "capture", "decode", "preprocess", "inference", "postprocess", "tracking", "draw", "callback", "paint", "write",
+)
+
+# Границы корзин гистограммы, мс
+HISTOGRAM_EDGES = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class _NullSpan:
+    """Пустой замер: возвращается, когда профилирование выключено, и ничего не делает."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("profiler", "stage", "start")
+
+    def __init__(self, profiler, stage):
+        self.profiler = profiler
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.record(self.stage, self.start, time.perf_counter())
+        return False
+
+
+class StageProfiler:
+    """
+    Замеры времени по этапам обработки: захват, подготовка, инференс, постобработка, трекинг,
+    вызов оверлея, отрисовка (и декодирование / запись для видео).
+
+    Использование:
+        with profiler.span("capture"):
+            frame = backend.grab()
+
+    Хранит скользящее окно длительностей каждого этапа (перцентили, гистограмма) и журнал
+    интервалов для экспорта в формат Chrome trace (chrome://tracing, ui.perfetto.dev).
+    Выключенный профайлер возвращает из span() один и тот же пустой объект - это стоит
+    одной проверки флага на замер.
+    """
+
+    def __init__(self, enabled=False, window=300, trace_events=100000, dump_interval=0):
+        """
+        Args:
+            enabled (bool): Включить замеры
+            window (int): Сколько последних замеров каждого этапа хранить для статистики
+            trace_events (int): Сколько последних интервалов хранить для экспорта трассы
+            dump_interval (float): Раз в сколько секунд maybe_dump() печатает сводку (0 - не печатать)
+        """
+        self.enabled = enabled
+        self.window = window
+        self.dump_interval = dump_interval
+        self._lock = threading.Lock()
+        self._durations = {}  # этап -> deque длительностей, мс
+        self._counts = {}  # этап -> всего замеров
+        self._trace = deque(maxlen=trace_events)  # (этап, начало, конец, id потока)
+        self._thread_names = {}
+        self._last_dump = time.perf_counter()
+
+    def span(self, stage):
+        """Контекстный менеджер, замеряющий время этапа stage."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage)
+
+    def record(self, stage, start, end):
+        """
+        Записывает интервал этапа.
+
+        Args:
+            stage (str): Этап
+            start (float): Начало по time.perf_counter()
+            end (float): Конец по time.perf_counter()
+        """
+        if not self.enabled:
+            return
+        thread_id = threading.get_ident()
+        with self._lock:
+            durations = self._durations.get(stage)
+            if durations is None:
+                durations = self._durations[stage] = deque(maxlen=self.window)
+            durations.append((end - start) * 1000)
+            self._counts[stage] = self._counts.get(stage, 0) + 1
+            self._trace.append((stage, start, end, thread_id))
+            if thread_id not in self._thread_names:
+                self._thread_names[thread_id] = threading.current_thread().name
+
+    def summary(self):
+        """
+        Статистика по этапам за последние window замеров.
+
+        Returns:
+            dict: Этап -> {"count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}
+        """
+        with self._lock:
+            snapshot = {stage: np.asarray(values) for stage, values in self._durations.items() if values}
+            counts = dict(self._counts)
+        order = [s for s in STAGES if s in snapshot] + sorted(s for s in snapshot if s not in STAGES)
+        result = {}
+        for stage in order:
+            values = snapshot[stage]
+            p50, p95, p99 = np.percentile(values, (50, 95, 99))
+            result[stage] = {
+                "count": counts[stage],
+                "mean_ms": float(values.mean()),
+                "p50_ms": float(p50),
+                "p95_ms": float(p95),
+                "p99_ms": float(p99),
+                "max_ms": float(values.max()),
+            }
+        return result
+
+    def histogram(self, stage, edges=HISTOGRAM_EDGES):
+        """
+        Гистограмма длительностей этапа.
+
+        Returns:
+            list: [(верхняя граница корзины в мс или None для последней, количество), ...]
+        """
+        with self._lock:
+            values = np.asarray(self._durations.get(stage, ()))
+        counts = np.bincount(np.searchsorted(edges, values, side="right"), minlength=len(edges) + 1)
+        return list(zip(list(edges) + [None], counts.tolist()))
+
+    def format_summary(self):
+        """Сводка в виде таблицы для консоли и HUD оверлея."""
+        lines = [f"{'этап':<12}{'p50':>8}{'p95':>8}{'p99':>8}{'макс':>8}"]
+        for stage, s in self.summary().items():
+            lines.append(f"{stage:<12}{s['p50_ms']:>8.1f}{s['p95_ms']:>8.1f}{s['p99_ms']:>8.1f}{s['max_ms']:>8.1f}")
+        return "\n".join(lines)
+
+    def maybe_dump(self):
+        """Печатает сводку, если с прошлого вывода прошло dump_interval секунд."""
+        if not self.enabled or not self.dump_interval:
+            return
+        now = time.perf_counter()
+        if now - self._last_dump >= self.dump_interval:
+            self._last_dump = now
+            print(f"Время по этапам, мс (последние {self.window} замеров):\n{self.format_summary()}")
+
+    def export_chrome_trace(self, path):
+        """
+        Сохраняет журнал интервалов в формате Chrome trace JSON.
+
+        Файл открывается в chrome://tracing или https://ui.perfetto.dev; каждый поток - отдельная дорожка.
+
+        Returns:
+            int: Количество записанных интервалов
+        """
+        with self._lock:
+            trace = list(self._trace)
+            thread_names = dict(self._thread_names)
+        pid = os.getpid()
+        # Интервалы записываются по окончании, поэтому начало трассы - самое раннее начало
+        origin = min((start for _, start, _, _ in trace), default=0.0)
+        events = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in thread_names.items()
+        ]
+        events.extend(
+            {
+                "name": stage,
+                "cat": "hotdog",
+                "ph": "X",
+                "pid": pid,
+                "tid": tid,
+                "ts": (start - origin) * 1e6,
+                "dur": (end - start) * 1e6,
+            }
+            for stage, start, end, tid in trace
+        )
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(trace)
+
+    def reset(self):
+        """Очищает статистику и журнал."""
+        with self._lock:
+            self._durations.clear()
+            self._counts.clear()
+            self._trace.clear()
+            self._thread_names.clear()
+        self._last_dump = time.perf_counter()
+
+
+# Общий профайлер приложения: этапы из разных модулей попадают в одну сводку и одну трассу
+profiler = StageProfiler(
+    enabled=PROFILING_SETTINGS["enabled"],
+    window=PROFILING_SETTINGS["window"],
+    trace_events=PROFILING_SETTINGS["trace_events"],
+    dump_interval=PROFILING_SETTINGS["dump_interval"],
+)
@@ -1,22 +1,25 @@
 import cv2
-import numpy as np
-import pyautogui
 import time
 import os
-import sys
 import threading
 
-# Добавляем пути импорта
-current_dir = os.path.dirname(os.path.abspath(__file__))
-src_dir = os.path.dirname(current_dir)
-sys.path.insert(0, src_dir)
-
 # Импорты модулей приложения
-from src.detection.yolo_detector import HotDogDetector
-from src.config import MODEL_PATH, CONFIDENCE_THRESHOLD, OVERLAY_SETTINGS
+from src.detection.registry import model_registry
+from src.utils.capture_backends import CaptureEnded, create_capture_backend
+from src.detection.input_size import AdaptiveImageSize, MODEL_STRIDE, input_shape
+from src.detection.tiling import TiledInference
+from src.detection.tracker import IoUTracker
+from src.utils.change_detection import FrameChangeDetector, boxes_intersect
+from src.utils.detection_worker import DetectionJob, DetectionWorkers, FramePool, LatencyStats
+from src.utils.profiling import profiler
+from src.config import (
+    MODEL_PATH, OVERLAY_SETTINGS, CHANGE_DETECTION_SETTINGS, CAPTURE_SETTINGS,
+    TRACKING_SETTINGS, INPUT_SIZE_SETTINGS, TILING_SETTINGS
+)
 
 class ScreenCapture:
-    def __init__(self, region=None, detection_enabled=True, overlay_callback=None):
+    def __init__(self, region=None, detection_enabled=True, overlay_callback=None, detector=None, backend=None,
+                 tiled=None, workers=None, name=None, follow=None, conf=None):
         """
         Инициализация захвата экрана.
         
@@ -25,60 +28,418 @@ class ScreenCapture:
                                       None для полного экрана.
             detection_enabled (bool): Включить детекцию хот-догов на захваченных кадрах.
             overlay_callback (callable, optional): Функция обратного вызова для отправки 
-                                                  данных обнаружения на оверлей.
+                                                  данных обнаружения на оверлей:
+                                                  overlay_callback(boxes[, captured_at]), где captured_at -
+                                                  время захвата кадра по time.perf_counter().
+                                                  Вызывается из потока детекции (для Qt см. OverlayChannel).
+            detector (HotDogDetector, optional): Готовый детектор. Если не передан,
+                                                 берется общий детектор из реестра моделей.
+            backend (CaptureBackend, optional): Источник кадров. Если не передан,
+                                                создается по CAPTURE_SETTINGS["backend"].
+            tiled (bool, optional): Детекция по перекрывающимся плиткам для мелких объектов
+                                    (по умолчанию из TILING_SETTINGS["enabled"]).
+            workers (int, optional): Количество потоков детекции
+                                     (по умолчанию из CAPTURE_SETTINGS["detection_workers"]).
+            name (str, optional): Имя источника в статистике (например, "Монитор 2").
+            follow (WindowTracker, optional): Окно, за которым следует область захвата
+                                              (объект с методом geometry() -> (left, top, width, height) или None).
+            conf (float, optional): Порог уверенности этого захвата (по умолчанию порог детектора).
+                                    Детектор общий, поэтому порог передается в каждый вызов модели
+                                    и меняется через атрибут conf, а не у детектора.
         """
         self.region = region
+        self.name = name
+        
+        # Захват окна: область переносится вслед за окном, рамки на оверлее сдвигаются на ее положение
+        self.follow = follow
+        self.target_visible = True  # Отслеживаемое окно не свернуто и не закрыто
+        self.last_follow_poll = 0.0
+        if follow is not None and region is None:
+            self.region = follow.geometry()
+        self.overlay_origin = (0, 0)  # Левый верхний угол экрана оверлея (в пикселях экрана)
         self.detection_enabled = detection_enabled
         self.running = False
         self.overlay_callback = overlay_callback
         self.pause_detection = False
-        self.detection_thread = None
         self.processing_lock = threading.Lock()
-        self.latest_frame = None
+        self.latest_frame = None  # Последний размеченный кадр (только если annotate_frames)
+        self.annotate_frames = True  # Рисовать рамки на копии кадра (выключается в режиме оверлея)
         self.latest_detections = []
+        self.frame_detections = []  # Последние детекции в формате детектора [(класс, x1, y1, x2, y2, conf), ...]
+        
+        # Источник кадров и пул переиспользуемых буферов: кадр, отправленный на детекцию,
+        # принадлежит заданию, а захват продолжается в свободный буфер из пула.
+        # Буфер возвращается в пул после детекции или когда кадр вытеснен более новым.
+        self.backend = backend if backend is not None else create_capture_backend(CAPTURE_SETTINGS["backend"], self.region)
+        if follow is not None:
+            self.backend.region = self.region  # Область окна, а не весь экран
+        self.capture_buffer = None
+        
+        # Долгоживущие потоки детекции с ящиком на один кадр («побеждает последний кадр»)
+        workers = CAPTURE_SETTINGS["detection_workers"] if workers is None else workers
+        self.frame_pool = FramePool(max_size=workers + 2)
+        self.workers = DetectionWorkers(self._process_job, workers=workers, on_done=self._release_job)
+        self.job_seq = 0  # Номер последнего отправленного кадра
+        self.published_seq = 0  # Номер кадра, чьи детекции сейчас на оверлее
+        self.latency = LatencyStats(window=CAPTURE_SETTINGS["latency_window"])
+        
+        self.detector = detector
+        self.conf = conf
+        self._owns_detector = False  # Детектор получен из реестра и должен быть возвращен
+        
+        # Берем общий детектор из реестра, если нужна детекция и детектор не передан
+        if detection_enabled and self.detector is None:
+            self.detector = model_registry.acquire(MODEL_PATH)
+            self._owns_detector = True
+        
+        # Пропуск детекции, пока содержимое экрана не меняется
+        self.change_detector = None
+        if CHANGE_DETECTION_SETTINGS["enabled"]:
+            self.change_detector = FrameChangeDetector(
+                thumbnail_size=CHANGE_DETECTION_SETTINGS["thumbnail_size"],
+                pixel_threshold=CHANGE_DETECTION_SETTINGS["pixel_threshold"],
+                changed_ratio=CHANGE_DETECTION_SETTINGS["changed_ratio"],
+            )
+        self.last_overlay_refresh = 0.0  # Когда сохраненные детекции последний раз отправлялись на оверлей
+        self.overlay_has_boxes = False  # На оверлее сейчас есть рамки (пустой результат отправляется один раз)
+        
+        # Трекер дает рамкам постоянные номера между детекциями и сглаживает их координаты
+        self.tracker = None
+        if TRACKING_SETTINGS["enabled"]:
+            self.tracker = IoUTracker(
+                iou_threshold=TRACKING_SETTINGS["iou_threshold"],
+                max_missed=TRACKING_SETTINGS["max_missed"],
+                smoothing=TRACKING_SETTINGS["smoothing"],
+                velocity_gain=TRACKING_SETTINGS["velocity_gain"],
+            )
+        self.detection_index = 0  # Номер запуска детекции (шкала времени трекера)
+        
+        # Размер входа модели: кадр уменьшается в переиспользуемый буфер, а не ultralytics на каждом вызове
+        self.imgsz = INPUT_SIZE_SETTINGS["initial"]
+        self.imgsz_policy = None
+        if INPUT_SIZE_SETTINGS["adaptive"]:
+            self.imgsz_policy = AdaptiveImageSize(
+                sizes=INPUT_SIZE_SETTINGS["sizes"],
+                initial=INPUT_SIZE_SETTINGS["initial"],
+                small_box=INPUT_SIZE_SETTINGS["small_box"],
+                low_conf=INPUT_SIZE_SETTINGS["low_conf"],
+                patience=INPUT_SIZE_SETTINGS["patience"],
+            )
+        
+        # Доля интервала между кадрами, которую может занимать модель
+        # (меньше 1, если модель делят несколько мониторов - см. MultiScreenCapture)
+        self.budget_share = 1.0
         
-        # Создаем детектор, если нужна детекция
-        if detection_enabled:
-            self.detector = HotDogDetector(MODEL_PATH, conf=CONFIDENCE_THRESHOLD)
+        # Детекция по плиткам: размер входа фиксирован, число плиток подбирается по бюджету времени
+        self.tiling = None
+        if TILING_SETTINGS["enabled"] if tiled is None else tiled:
+            self.tiling = TiledInference(
+                self.detector,
+                imgsz=INPUT_SIZE_SETTINGS["initial"],
+                max_downscale=TILING_SETTINGS["max_downscale"],
+                overlap=TILING_SETTINGS["overlap"],
+                include_full_frame=TILING_SETTINGS["include_full_frame"],
+                iou_threshold=TILING_SETTINGS["iou_threshold"],
+                ios_threshold=TILING_SETTINGS["ios_threshold"],
+            )
+        
+        # Счетчики кадров: обработанные детекцией, пропущенные без изменений экрана,
+        # вытесненные более новым кадром до начала детекции и устаревшие к концу детекции
+        self.frame_stats = {"inferred": 0, "skipped": 0, "partial": 0, "dropped": 0, "stale": 0}
     
     def capture_frame(self):
         """
         Захват одного кадра с экрана.
         
+        Кадр записывается в переиспользуемый буфер, поэтому он действителен
+        только до следующего вызова capture_frame().
+        
         Returns:
             numpy.ndarray: Захваченный кадр в формате OpenCV (BGR).
         """
-        screenshot = pyautogui.screenshot(region=self.region)
-        frame = np.array(screenshot)
-        # Конвертация из RGB в BGR для OpenCV
-        return cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        self.capture_buffer = self.backend.grab(out=self.capture_buffer)
+        return self.capture_buffer
+    
+    def region_origin(self):
+        """Левый верхний угол области захвата на экране (без области - угол экрана оверлея)."""
+        return tuple(self.region[:2]) if self.region is not None else self.overlay_origin
+    
+    def to_overlay(self, boxes, origin):
+        """
+        Переводит рамки из координат кадра в координаты экрана оверлея.
+        
+        Args:
+            boxes (list): Рамки [(x1, y1, x2, y2, ...), ...] в координатах кадра
+            origin (tuple): Угол области захвата на экране в момент захвата кадра
+        """
+        dx = origin[0] - self.overlay_origin[0]
+        dy = origin[1] - self.overlay_origin[1]
+        if not dx and not dy:
+            return boxes
+        return [(box[0] + dx, box[1] + dy, box[2] + dx, box[3] + dy) + tuple(box[4:]) for box in boxes]
     
-    def process_frame(self, frame):
+    def set_region(self, region):
+        """
+        Меняет область захвата (например, окно передвинули или изменили его размер).
+        
+        При сдвиге содержимое кадра не меняется и сохраненные детекции остаются верными.
+        При изменении размера сбрасываются детектор изменений, трекер и сохраненные детекции,
+        а результаты кадров старого размера, которые еще в обработке, отбрасываются.
+        """
+        with self.processing_lock:
+            resized = self.region is None or tuple(region[2:]) != tuple(self.region[2:])
+            self.region = region
+            self.backend.region = region
+            if not resized:
+                return
+            self.published_seq = self.job_seq
+            self.frame_detections = []
+            self.latest_detections = []
+            self.frame_pool.clear()
+            if self.change_detector is not None:
+                self.change_detector.reset()
+            if self.tracker is not None:
+                self.tracker.reset()
+    
+    def follow_target(self):
+        """
+        Переносит область захвата вслед за отслеживаемым окном (не чаще follow_interval).
+        
+        Returns:
+            bool: False, если окно свернуто или закрыто - кадр захватывать не нужно
+        """
+        if self.follow is None:
+            return True
+        now = time.time()
+        if (now - self.last_follow_poll) * 1000 < CAPTURE_SETTINGS["follow_interval"]:
+            return self.target_visible
+        self.last_follow_poll = now
+        
+        region = self.follow.geometry()
+        if region is None:
+            if self.target_visible and self.overlay_callback:
+                self.overlay_callback([])  # Окно скрылось - убираем его рамки с оверлея
+                self.overlay_has_boxes = False
+            self.target_visible = False
+            return False
+        self.target_visible = True
+        if region != self.region:
+            self.set_region(region)
+        return True
+    
+    def _process_job(self, job):
+        self.process_frame(job.frame, job.regions, job=job)
+    
+    def _release_job(self, job):
+        self.frame_pool.release(job.frame)
+    
+    def process_frame(self, frame, regions=None, job=None):
         """
         Обрабатывает кадр для обнаружения хот-догов.
-        Этот метод будет вызываться в отдельном потоке.
+        Этот метод вызывается в потоке детекции.
+        
+        Args:
+            frame (numpy.ndarray): Кадр (BGR), принадлежащий этому потоку
+            regions (list, optional): Изменившиеся области [(x1, y1, x2, y2), ...].
+                                      None - обработать весь кадр.
+            job (DetectionJob, optional): Задание с временем захвата и номером кадра
         """
         if not self.running or self.pause_detection:
             return
+        
+        region_sizes = None
+        if regions is not None:
+            region_sizes = self.region_input_sizes(frame.shape, regions)
+            if region_sizes is None:
+                regions = None  # Вырезки обошлись бы модели не дешевле всего кадра
             
-        # Обнаруживаем хот-доги на кадре
-        result_frame, detected_objects = self.detector.detect_on_image(frame)
+        # Обнаруживаем хот-доги на кадре (только боксы, без копии кадра)
+        if regions is None and self.tiling is not None:
+            detected_objects = self.tiling.detect(frame, self.detector.classes, self.conf)
+        elif regions is None:
+            start_time = time.perf_counter()
+            detected_objects = self.detector.detect(frame, imgsz=self.imgsz, conf=self.conf)
+            if self.imgsz_policy is not None:
+                # Время самой модели: ожидание, пока модель занята другим потоком или монитором,
+                # не должно уменьшать размер входа
+                latency_ms = getattr(self.detector, "last_inference_ms", None)
+                if latency_ms is None:
+                    latency_ms = (time.perf_counter() - start_time) * 1000
+                self.imgsz = self.imgsz_policy.update(latency_ms, detected_objects, frame.shape)
+        else:
+            detected_objects = self.detect_in_regions(frame, regions, region_sizes)
+        
+        # Размеченный кадр нужен только для сохранения скриншотов и callback кадров;
+        # оверлею достаточно боксов. Буфер кадра вернется в пул, поэтому рисуем на копии.
+        result_frame = None
+        if self.annotate_frames:
+            with profiler.span("draw"):
+                result_frame = self.detector.draw_detections(frame.copy(), detected_objects)
+        
+        inferred_at = time.perf_counter()
         
         # Обновляем последние обнаружения
         with self.processing_lock:
+            if job is not None:
+                # С двумя потоками детекции более новый кадр может закончиться раньше
+                if job.seq < self.published_seq:
+                    self.frame_stats["stale"] += 1
+                    return
+                self.published_seq = job.seq
+            self.frame_stats["inferred"] += 1
+            if regions:
+                self.frame_stats["partial"] += 1
+            
+            with profiler.span("tracking"):
+                overlay_boxes = self.track_detections(detected_objects)
             self.latest_frame = result_frame
+            self.frame_detections = detected_objects
+            self.latest_detections = overlay_boxes
+            # Пустой результат отправляем один раз, когда рамки пропали: иначе они висели бы
+            # на экране до hide_timeout, хотя детектор уже знает, что хот-дога нет
+            deliver = bool(overlay_boxes) or self.overlay_has_boxes
+            self.overlay_has_boxes = bool(overlay_boxes)
+        
+        # Callback оверлея вызываем после снятия блокировки: работа GUI не должна задерживать
+        # следующую детекцию и захват
+        if self.overlay_callback and deliver:
+            with profiler.span("callback"):
+                if job is not None:
+                    self.overlay_callback(self.to_overlay(overlay_boxes, job.origin), job.captured_at)
+                else:
+                    self.overlay_callback(self.to_overlay(overlay_boxes, self.region_origin()))
+        
+        if job is not None:
+            # Задержка кадра: ожидание в ящике, детекция и путь от захвата до оверлея
+            now = time.perf_counter()
+            self.latency.add(
+                queue=(job.started_at - job.captured_at) * 1000,
+                inference=(inferred_at - job.started_at) * 1000,
+                total=(now - job.captured_at) * 1000,
+            )
+    
+    def track_detections(self, detected_objects):
+        """
+        Преобразует детекции в формат оверлея, сопоставляя их с треками.
+        
+        С трекером каждая рамка получает постоянный номер трека, а координаты сглаживаются.
+        Трек, ненадолго потерянный детектором, остается на экране до max_missed детекций,
+        поэтому рамки не мигают и не вызывают повторный звук.
+        
+        Args:
+            detected_objects (list): Боксы [(класс, x1, y1, x2, y2, conf), ...]
             
-            # Преобразуем detected_objects в формат для оверлея
-            overlay_boxes = []
-            for cls, x1, y1, x2, y2, conf in detected_objects:
-                class_name = self.detector.classes.get(cls, str(cls))
-                overlay_boxes.append((x1, y1, x2, y2, class_name, conf))
+        Returns:
+            list: Рамки [(x1, y1, x2, y2, class_name, conf, track_id), ...];
+                  без трекера - [(x1, y1, x2, y2, class_name, conf), ...]
+        """
+        classes = self.detector.classes
+        if self.tracker is None:
+            return [
+                (x1, y1, x2, y2, classes.get(cls, str(cls)), conf)
+                for cls, x1, y1, x2, y2, conf in detected_objects
+            ]
+        
+        self.detection_index += 1
+        self.tracker.update(detected_objects, self.detection_index)
+        overlay_boxes = []
+        for track in self.tracker.tracks:
+            cls, x1, y1, x2, y2, conf = track.as_detection()
+            overlay_boxes.append((x1, y1, x2, y2, classes.get(cls, str(cls)), conf, track.id))
+        return overlay_boxes
+    
+    def region_input_sizes(self, frame_shape, regions):
+        """
+        Размеры входа модели для вырезок изменившихся областей.
+        
+        Вырезка уменьшается в том же масштабе, что и весь кадр при текущем imgsz: без этого
+        ultralytics растянул бы маленькую вырезку до 640 по длинной стороне, и детекция
+        по областям стоила бы не меньше детекции всего кадра.
+        
+        Args:
+            frame_shape (tuple): Размер кадра (высота, ширина, ...)
+            regions (list): Изменившиеся области [(x1, y1, x2, y2), ...]
             
-            self.latest_detections = overlay_boxes
+        Returns:
+            list: imgsz для каждой вырезки или None, если суммарный вход модели по вырезкам
+                  не меньше входа для всего кадра (тогда выгоднее обработать кадр целиком)
+        """
+        imgsz = self.imgsz or 640
+        height, width = frame_shape[:2]
+        scale = min(1.0, imgsz / max(height, width))
+        full_h, full_w = input_shape(height, width, scale)
+        
+        sizes = []
+        cost = 0
+        for x1, y1, x2, y2 in regions:
+            crop_long = max(x2 - x1, y2 - y1)
+            # Кратно шагу сети с округлением вверх: вырезка уменьшается не сильнее, чем весь кадр
+            size = -(-int(round(crop_long * scale)) // MODEL_STRIDE) * MODEL_STRIDE
+            sizes.append(max(MODEL_STRIDE, size))
+            crop_h, crop_w = input_shape(y2 - y1, x2 - x1, min(1.0, sizes[-1] / crop_long))
+            cost += crop_h * crop_w
+        if cost >= full_h * full_w:
+            return None
+        return sizes
+    
+    def detect_in_regions(self, frame, regions, sizes=None):
+        """
+        Запускает детекцию только на изменившихся областях кадра.
+        
+        Каждая вырезка уменьшается в масштабе всего кадра (см. region_input_sizes),
+        боксы переводятся в координаты экрана и объединяются с сохраненными детекциями
+        из неизменившихся областей.
+        
+        Args:
+            frame (numpy.ndarray): Кадр (BGR)
+            regions (list): Изменившиеся области [(x1, y1, x2, y2), ...]
+            sizes (list, optional): imgsz для каждой вырезки (по умолчанию из region_input_sizes)
             
-            # Вызываем callback для обновления оверлея
-            if self.overlay_callback and self.latest_detections:
-                self.overlay_callback(self.latest_detections)
+        Returns:
+            list: Боксы в формате [(класс, x1, y1, x2, y2, conf), ...]
+        """
+        if sizes is None:
+            sizes = self.region_input_sizes(frame.shape, regions)
+            if sizes is None:
+                sizes = [None] * len(regions)
+        # Вырезки разного размера не объединяем в батч: ultralytics дополнил бы каждую
+        # до квадрата imgsz x imgsz
+        crop_detections = [
+            self.detector.detect(frame[y1:y2, x1:x2], imgsz=size, conf=self.conf)
+            for (x1, y1, x2, y2), size in zip(regions, sizes)
+        ]
+        
+        # Детекции из неизменившихся областей берем из кэша
+        with self.processing_lock:
+            detected_objects = [
+                det for det in self.frame_detections
+                if not any(boxes_intersect(det[1:5], region) for region in regions)
+            ]
+        
+        # Переводим боксы из координат вырезки в координаты кадра
+        for (ox, oy, _, _), detections in zip(regions, crop_detections):
+            for cls, x1, y1, x2, y2, conf in detections:
+                detected_objects.append((cls, x1 + ox, y1 + oy, x2 + ox, y2 + oy, conf))
+        
+        return detected_objects
+    
+    def refresh_cached_detections(self):
+        """
+        Повторно отправляет сохраненные детекции на оверлей, пока экран не меняется,
+        чтобы рамки не скрывались по таймауту. Частота ограничена refresh_interval.
+        """
+        if not self.overlay_callback:
+            return
+        
+        current_time = time.time()
+        if (current_time - self.last_overlay_refresh) * 1000 < CHANGE_DETECTION_SETTINGS["refresh_interval"]:
+            return
+        
+        with self.processing_lock:
+            detections = list(self.latest_detections)
+        if detections:
+            self.overlay_callback(self.to_overlay(detections, self.region_origin()))
+            self.last_overlay_refresh = current_time
     
     def start_capture(self, callback=None, fps=10, save_path=None, use_overlay=False):
         """
@@ -93,6 +454,13 @@ class ScreenCapture:
         """
         self.running = True
         delay = 1.0 / fps
+        # Оверлей рисует рамки сам - размеченная копия кадра нужна только callback и сохранению
+        self.annotate_frames = callback is not None or not use_overlay
+        if self.imgsz_policy is not None:
+            # CPU не успевает, если инференс дольше интервала между кадрами
+            self.imgsz_policy.budget_ms = delay * 1000 * INPUT_SIZE_SETTINGS["budget_ratio"] * self.budget_share
+        if self.tiling is not None:
+            self.tiling.budget_ms = delay * 1000 * TILING_SETTINGS["budget_ratio"] * self.budget_share
         
         # Папка для сохранения скриншотов по умолчанию, если оверлей не используется
         if not use_overlay and save_path is None:
@@ -101,26 +469,62 @@ class ScreenCapture:
             if not os.path.exists(save_path):
                 os.makedirs(save_path)
         
-        if use_overlay:
+        if use_overlay and self.name is None:
             print("Захват экрана запущен. Нажмите ESC для выхода.")
             
         frame_count = 0
         last_detection_time = time.time()
+        if self.detection_enabled:
+            self.workers.start()
         
         try:
             while self.running:
                 start_time = time.time()
                 
+                # Отслеживаемое окно свернуто или закрыто - ждем его появления
+                if not self.follow_target():
+                    time.sleep(delay)
+                    continue
+                
                 # Захватываем кадр
-                frame = self.capture_frame()
+                captured_at = time.perf_counter()
+                try:
+                    frame = self.capture_frame()
+                except CaptureEnded:
+                    # Источник кадров закончился (воспроизведение без повтора) - завершаем захват
+                    break
+                profiler.record("capture", captured_at, time.perf_counter())
                 
                 # Если включена детекция, обрабатываем кадр
                 if self.detection_enabled:
-                    # Запускаем обработку в отдельном потоке, если ещё не запущен или не активен
-                    if self.detection_thread is None or not self.detection_thread.is_alive():
-                        self.detection_thread = threading.Thread(target=self.process_frame, args=(frame.copy(),))
-                        self.detection_thread.daemon = True
-                        self.detection_thread.start()
+                    if self.change_detector is None or self.change_detector.has_changed(frame):
+                        regions = None
+                        if self.change_detector is not None:
+                            if CHANGE_DETECTION_SETTINGS["roi_enabled"]:
+                                # Ищем изменившиеся области, чтобы не обрабатывать статичную часть экрана
+                                regions = self.change_detector.changed_regions(
+                                    frame.shape,
+                                    grid=CHANGE_DETECTION_SETTINGS["grid"],
+                                    tile_ratio=CHANGE_DETECTION_SETTINGS["tile_ratio"],
+                                    padding=CHANGE_DETECTION_SETTINGS["roi_padding"],
+                                    max_area_ratio=CHANGE_DETECTION_SETTINGS["max_roi_area"],
+                                )
+                            self.change_detector.mark_inferred()
+                        # Передаем буфер потоку детекции без копирования, а захват
+                        # продолжаем в свободный буфер из пула
+                        self.job_seq += 1
+                        replaced = self.workers.submit(
+                            DetectionJob(frame, regions or None, captured_at, self.job_seq, self.region_origin())
+                        )
+                        if replaced is not None:
+                            # Детекция не успевала - предыдущий кадр вытеснен, его области учтены в новом
+                            self.frame_stats["dropped"] += 1
+                            self.frame_pool.release(replaced.frame)
+                        self.capture_buffer = self.frame_pool.acquire()
+                    else:
+                        # Экран не изменился - используем сохраненные детекции
+                        self.frame_stats["skipped"] += 1
+                        self.refresh_cached_detections()
                     
                     # Используем ранее обнаруженные объекты для оверлея
                     with self.processing_lock:
@@ -161,6 +565,7 @@ class ScreenCapture:
                         cv2.imwrite(filename, frame)
                 
                 frame_count += 1
+                profiler.maybe_dump()
                 
                 # Контроль частоты кадров
                 process_time = time.time() - start_time
@@ -172,24 +577,64 @@ class ScreenCapture:
             print("Захват экрана остановлен")
         finally:
             self.stop_capture()
-            if use_overlay:
+            # Ресурсы источника (например, объект mss) привязаны к потоку захвата
+            self.backend.close()
+            if use_overlay and self.name is None:
                 print("Захват экрана завершен.")
             
     def stop_capture(self):
         """Останавливает захват экрана."""
+        was_running = self.running
         self.running = False
         
-        # Если есть активный поток детекции, ждем его завершения
-        if self.detection_thread and self.detection_thread.is_alive():
-            self.detection_thread.join(timeout=1.0)
+        # Останавливаем потоки детекции, дождавшись текущих кадров
+        pending = self.workers.stop(timeout=1.0)
+        if pending is not None:
+            self.frame_pool.release(pending.frame)
             
+        # Выводим статистику пропуска кадров и задержки
+        latency = self.latency.summary()
+        total = self.frame_stats["inferred"] + self.frame_stats["skipped"]
+        if was_running and total:
+            prefix = f"{self.name}: " if self.name else ""
+            print(f"{prefix}Кадров с детекцией: {self.frame_stats['inferred']} "
+                  f"(из них по изменившимся областям: {self.frame_stats['partial']}), "
+                  f"пропущено без изменений экрана: {self.frame_stats['skipped']} "
+                  f"({self.frame_stats['skipped'] / total * 100:.1f}%), "
+                  f"вытеснено более новым кадром: {self.frame_stats['dropped']}, "
+                  f"размер входа модели: {self.imgsz}")
+            if "total" in latency:
+                print(f"{prefix}Задержка захват -> оверлей, мс (p50 / p95 / макс): " + ", ".join(
+                    f"{name} {p50:.0f} / {p95:.0f} / {worst:.0f}"
+                    for name, (p50, p95, worst) in latency.items()
+                ))
+            if profiler.enabled and self.name is None:
+                # Профайлер общий - при захвате нескольких мониторов сводку печатает MultiScreenCapture
+                print(f"Время по этапам, мс:\n{profiler.format_summary()}")
+        
         # Очищаем ресурсы
         self.latest_frame = None
         self.latest_detections = []
+        self.frame_detections = []
+        self.published_seq = self.job_seq
+        self.latency.reset()
+        if self.change_detector is not None:
+            self.change_detector.reset()
+        if self.tracker is not None:
+            self.tracker.reset()
+
+    def close(self):
+        """Останавливает захват и возвращает детектор в реестр моделей (модель остается загруженной)."""
+        self.stop_capture()
+        self.backend.close()
+        if self._owns_detector:
+            model_registry.release(self.detector)
+            self._owns_detector = False
 
 # Пример использования
 if __name__ == "__main__":
     # Создаем захват экрана с детекцией хот-догов
     screen_cap = ScreenCapture(detection_enabled=True)
     # Запускаем захват
-    screen_cap.start_capture(fps=5)  # Меньший FPS для меньшей нагрузки 
\ No newline at end of file
+    screen_cap.start_capture(fps=5)  # Меньший FPS для меньшей нагрузки
+    screen_cap.close() 
\ No newline at end of file
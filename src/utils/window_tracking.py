@@ -0,0 +1,125 @@
+def _pygetwindow():
+    """
+    Модуль pygetwindow или None.
+
+    Перечислять окна и читать их положение pygetwindow умеет только на Windows: на macOS
+    нет getAllWindows(), на Linux импорт не поддерживается.
+    """
+    try:
+        import pygetwindow
+    except (ImportError, NotImplementedError):
+        return None
+    if not hasattr(pygetwindow, "getAllWindows"):
+        return None
+    return pygetwindow
+
+
+def list_windows():
+    """
+    Заголовки видимых окон приложений.
+
+    Returns:
+        list: Заголовки окон; пустой список, если перечисление окон недоступно
+    """
+    gw = _pygetwindow()
+    if gw is None:
+        return []
+    titles = []
+    for title in gw.getAllTitles():
+        title = title.strip()
+        if title and title not in titles:
+            titles.append(title)
+    return titles
+
+
+def clip_region(region, bounds):
+    """
+    Обрезает область по границам экрана.
+
+    Args:
+        region (tuple): (left, top, width, height)
+        bounds (tuple): (left, top, width, height) - например, монитор с окном
+
+    Returns:
+        tuple: Область внутри bounds или None, если она целиком за границами
+    """
+    left = max(region[0], bounds[0])
+    top = max(region[1], bounds[1])
+    right = min(region[0] + region[2], bounds[0] + bounds[2])
+    bottom = min(region[1] + region[3], bounds[1] + bounds[3])
+    if right - left < 16 or bottom - top < 16:
+        return None
+    return (left, top, right - left, bottom - top)
+
+
+def monitor_for_region(region, monitors):
+    """Монитор из list_monitors(), на котором находится центр области (или первый монитор)."""
+    cx = region[0] + region[2] / 2
+    cy = region[1] + region[3] / 2
+    for monitor in monitors:
+        if (monitor["left"] <= cx < monitor["left"] + monitor["width"]
+                and monitor["top"] <= cy < monitor["top"] + monitor["height"]):
+            return monitor
+    return monitors[0]
+
+
+class WindowTracker:
+    """
+    Следит за положением и размером окна приложения.
+
+    Окно ищется по точному заголовку, а после того как найдено, отслеживается по дескриптору:
+    другое окно с похожим заголовком не перехватит захват, а смена заголовка (например,
+    другая вкладка браузера) не потеряет окно. ScreenCapture опрашивает geometry() в цикле
+    захвата и переносит область захвата вслед за окном, поэтому в детектор попадает
+    только окно, а не весь экран.
+    """
+
+    def __init__(self, title, bounds=None):
+        """
+        Args:
+            title (str): Точный заголовок окна (как в list_windows())
+            bounds (tuple, optional): Границы (left, top, width, height), по которым обрезается окно,
+                                      например монитор, на котором открыт оверлей
+        """
+        self.title = title.strip()
+        self.bounds = bounds
+        self._gw = _pygetwindow()
+        if self._gw is None:
+            raise RuntimeError("Отслеживание окон недоступно: нужен пакет pygetwindow (только Windows)")
+        self._window = None  # Найденное окно (объект pygetwindow с дескриптором)
+        self._warned_ambiguous = False
+
+    def _find(self):
+        """Окно с точно таким заголовком или None; из нескольких одинаковых берется первое с предупреждением."""
+        try:
+            windows = [w for w in self._gw.getAllWindows() if w.title.strip() == self.title]
+        except Exception:
+            return None
+        if len(windows) > 1 and not self._warned_ambiguous:
+            print(f"Окон с заголовком \"{self.title}\": {len(windows)}, отслеживается первое из них")
+            self._warned_ambiguous = True
+        return windows[0] if windows else None
+
+    def geometry(self):
+        """
+        Текущая область окна.
+
+        Returns:
+            tuple: (left, top, width, height) или None, если окно закрыто, свернуто или вне границ
+        """
+        if self._window is None:
+            self._window = self._find()
+            if self._window is None:
+                return None
+        window = self._window
+        try:
+            if window.isMinimized:
+                return None
+            region = (window.left, window.top, window.width, window.height)
+        except Exception:
+            # Окно закрыто - дескриптор больше не действителен, при следующем опросе ищем заново
+            self._window = None
+            return None
+        if self.bounds is not None:
+            return clip_region(region, self.bounds)
+        return region